@@ -0,0 +1,424 @@
+# benchmarks/harness.py
+#
+# End-to-end benchmarks for the cogs, run against fake Discord objects with
+# no network. Each scenario runs in its own process so peak RSS and on-disk
+# state don't leak between them. Run from the repo root:
+#
+#   python -m benchmarks.harness                      # every scenario
+#   python -m benchmarks.harness --scenario xp_flood --scale 2 --out bench.json
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ["xp_flood", "leaderboard", "quote_crud", "poll_close"]
+POLL_EMOJIS = ["🍎", "🍌", "🍒", "🍇", "🍉", "🍋"]
+
+_ids = itertools.count(10 ** 17)
+
+
+def next_id():
+    return next(_ids)
+
+
+# --- Fake Discord objects ---
+class FakeAsset:
+    url = "https://cdn.invalid/avatar.png"
+
+
+class FakeUser:
+    def __init__(self, user_id=None, name=None, bot=False, guild=None):
+        self.id = user_id or next_id()
+        self.name = name or f"user{self.id % 100000}"
+        self.display_name = self.name
+        self.mention = f"<@{self.id}>"
+        self.display_avatar = FakeAsset()
+        self.bot = bot
+        self.guild = guild
+        self.created_at = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+class FakeMessage:
+    def __init__(self, channel, author=None, content="", message_id=None):
+        self.id = message_id or next_id()
+        self.channel = channel
+        self.guild = channel.guild
+        self.author = author
+        self.content = content
+        self.created_at = datetime.now(timezone.utc)
+        self.reactions = []
+        self.edits = 0
+
+    async def edit(self, **kwargs):
+        self.edits += 1
+
+    async def add_reaction(self, emoji):
+        pass
+
+    async def delete(self):
+        pass
+
+
+class FakeChannel:
+    def __init__(self, guild, channel_id=None):
+        self.id = channel_id or next_id()
+        self.guild = guild
+        self.mention = f"<#{self.id}>"
+        self.sent = 0
+
+    async def send(self, *args, **kwargs):
+        self.sent += 1
+        return FakeMessage(self)
+
+    def get_partial_message(self, message_id):
+        return FakeMessage(self, message_id=message_id)
+
+
+class FakeGuild:
+    def __init__(self, member_count):
+        self.id = next_id()
+        self.name = f"guild{self.id % 1000}"
+        self.channel = FakeChannel(self)
+        self.members = [FakeUser(guild=self) for _ in range(member_count)]
+        self.member_count = member_count
+        self._members = {member.id: member for member in self.members}
+
+    def get_member(self, user_id):
+        return self._members.get(user_id)
+
+
+class FakeResponse:
+    def __init__(self):
+        self.done = False
+
+    def is_done(self):
+        return self.done
+
+    async def send_message(self, *args, **kwargs):
+        self.done = True
+
+    async def defer(self, **kwargs):
+        self.done = True
+
+    async def edit_message(self, **kwargs):
+        self.done = True
+
+
+class FakeFollowup:
+    def __init__(self, channel):
+        self.channel = channel
+
+    async def send(self, *args, **kwargs):
+        return FakeMessage(self.channel)
+
+
+class FakeInteraction:
+    def __init__(self, user, guild):
+        self.user = user
+        self.guild = guild
+        self.guild_id = guild.id
+        self.channel = guild.channel
+        self.channel_id = guild.channel.id
+        self.response = FakeResponse()
+        self.followup = FakeFollowup(guild.channel)
+        self.created_at = datetime.now(timezone.utc)
+        self.command = None
+
+    async def original_response(self):
+        return FakeMessage(self.channel)
+
+    async def edit_original_response(self, **kwargs):
+        pass
+
+
+class FakeReactionPayload:
+    def __init__(self, message_id, user, emoji):
+        self.message_id = message_id
+        self.user_id = user.id
+        self.member = user
+        self.emoji = emoji
+        self.guild_id = user.guild.id if user.guild else None
+
+
+def make_bot(guilds):
+    from main import JengBot
+    from utils.outbound import Outbound
+
+    class BenchBot(JengBot):
+        """JengBot with every network call answered locally."""
+
+        def __init__(self):
+            super().__init__()
+            self.fake_user = FakeUser(1, "JengBot", bot=True)
+            self.fake_channels = {guild.channel.id: guild.channel for guild in guilds}
+            self.fake_users = {member.id: member for guild in guilds for member in guild.members}
+            # Measure the bot, not Discord's rate limits
+            self.outbound = Outbound(route_limits={}, global_limit=None)
+
+        @property
+        def user(self):
+            return self.fake_user
+
+        async def wait_until_ready(self):
+            pass
+
+        async def fetch_user(self, user_id):
+            await asyncio.sleep(0)  # Still yield like a real request would
+            return self.fake_users.get(user_id) or FakeUser(user_id)
+
+        def get_partial_messageable(self, channel_id, **kwargs):
+            return self.fake_channels.get(channel_id) or FakeChannel(None, channel_id)
+
+    return BenchBot()
+
+
+# --- Measurement ---
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return None
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def summarize(latencies, wall):
+    values = sorted(latencies)
+    return {
+        "count": len(values),
+        "throughput_per_s": round(len(values) / wall, 1) if wall else None,
+        "p50_ms": round(percentile(values, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+        "max_ms": round(values[-1] * 1000, 3)
+    }
+
+
+def peak_rss_kib():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # macOS reports bytes
+
+
+class Run:
+    """Collects per-op latencies; repeated rounds of the same op are pooled."""
+
+    def __init__(self):
+        self.latencies = {}
+        self.walls = {}
+
+    def record(self, name, latencies, wall):
+        self.latencies.setdefault(name, []).extend(latencies)
+        self.walls[name] = self.walls.get(name, 0.0) + wall
+
+    async def sequential(self, name, factories):
+        latencies = []
+        start = time.perf_counter()
+        for factory in factories:
+            op_start = time.perf_counter()
+            await factory()
+            latencies.append(time.perf_counter() - op_start)
+        self.record(name, latencies, time.perf_counter() - start)
+
+    async def concurrent(self, name, factories):
+        latencies = []
+
+        async def timed(factory):
+            op_start = time.perf_counter()
+            await factory()
+            latencies.append(time.perf_counter() - op_start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(timed(factory) for factory in factories))
+        self.record(name, latencies, time.perf_counter() - start)
+
+    def ops(self):
+        return {name: summarize(latencies, self.walls[name]) for name, latencies in self.latencies.items()}
+
+
+# --- Scenarios ---
+async def xp_flood(run, scale):
+    guilds = [FakeGuild(200) for _ in range(5)]
+    bot = make_bot(guilds)
+    await bot.load_extension("cogs.xp")
+    cog = bot.get_cog("XPSystem")
+
+    messages = [
+        FakeMessage(guild.channel, author=random.choice(guild.members), content="hello there")
+        for guild in (random.choice(guilds) for _ in range(int(5000 * scale)))
+    ]
+    await run.sequential("on_message", [lambda message=message: cog.on_message(message) for message in messages])
+
+
+async def leaderboard(run, scale):
+    guild = FakeGuild(int(5000 * scale))
+    bot = make_bot([guild])
+    await bot.load_extension("cogs.xp")
+    cog = bot.get_cog("XPSystem")
+    cog.xp_data[str(guild.id)] = {
+        str(member.id): {"xp": random.randrange(100), "level": random.randrange(50)} for member in guild.members
+    }
+    # A month of activity so the windowed leaderboards have something to rank
+    from utils.xp_history import GuildHistory, current_day
+    history = cog.history[str(guild.id)] = GuildHistory({"day": current_day() - 30})
+    for day in range(current_day() - 30, current_day() + 1):
+        for member in random.sample(guild.members, len(guild.members) // 4):
+            history.add(str(member.id), random.randrange(10, 200), day)
+
+    for _ in range(5):
+        await run.concurrent("leaderboard", [
+            lambda: cog.leaderboard.callback(cog, FakeInteraction(random.choice(guild.members), guild))
+            for _ in range(50)
+        ])
+        await run.concurrent("leaderboard_week", [
+            lambda: cog.leaderboard.callback(cog, FakeInteraction(random.choice(guild.members), guild), "week")
+            for _ in range(50)
+        ])
+    await run.concurrent("level", [
+        lambda: cog.level.callback(cog, FakeInteraction(random.choice(guild.members), guild))
+        for _ in range(50)
+    ])
+
+
+async def quote_crud(run, scale):
+    guild = FakeGuild(50)
+    bot = make_bot([guild])
+    await bot.load_extension("cogs.quotes")
+    cog = bot.get_cog("Quotes")
+    words = "the quick brown fox jumps over lazy dog pizza cheese goblin server music night".split()
+    count = int(2000 * scale)
+
+    def interaction():
+        return FakeInteraction(random.choice(guild.members), guild)
+
+    def quote_text():
+        return " ".join(random.choices(words, k=8)) + f" - Person {random.randrange(40)}"
+
+    await run.sequential("add", [lambda: cog.quote_add.callback(cog, interaction(), quote_text()) for _ in range(count)])
+    await run.sequential("get_shuffle", [lambda: cog.quote_get.callback(cog, interaction(), "shuffle") for _ in range(count)])
+    await run.sequential("get_recent", [lambda: cog.quote_get.callback(cog, interaction(), "recent") for _ in range(count)])
+    await run.sequential("search", [
+        lambda: cog.quote_search.callback(cog, interaction(), random.choice(words), None) for _ in range(count // 4)
+    ])
+    await run.sequential("list", [lambda: cog.quote_list.callback(cog, interaction()) for _ in range(50)])
+    ids = random.sample(range(1, count + 1), count // 2)
+    await run.sequential("edit", [
+        lambda quote_id=quote_id: cog.quote_edit.callback(cog, interaction(), quote_id, quote_text()) for quote_id in ids[:count // 4]
+    ])
+    await run.sequential("delete", [
+        lambda quote_id=quote_id: cog.quote_delete.callback(cog, interaction(), quote_id) for quote_id in ids[count // 4:]
+    ])
+    await bot.unload_extension("cogs.quotes")
+
+
+async def poll_close(run, scale):
+    guild = FakeGuild(int(5000 * scale))
+    bot = make_bot([guild])
+    await bot.load_extension("cogs.polls")
+    cog = bot.get_cog("Polls")
+
+    message_ids = []
+    for i in range(20):
+        options = [(f"Option {n}", emoji) for n, emoji in enumerate(POLL_EMOJIS)]
+        record = cog.new_record(FakeInteraction(guild.members[0], guild), "reaction", f"Poll {i}", 60, options, live=i % 2 == 0)
+        message = FakeMessage(guild.channel)
+        cog.start_poll(message, record)
+        message_ids.append(message.id)
+
+    payloads = [
+        FakeReactionPayload(message_id, member, random.choice(POLL_EMOJIS))
+        for message_id in message_ids for member in guild.members
+    ]
+    random.shuffle(payloads)
+    await run.sequential("reaction_add", [lambda payload=payload: cog.on_raw_reaction_add(payload) for payload in payloads])
+    await run.sequential("close", [lambda message_id=str(message_id): cog.close_poll(message_id) for message_id in message_ids])
+    await bot.unload_extension("cogs.polls")
+
+
+async def run_scenario(name, scale):
+    run = Run()
+    await globals()[name](run, scale)
+    return {"ops": run.ops(), "peak_rss_kib": peak_rss_kib()}
+
+
+# --- Driver ---
+def child(name, scale, seed):
+    random.seed(seed)
+    sys.path.insert(0, PROJECT_ROOT)
+    from utils.persistence import writer
+    os.environ["METRICS_PORT"] = "0"
+    for key in ("SHARD_COUNT", "SHARD_IDS"):
+        os.environ.pop(key, None)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Cogs read and write their JSON files relative to the working directory
+        os.chdir(tmp)
+        result = asyncio.run(run_scenario(name, scale))
+        # Saves land on the writer thread, relative to the cwd, so let them finish first
+        writer.flush()
+        os.chdir(PROJECT_ROOT)
+    print(json.dumps(result))
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run offline end-to-end benchmarks against fake Discord objects.")
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append", help="repeat to pick several (default: all)")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiplier for workload sizes")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--out", help="also write the JSON report to this file")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.scale, args.seed)
+        return
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "scale": args.scale,
+        "scenarios": {}
+    }
+    for name in args.scenario or SCENARIOS:
+        print(f"Running {name}...", file=sys.stderr)
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.harness", "--child", name, "--scale", str(args.scale), "--seed", str(args.seed)],
+            cwd=PROJECT_ROOT, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            report["scenarios"][name] = {"error": completed.stderr.strip().splitlines()[-1:] or ["failed"]}
+            print(completed.stderr, file=sys.stderr)
+            continue
+        report["scenarios"][name] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# benchmarks/quote_store.py
+#
+# Compares the append-only quote log against rewriting the whole JSON file
+# on every change, and times startup replay. Run from the repo root:
+#
+#   python -m benchmarks.quote_store --quotes 100000
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from utils.persistence import writer
+from utils.quote_store import QuoteStore
+
+GUILDS = 20
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<40} {elapsed * 1000:10.1f} ms")
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quote persistence.")
+    parser.add_argument("--quotes", type=int, default=100000)
+    parser.add_argument("--rewrites", type=int, default=20, help="whole-file rewrites to sample for comparison")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = os.path.join(tmp, "quotes.json")
+        log = os.path.join(tmp, "quotes.log")
+
+        store = QuoteStore(snapshot, log)
+        store.load()
+
+        def add_all():
+            for i in range(args.quotes):
+                store.add(str(i % GUILDS), f"Quote number {i} about nothing in particular - Person {i % 97}")
+
+        _, elapsed = timed(f"append {args.quotes} quotes", add_all)
+        print(f"{'  per write':<40} {elapsed / args.quotes * 1e6:10.1f} us")
+
+        timed("edit + delete 1000 quotes", lambda: [
+            (store.edit(str(i % GUILDS), i // GUILDS + 1, "edited"), store.delete(str(i % GUILDS), i // GUILDS + 2))
+            for i in range(0, 2000, 2)
+        ])
+        store.close()
+        writer.flush()  # Compactions run on the writer thread
+
+        replay = QuoteStore(snapshot, log)
+        timed("startup (snapshot + log replay)", replay.load)
+        timed("compact into snapshot", lambda: replay.compact().result())
+        replay.close()
+
+        fresh = QuoteStore(snapshot, log)
+        timed("startup (snapshot only)", fresh.load)
+        fresh.close()
+
+        # What every change used to cost: dumping the whole file again
+        legacy = {guild_id: list(quotes.values()) for guild_id, quotes in fresh.guilds.items()}
+        legacy_path = os.path.join(tmp, "legacy.json")
+
+        def rewrite():
+            for _ in range(args.rewrites):
+                with open(legacy_path, "w") as f:
+                    json.dump(legacy, f, indent=4)
+
+        _, elapsed = timed(f"{args.rewrites} whole-file rewrites", rewrite)
+        print(f"{'  per write':<40} {elapsed / args.rewrites * 1e6:10.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# benchmarks/welcome_cards.py
+#
+# Measures welcome card throughput through the same process pool the
+# Welcome cog uses. Run from the repo root:
+#
+#   python -m benchmarks.welcome_cards --cards 200 --workers 4
+
+import argparse
+import asyncio
+import io
+import time
+
+from utils.welcome_card import CardRenderer, CARDS_AVAILABLE
+
+
+def fake_avatar():
+    from PIL import Image
+
+    out = io.BytesIO()
+    Image.new("RGB", (256, 256), (88, 101, 242)).save(out, format="PNG")
+    return out.getvalue()
+
+
+async def run(cards, workers):
+    renderer = CardRenderer(workers)
+    avatar = fake_avatar()
+
+    # Warm the pool so process start-up isn't counted
+    await asyncio.gather(*(renderer.render_bytes(avatar, "warmup", 0) for _ in range(workers)))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(renderer.render_bytes(avatar, f"member{i}", i) for i in range(cards)))
+    elapsed = time.perf_counter() - start
+
+    renderer.close()
+    print(f"{cards} cards with {workers} worker(s) in {elapsed:.2f}s -> {cards / elapsed:.1f} cards/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark welcome card rendering.")
+    parser.add_argument("--cards", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    if not CARDS_AVAILABLE:
+        raise SystemExit("Pillow is not installed; welcome cards are disabled.")
+    asyncio.run(run(args.cards, args.workers))
+
+
+if __name__ == "__main__":
+    main()
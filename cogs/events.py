@@ -1,105 +1,349 @@
 import discord
 from discord.ext import commands
 from discord import app_commands, Interaction, Embed, ui
-from datetime import datetime
+from datetime import datetime, timedelta
 import pytz
+import asyncio
+import re
+from itertools import islice
+from utils.coalesce import Coalescer
+from utils.debug import debug_command, get_logger
+from utils.outbound import PRIORITY_BULK
+from utils.storage import load_shared, save_shared, by_guild_field
 
-# --- Color Codes ---
-RESET = "\033[0m"
-BLACK = "\033[30m"
-RED = "\033[31m"
-GREEN = "\033[32m"
-YELLOW = "\033[33m"
-BLUE = "\033[34m"
-MAGENTA = "\033[35m"
-CYAN = "\033[36m"
-WHITE = "\033[37m"
-
-def debug_command(name, user, **kwargs):
-    print(f"{RED}[COMMAND] /{name}{RESET} triggered by {YELLOW}{user.display_name}{RESET}")
-    if kwargs:
-        print(f"{CYAN}Input:{RESET}")
-        for key, value in kwargs.items():
-            print(f"  {key}: {value}")
+log = get_logger("events")
 
-class RSVPView(ui.View):
-    def __init__(self, creator, title, time, location, details, description="Click a button to RSVP!"):
-        super().__init__(timeout=None)
-        self.creator = creator
-        self.title = title
-        self.time = time
-        self.location = location
-        self.details = details
-        self.description = description
-        self.going = set()
-        self.not_going = set()
-        self.message = None
-        self.created_at = datetime.now(pytz.timezone("US/Eastern"))  # store creation time
+EVENT_FILE = "events.json"
+EASTERN = pytz.timezone("US/Eastern")
+EVENT_RETENTION_DAYS = 30  # RSVP buttons stop working on events older than this
+RSVP_EDIT_INTERVAL = 3  # seconds between embed edits per event
+RSVP_SAVE_INTERVAL = 10  # seconds between writes of events.json
+RSVP_RENDER_LIMIT = 30  # mentions shown per list before "+N more"
+REMINDER_MENTIONS_PER_MESSAGE = 80  # keeps each ping under the 2000 character limit
+
+# Accepted /event time formats, tried in order
+TIME_FORMATS = [
+    "%Y-%m-%d %H:%M", "%Y-%m-%d %I:%M %p", "%Y-%m-%d %I %p",
+    "%m/%d/%Y %H:%M", "%m/%d/%Y %I:%M %p", "%m/%d/%Y %I %p",
+    "%m/%d %H:%M", "%m/%d %I:%M %p", "%m/%d %I %p",
+    "%B %d %I:%M %p", "%B %d %I %p", "%b %d %I:%M %p", "%b %d %I %p",
+    "%I:%M %p", "%I %p", "%H:%M"
+]
+
+# --- JSON Load/Save Helpers ---
+def load_event_data():
+    return load_shared(EVENT_FILE, by_guild_field)
+
+def save_event_data(data):
+    save_shared(EVENT_FILE, data, by_guild_field)
+
+def mention_list(user_ids):
+    # Only the first few are rendered so the embed stays a bounded size
+    shown = "\n".join(f"<@{uid}>" for uid in islice(user_ids, RSVP_RENDER_LIMIT))
+    if len(user_ids) > RSVP_RENDER_LIMIT:
+        shown += f"\n+{len(user_ids) - RSVP_RENDER_LIMIT} more"
+    return shown or "No one yet"
+
+def parse_event_time(text, tz):
+    """Parse a /event time into an aware datetime, or None if it isn't one we understand.
+
+    Missing dates mean the next occurrence of that time, missing years the
+    next occurrence of that date.
+    """
+    cleaned = re.sub(r"\s+", " ", text.strip())
+    cleaned = re.sub(r"(?i)(\d)\s*([ap])\.?m\.?$", r"\1 \2M", cleaned)
+    cleaned = cleaned.replace(",", "")
+    now = datetime.now(tz)
+
+    for fmt in TIME_FORMATS:
+        try:
+            parsed = datetime.strptime(cleaned, fmt)
+        except ValueError:
+            continue
+
+        if "%Y" not in fmt and "%m" not in fmt and "%b" not in fmt and "%B" not in fmt:
+            parsed = parsed.replace(year=now.year, month=now.month, day=now.day)
+            result = tz.localize(parsed)
+            return result if result > now else tz.localize(parsed + timedelta(days=1))
+        if "%Y" not in fmt:
+            result = tz.localize(parsed.replace(year=now.year))
+            return result if result > now else tz.localize(parsed.replace(year=now.year + 1))
+        return tz.localize(parsed)
+    return None
+
+def parse_offsets(text):
+    offsets = set()
+    for part in text.split(","):
+        part = part.strip()
+        if part.isdigit() and int(part) > 0:
+            offsets.add(int(part))
+    return sorted(offsets, reverse=True)
+
+class RSVPEvent:
+    """Live state for one event. Attendance is kept as user IDs only.
+
+    Dicts are used as insertion-ordered sets so the embed lists people in
+    the order they responded.
+    """
+
+    def __init__(self, record):
+        self.record = record
+        self.going = dict.fromkeys(record.get("going", []))
+        self.not_going = dict.fromkeys(record.get("not_going", []))
+
+    def rsvp(self, user_id, going):
+        add, remove = (self.going, self.not_going) if going else (self.not_going, self.going)
+        remove.pop(user_id, None)
+        if user_id in add:
+            return False
+        add[user_id] = None
+        return True
+
+    def to_record(self):
+        self.record["going"] = list(self.going)
+        self.record["not_going"] = list(self.not_going)
+        return self.record
 
     def format_embed(self):
-        embed = Embed(title=f"📅 {self.title}", description=self.description, color=discord.Color.gold())
-        embed.add_field(name="🕒 Time", value=self.time, inline=False)
-        embed.add_field(name="📍 Location", value=self.location, inline=False)
-        embed.add_field(name="📝 Details", value=self.details or "None", inline=False)
-        embed.add_field(name="✅ Going", value="\n".join(u.mention for u in self.going) or "No one yet", inline=True)
-        embed.add_field(name="❌ Not Going", value="\n".join(u.mention for u in self.not_going) or "No one yet", inline=True)
-        
-        created_str = self.created_at.strftime("%B %d, %I:%M %p ET")
-        embed.set_footer(text=f"🕰️ Created at {created_str} by {self.creator.display_name}")
+        record = self.record
+        embed = Embed(title=f"📅 {record['title']}", description=record["description"], color=discord.Color.gold())
+        if record.get("start"):
+            # Discord renders these in each viewer's own timezone
+            embed.add_field(name="🕒 Time", value=f"<t:{int(record['start'])}:F> (<t:{int(record['start'])}:R>)", inline=False)
+        else:
+            embed.add_field(name="🕒 Time", value=record["time"], inline=False)
+        embed.add_field(name="📍 Location", value=record["location"], inline=False)
+        embed.add_field(name="📝 Details", value=record["details"] or "None", inline=False)
+        embed.add_field(name=f"✅ Going ({len(self.going)})", value=mention_list(self.going), inline=True)
+        embed.add_field(name=f"❌ Not Going ({len(self.not_going)})", value=mention_list(self.not_going), inline=True)
+
+        created_str = datetime.fromtimestamp(record["created_at"], EASTERN).strftime("%B %d, %I:%M %p ET")
+        embed.set_footer(text=f"🕰️ Created at {created_str} by {record['creator']}")
 
         return embed
 
-    @ui.button(label="✅ Going", style=discord.ButtonStyle.success)
+class RSVPView(ui.View):
+    """One persistent view for every event; the message ID selects the event."""
+
+    def __init__(self, cog):
+        super().__init__(timeout=None)
+        self.cog = cog
+
+    @ui.button(label="✅ Going", style=discord.ButtonStyle.success, custom_id="rsvp:going")
     async def yes(self, interaction: Interaction, button: ui.Button):
-        self.not_going.discard(interaction.user)
-        self.going.add(interaction.user)
-        await self.update(interaction)
+        await self.update(interaction, going=True)
 
-    @ui.button(label="❌ Not Going", style=discord.ButtonStyle.danger)
+    @ui.button(label="❌ Not Going", style=discord.ButtonStyle.danger, custom_id="rsvp:not_going")
     async def no(self, interaction: Interaction, button: ui.Button):
-        self.going.discard(interaction.user)
-        self.not_going.add(interaction.user)
-        await self.update(interaction)
+        await self.update(interaction, going=False)
+
+    async def update(self, interaction: Interaction, going: bool):
+        message_id = str(interaction.message.id)
+        event = self.cog.get_event(message_id)
+        if not event:
+            await interaction.response.send_message(
+                embed=Embed(title="❌ Event Closed", description="This event is no longer accepting RSVPs.", color=discord.Color.red()),
+                ephemeral=True
+            )
+            return
 
-    async def update(self, interaction: Interaction):
-        await interaction.response.edit_message(embed=self.format_embed(), view=self)
+        # Acknowledge straight away; the embed catches up on the next coalesced edit
+        await interaction.response.defer()
+        if event.rsvp(interaction.user.id, going):
+            self.cog.mark_changed(message_id, interaction.message)
 
 class Events(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # message_id (str) -> stored event record; RSVPEvents are built on first click
+        self.records = {}
+        self.active = {}
+        self.dirty = set()
+        self.edits = Coalescer(RSVP_EDIT_INTERVAL)
+        self.saves = Coalescer(RSVP_SAVE_INTERVAL)
+
+    async def cog_load(self):
+        # File reads happen off the event loop
+        cutoff = (datetime.now(EASTERN) - timedelta(days=EVENT_RETENTION_DAYS)).timestamp()
+        for message_id, record in (await asyncio.to_thread(load_event_data)).items():
+            if max(record["created_at"], record.get("start") or 0) >= cutoff:
+                self.records[message_id] = record
+
+        # Registered once at startup so buttons on old messages keep working
+        self.view = RSVPView(self)
+        self.bot.add_view(self.view)
+
+        for message_id, record in self.records.items():
+            self.schedule_reminders(message_id, record)
+
+    async def cog_unload(self):
+        for message_id, record in self.records.items():
+            for offset in record.get("reminders", []):
+                self.bot.scheduler.cancel(("event", message_id, offset))
+        self.flush_events()
+
+    def schedule_reminders(self, message_id, record):
+        start = record.get("start")
+        if not start or start <= datetime.now(EASTERN).timestamp():
+            return
+        sent = set(record.get("sent_reminders", []))
+        for offset in record.get("reminders", []):
+            if offset not in sent:
+                # Reminders that came due while offline fire right away
+                self.bot.scheduler.schedule(
+                    start - offset * 60,
+                    ("event", message_id, offset),
+                    lambda offset=offset: self.send_reminder(message_id, offset)
+                )
+
+    async def send_reminder(self, message_id, offset):
+        await self.bot.wait_until_ready()
+        event = self.get_event(message_id)
+        if not event:
+            return
+
+        record = event.record
+        record.setdefault("sent_reminders", []).append(offset)
+        self.dirty.add(message_id)
+        self.saves.request("events", self.write_events)
+
+        going = list(event.going)
+        if not going:
+            return
+
+        link = f"https://discord.com/channels/{record['guild_id']}/{record['channel_id']}/{message_id}"
+        text = f"⏰ **{record['title']}** starts <t:{int(record['start'])}:R>! {link}"
+        log.info(f"Reminding {len(going)} user(s) about {record['title']}", extra={"event_id": message_id, "offset_min": offset})
+
+        if record.get("remind_dm"):
+            # All queued at once as bulk jobs; bot.outbound paces them under the global
+            # rate limit, and one whose route is backed up is dropped rather than sent late
+            results = await asyncio.gather(*(self.remind_dm(user_id, text) for user_id in going), return_exceptions=True)
+            failed = sum(isinstance(result, Exception) for result in results)
+            if failed:
+                log.info(f"{failed} reminder DM(s) not delivered", extra={"event_id": message_id})  # DMs closed or user gone
+            return
+
+        # One channel message per batch of mentions, paced by the channel's rate limit
+        channel = self.bot.get_partial_messageable(int(record["channel_id"]))
+        for i in range(0, len(going), REMINDER_MENTIONS_PER_MESSAGE):
+            mentions = " ".join(f"<@{uid}>" for uid in going[i:i + REMINDER_MENTIONS_PER_MESSAGE])
+            try:
+                await self.bot.outbound.send(channel, content=f"{text}\n{mentions}", allowed_mentions=discord.AllowedMentions(users=True))
+            except (discord.Forbidden, discord.NotFound):
+                return
+
+    async def remind_dm(self, user_id, text):
+        user = self.bot.get_user(user_id) or await self.bot.fetch_user(user_id)
+        channel = user.dm_channel
+        if channel is None:
+            channel = await self.bot.outbound.submit(("dm", user.id), user.create_dm, PRIORITY_BULK)
+            if channel is None:
+                return  # Dropped under load
+        await self.bot.outbound.send(channel, PRIORITY_BULK, content=text)
+
+    def get_event(self, message_id):
+        event = self.active.get(message_id)
+        if event is None and message_id in self.records:
+            event = self.active[message_id] = RSVPEvent(self.records[message_id])
+        return event
+
+    def mark_changed(self, message_id, message):
+        self.dirty.add(message_id)
+        self.edits.request(message_id, lambda: self.render(message_id, message))
+        self.saves.request("events", self.write_events)
+
+    async def render(self, message_id, message):
+        event = self.active.get(message_id)
+        if event:
+            await self.bot.outbound.edit(message, embed=event.format_embed())
+
+    def flush_events(self):
+        # Copy the RSVP sets of events changed since the last flush back into their
+        # records, then save every record; the whole of events.json is rewritten.
+        # Runs at most every RSVP_SAVE_INTERVAL through self.saves, and on unload.
+        for message_id in self.dirty:
+            if message_id in self.active:
+                self.active[message_id].to_record()
+        self.dirty.clear()
+        save_event_data(self.records)
+
+    async def write_events(self):
+        self.flush_events()
 
     @app_commands.command(name="event", description="Create an interactive RSVP event.")
     @app_commands.describe(
         title="Event title",
-        time="When is the event?",
+        time="When is the event? (e.g. 2025-07-04 19:30, 7/4 7:30 PM, 8pm)",
         location="Where is it?",
         details="More information about the event",
-        description="Top message in the embed (e.g., RSVP instructions)"
+        description="Top message in the embed (e.g., RSVP instructions)",
+        timezone="Timezone the time is in (e.g. US/Eastern, Europe/London)",
+        reminders="Minutes before the start to remind people who are going, comma separated",
+        remind_dm="Send reminders by DM instead of pinging in the channel"
     )
-    async def event(self, interaction: Interaction, title: str, time: str, location: str, details: str = "", description: str = "Click a button to RSVP!"):
-        await interaction.response.defer()
-
+    async def event(
+        self,
+        interaction: Interaction,
+        title: str,
+        time: str,
+        location: str,
+        details: str = "",
+        description: str = "Click a button to RSVP!",
+        timezone: str = "US/Eastern",
+        reminders: str = "60",
+        remind_dm: bool = False
+    ):
         debug_command(
-            "event", interaction.user,
+            "event", interaction,
             title=title,
             time=time,
             location=location,
             details=details,
-            description=description
+            description=description,
+            timezone=timezone,
+            reminders=reminders
         )
 
-        view = RSVPView(
-            creator=interaction.user,
-            title=title,
-            time=time,
-            location=location,
-            details=details,
-            description=description
-        )
+        try:
+            tz = pytz.timezone(timezone)
+        except pytz.UnknownTimeZoneError:
+            await interaction.response.send_message(
+                embed=Embed(title="❌ Unknown Timezone", description=f"`{timezone}` is not a valid timezone.", color=discord.Color.red()),
+                ephemeral=True
+            )
+            return
+
+        await interaction.response.defer()
+
+        # Unparseable times are still shown as typed, just without reminders
+        start = parse_event_time(time, tz)
+
+        event = RSVPEvent({
+            "guild_id": str(interaction.guild.id) if interaction.guild else None,
+            "title": title,
+            "time": time,
+            "location": location,
+            "details": details,
+            "description": description,
+            "creator": interaction.user.display_name,
+            "created_at": datetime.now(EASTERN).timestamp(),
+            "start": start.timestamp() if start else None,
+            "reminders": parse_offsets(reminders) if start else [],
+            "remind_dm": remind_dm,
+            "sent_reminders": [],
+            "going": [],
+            "not_going": []
+        })
+
+        msg = await interaction.followup.send(embed=event.format_embed(), view=self.view, wait=True)
 
-        embed = view.format_embed()
-        msg = await interaction.followup.send(embed=embed, view=view, wait=True)
-        view.message = msg
+        message_id = str(msg.id)
+        event.record["channel_id"] = str(msg.channel.id)
+        self.records[message_id] = event.record
+        self.active[message_id] = event
+        save_event_data(self.records)
+        self.schedule_reminders(message_id, event.record)
 
 # --- Cog Setup ---
 async def setup(bot):
@@ -2,19 +2,14 @@ import discord
 from discord.ext import commands
 from discord import app_commands, Interaction, Embed
 import aiohttp
-import requests
+import asyncio
+import importlib
+import logging
 import time
 from json.decoder import JSONDecodeError
+from utils.debug import debug_command, get_logger
 
-RESET = "\033[0m"
-BLACK = "\033[30m"
-RED = "\033[31m"
-GREEN = "\033[32m"
-YELLOW = "\033[33m"
-BLUE = "\033[34m"
-MAGENTA = "\033[35m"
-CYAN = "\033[36m"
-WHITE = "\033[37m"
+log = get_logger("gpt")
 
 OLLAMA_URL = "https://burlington-money-emotions-variance.trycloudflare.com"
 DEFAULT_MODEL = "mistral"
@@ -28,10 +23,18 @@ async def is_ollama_online() -> bool:
     except Exception:
         return False
 
+async def load_requests():
+    # Imported off the loop the first time; later calls just hit sys.modules
+    return await asyncio.to_thread(importlib.import_module, "requests")
+
 class JengGPT(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
+    @commands.Cog.listener()
+    async def on_ready(self):
+        await load_requests()
+
     @app_commands.command(name="askjeng", description="Ask your local AI anything.")
     @app_commands.describe(
         prompt="What do you want to ask JengGPT?",
@@ -41,8 +44,9 @@ class JengGPT(commands.Cog):
         try:
             await interaction.response.defer(thinking=True)
         except (discord.NotFound, discord.HTTPException):
-            print(f"❌ {GREEN}Could not defer. Interaction may have expired or already responded.{RESET}")
+            log.warning("Could not defer; interaction expired or already answered", extra={"command": "askjeng"})
             return
+        requests = await load_requests()
 
         if not await is_ollama_online():
             await interaction.followup.send(embed=Embed(
@@ -50,13 +54,12 @@ class JengGPT(commands.Cog):
                 description="The AI backend (Ollama) is currently offline. Try again shortly.",
                 color=discord.Color.red()
             ), ephemeral=True)
-            print(f"❌ {GREEN}Ollama server not available — skipping interaction.{RESET}")
+            log.warning("Ollama server not available, skipping interaction")
             return
 
+        debug_command("askjeng", interaction, prompt=prompt, model=model)
         try:
-            print(f"📝 {CYAN}Prompt: {prompt}{RESET}")
-            print(f"🤖 {CYAN}Model selected: {model}{RESET}")
-            print(f"🔁 {CYAN}Sending prompt to:{RESET}", OLLAMA_URL)
+            start_time = time.monotonic()
 
             response = requests.post(f"{OLLAMA_URL}/api/generate", json={
                 "model": model,
@@ -64,13 +67,18 @@ class JengGPT(commands.Cog):
                 "stream": False
             }, timeout=15)
 
-            print(f"📡 {MAGENTA}Status Code:{RESET}", response.status_code)
-            print(f"🧾 {MAGENTA}Raw Response:{RESET}", response.text[:300])
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("Ollama response", extra={
+                    "model": model,
+                    "status": response.status_code,
+                    "latency_ms": round((time.monotonic() - start_time) * 1000, 1),
+                    "body": response.text[:300]
+                })
 
             try:
                 data = response.json()
             except JSONDecodeError:
-                print(f"❌ {GREEN}Received non-JSON response from Ollama.{RESET}")
+                log.warning("Received non-JSON response from Ollama", extra={"status": response.status_code})
                 await interaction.followup.send(embed=Embed(
                     title="😴 JengGPT is Not Available",
                     description="Sorry, JengGPT is not here right now! Please try again later.",
@@ -91,7 +99,7 @@ class JengGPT(commands.Cog):
             await interaction.followup.send(embed=embed)
 
         except requests.exceptions.ConnectionError:
-            print(f"❌ {GREEN}Could not connect to Ollama server.{RESET}")
+            log.warning("Could not connect to Ollama server")
             await interaction.followup.send(embed=Embed(
                 title="😴 JengGPT is Offline",
                 description="Sorry, JengGPT is not here right now! I recommend trying /warmup before you ask a question for better response times.",
@@ -99,7 +107,7 @@ class JengGPT(commands.Cog):
             ))
 
         except requests.exceptions.Timeout:
-            print(f"⏳ {GREEN}Request to Ollama timed out.{RESET}")
+            log.warning("Request to Ollama timed out", extra={"model": model})
             await interaction.followup.send(embed=Embed(
                 title="⏳ Timeout",
                 description="JengGPT took too long to respond. I recommend trying /warmup before you ask a question for better response times.",
@@ -107,7 +115,7 @@ class JengGPT(commands.Cog):
             ))
 
         except Exception as e:
-            print(f"❌ {GREEN}Exception occurred:{RESET}", e)
+            log.exception("askjeng failed")
             await interaction.followup.send(embed=Embed(
                 title="❌ Error",
                 description=f"```\n{str(e)}\n```",
@@ -122,9 +130,11 @@ class JengGPT(commands.Cog):
         try:
             await interaction.response.defer(thinking=True)
         except (discord.NotFound, discord.HTTPException):
-            print(f"❌ {GREEN}Could not defer. Interaction may have expired or already responded.{RESET}")
+            log.warning("Could not defer; interaction expired or already answered", extra={"command": "warmup"})
             return
+        requests = await load_requests()
 
+        debug_command("warmup", interaction, model=model)
         try:
             start_time = time.monotonic()
 
@@ -133,7 +143,7 @@ class JengGPT(commands.Cog):
                 async with aiohttp.ClientSession() as session:
                     async with session.get(f"{OLLAMA_URL}/api/tags", timeout=3) as ping:
                         if ping.status != 200:
-                            print(f"❌ {GREEN}Ollama ping failed with status {RESET}{ping.status}")
+                            log.warning("Ollama ping failed", extra={"status": ping.status})
                             await interaction.followup.send(embed=Embed(
                                 title="❌ Ollama is not responding",
                                 description="Ping to the AI backend failed.",
@@ -145,7 +155,7 @@ class JengGPT(commands.Cog):
                         available_models = [m["name"] if isinstance(m, dict) else m for m in model_list]
 
                         if model in available_models:
-                            print(f"🟢 Model '{model}' is already loaded.")
+                            log.info(f"Model {model} is already loaded")
                             await interaction.followup.send(embed=Embed(
                                 title="🟢 Model Already Active",
                                 description=f"The model **`{model}`** is already running and ready to use.",
@@ -153,7 +163,7 @@ class JengGPT(commands.Cog):
                             ))
                             return
             except Exception:
-                print(f"❌ {GREEN}Ollama server is offline or unreachable.{RESET}")
+                log.warning("Ollama server is offline or unreachable")
                 await interaction.followup.send(embed=Embed(
                     title="😴 JengGPT is Offline",
                     description="Sorry, JengGPT is not here right now! I recommend trying /warmup before you ask a question for better response times.",
@@ -169,7 +179,7 @@ class JengGPT(commands.Cog):
                     "stream": False
                 }, timeout=15)
             except Exception:
-                print(f"❌ {GREEN}Warmup request failed due to timeout or unreachable host.{RESET}")
+                log.warning("Warmup request failed due to timeout or unreachable host", extra={"model": model})
                 await interaction.followup.send(embed=Embed(
                     title="😴 JengGPT is Offline",
                     description="Warmup failed. JengGPT is not responding or offline.",
@@ -180,7 +190,7 @@ class JengGPT(commands.Cog):
             elapsed = time.monotonic() - start_time
 
             if response.status_code != 200:
-                print(f"⚠️ {GREEN}Ollama warmup failed (status {response.status_code}) in {elapsed:.2f}s{RESET}")
+                log.warning("Ollama warmup failed", extra={"model": model, "status": response.status_code, "latency_ms": round(elapsed * 1000, 1)})
                 await interaction.followup.send(embed=Embed(
                     title="⚠️ Warmup Failed",
                     description=f"Ollama responded with status code `{response.status_code}`.",
@@ -195,10 +205,10 @@ class JengGPT(commands.Cog):
                 color=discord.Color.green()
             ))
 
-            print(f"🔥 {MAGENTA}Model '{model}' warmed up in {elapsed:.2f} seconds.{RESET}")
+            log.info(f"Model {model} warmed up", extra={"model": model, "latency_ms": round(elapsed * 1000, 1)})
 
-        except Exception as e:
-            print(f"❌ {GREEN}Warmup error:{RESET}", e)
+        except Exception:
+            log.exception("Warmup error")
             await interaction.followup.send(embed=Embed(
                 title="❌ Warmup Failed",
                 description="Warmup failed. JengGPT is not responding or offline.",
@@ -1,51 +1,78 @@
 import discord
 from discord.ext import commands
-from discord import app_commands, ui, Interaction, Embed
+from discord import app_commands, Interaction, Embed
 import random
 from datetime import datetime
 import pytz
 from utils.debug import debug_command
-import asyncio
-
-RESET = "\033[0m"
-BLACK = "\033[30m"
-RED = "\033[31m"
-GREEN = "\033[32m"
-YELLOW = "\033[33m"
-BLUE = "\033[34m"
-MAGENTA = "\033[35m"
-CYAN = "\033[36m"
-WHITE = "\033[37m"
-
-
-class HelpPaginator(ui.View):
-    def __init__(self, pages):
-        super().__init__(timeout=60)
-        self.pages = pages
-        self.index = 0
-
-    def get_embed(self):
-        return self.pages[self.index]
-
-    @ui.button(label="⬅️ Prev", style=discord.ButtonStyle.blurple)
-    async def prev_page(self, interaction: Interaction, button: ui.Button):
-        if self.index > 0:
-            self.index -= 1
-            await interaction.response.edit_message(embed=self.get_embed(), view=self)
-        else:
-            await interaction.response.defer()
-
-    @ui.button(label="➡️ Next", style=discord.ButtonStyle.blurple)
-    async def next_page(self, interaction: Interaction, button: ui.Button):
-        if self.index < len(self.pages) - 1:
-            self.index += 1
-            await interaction.response.edit_message(embed=self.get_embed(), view=self)
-        else:
-            await interaction.response.defer()
+from utils.outbound import PRIORITY_BULK
+from utils.paginator import Paginator, EmbedPageSource
+
+
+def build_help_pages():
+    pages = []
+
+    # 🎵 Music Commands
+    music_embed = Embed(title="🎵 Music Commands", color=discord.Color.blue())
+    music_embed.add_field(name="/play <url>", value="Plays a song from the given URL.", inline=False)
+    music_embed.add_field(name="/queue", value="Shows the current music queue.", inline=False)
+    music_embed.add_field(name="/skip", value="Skips the current song.", inline=False)
+    music_embed.add_field(name="/stop", value="Pauses the music.", inline=False)
+    music_embed.add_field(name="/start", value="Resumes paused music.", inline=False)
+    music_embed.add_field(name="/leave", value="Clears the queue and makes the bot leave the voice channel.", inline=False)
+    music_embed.set_footer(text="Page 1/5")
+    pages.append(music_embed)
+
+    # 📈 XP Commands
+    xp_embed = Embed(title="📈 XP System Commands", description="XP comes from chatting and from time in voice (not AFK or deafened).", color=discord.Color.green())
+    xp_embed.add_field(name="/level", value="Shows your XP level and server rank.", inline=False)
+    xp_embed.add_field(name="/leaderboard [period]", value="Shows the leaders in XP in this server, all time or for the past week, month or year.", inline=False)
+    xp_embed.add_field(name="/xpset <amount>", value="Sets the amount of XP gained per message.", inline=False)
+    xp_embed.add_field(name="/xpblock <channel>", value="Blocks XP in the given channel.", inline=False)
+    xp_embed.add_field(name="/xpunblock <channel>", value="Unblocks XP in the given channel.", inline=False)
+    xp_embed.add_field(name="/xpconfig", value="Shows the current XP settings.", inline=False)
+    xp_embed.add_field(name="/xpexport • /xpimport • /xpgrant • /xpreset", value="Admin: export, import, grant XP to a role, or reset the server.", inline=False)
+    xp_embed.set_footer(text="Page 2/5")
+    pages.append(xp_embed)
+
+    # 😂 Fun & Misc
+    misc_embed = Embed(title="😂 Miscellaneous Commands", color=discord.Color.purple())
+    misc_embed.add_field(name="/champ", value="Selects a random champion.", inline=False)
+    misc_embed.add_field(name="/spam <user> <num>", value="Spams a user a specified number of times.", inline=False)
+    misc_embed.add_field(name="/askjeng <prompt> <model>", value="Ask an AI that runs locally on Jeng's computer! If it is your first quetsion of the day, I recommend using /warmup <model> first.", inline=False)
+    misc_embed.add_field(name="/warmup <model>", value="Warms up a specific ollama model to prevent timeout errors.", inline=False)
+    misc_embed.add_field(name="/stats", value="Admins: command latency and event loop health.", inline=False)
+    misc_embed.set_footer(text="Page 3/5")
+    pages.append(misc_embed)
+
+    # 📊 Community Tools
+    community_embed = Embed(title="📊 Community Tools", color=discord.Color.orange())
+    community_embed.add_field(name="/poll", value="Create a poll with emoji-based voting.", inline=False)
+    community_embed.add_field(name="/buttonpoll", value="Create a poll with buttons or a menu, up to 25 options.", inline=False)
+    community_embed.add_field(name="/event", value="Create an RSVP event for members.", inline=False)
+    community_embed.add_field(name="/welcommeconfig", value="Shows server's welcoming configuration.", inline=False)
+    community_embed.add_field(name="/setwelcome", value="Allows user to configure a welcoming system.", inline=False)
+    community_embed.set_footer(text="Page 4/5")
+    pages.append(community_embed)
+
+    # 💬 Quote System
+    quotes_embed = Embed(title="💬 Quote System", color=discord.Color.teal())
+    quotes_embed.add_field(name="/quote_add", value="Add a new quote.", inline=False)
+    quotes_embed.add_field(name="/quote_get", value="Get a random quote.", inline=False)
+    quotes_embed.add_field(name="/quote_list", value="View paginated list of quotes.", inline=False)
+    quotes_embed.add_field(name="/quote_search <query> <author>", value="Search quotes by text and/or author.", inline=False)
+    quotes_embed.add_field(name="/quote_edit <index> <new_text>", value="Edit a quote by number.", inline=False)
+    quotes_embed.add_field(name="/quote_delete <index>", value="Delete a quote by number.", inline=False)
+    quotes_embed.set_footer(text="Page 5/5")
+    pages.append(quotes_embed)
+
+    return pages
 
 class Misc(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # Help never changes at runtime, so build it once
+        self.help_pages = build_help_pages()
 
         # Placeholder for you to fill
         self.league_champions = [
@@ -73,7 +100,7 @@ class Misc(commands.Cog):
 
     @app_commands.command(name="champ", description="Randomly selects a League of Legends champion.")
     async def champ(self, interaction: Interaction):
-        debug_command("champ", interaction.user)
+        debug_command("champ", interaction)
 
         if not self.league_champions:
             embed = Embed(title="⚠ No Champions", description="The champion list is currently empty.", color=discord.Color.orange())
@@ -91,7 +118,7 @@ class Misc(commands.Cog):
     @app_commands.command(name="spam", description="Mentions a user multiple times.")
     @app_commands.describe(user="The user to mention", count="Number of times to mention the user (max 20)")
     async def spam(self, interaction: Interaction, user: discord.Member, count: int = 1):
-        debug_command("spam", interaction.user, target=user.display_name, count=count)
+        debug_command("spam", interaction, target=user.display_name, count=count)
 
         if count > 20:
             embed = Embed(title="⚠ Limit Exceeded", description="Please enter a number **20 or lower**.", color=discord.Color.red())
@@ -100,16 +127,16 @@ class Misc(commands.Cog):
 
         await interaction.response.send_message(f"{user.mention} wya")
 
+        # Paced by the channel's rate limit, behind anything more important
         for _ in range(count - 1):
-            await asyncio.sleep(0.75)  # ⏱️ add delay between messages
-            await interaction.channel.send(f"{user.mention} wya")
+            await self.bot.outbound.send(interaction.channel, PRIORITY_BULK, content=f"{user.mention} wya")
 
-    @app_commands.command(name="snipe", description="Retrieves the last deleted message in the current channel.")
-    async def snipe(self, interaction: Interaction):
-        debug_command("snipe", interaction.user)
+    @app_commands.command(name="snipe", description="Retrieves a recently deleted message in the current channel.")
+    @app_commands.describe(index="Which deleted message to show (1 = most recent)")
+    async def snipe(self, interaction: Interaction, index: int = 1):
+        debug_command("snipe", interaction, index=index)
 
-        sniped_messages = self.bot.sniped_messages
-        snipe_data = sniped_messages.get(interaction.channel.id)
+        snipe_data = self.bot.sniped_messages.get(interaction.channel.id, index)
 
         if not snipe_data:
             await interaction.response.send_message(embed=Embed(title="❌ Nothing to Snipe", description="No message to snipe here.", color=discord.Color.red()), ephemeral=True)
@@ -117,75 +144,23 @@ class Misc(commands.Cog):
 
         embed = Embed(
             title="Get sniped gang",
-            description=snipe_data["content"],
+            description=snipe_data.content,
             color=discord.Color.dark_red(),
-            timestamp=snipe_data["time"]
+            timestamp=snipe_data.time
         )
-        embed.set_author(name=snipe_data["author"].display_name, icon_url=snipe_data["author"].avatar.url if snipe_data["author"].avatar else None)
+        embed.set_author(name=snipe_data.author_name, icon_url=snipe_data.avatar_url)
         await interaction.response.send_message(embed=embed)
 
 
 
     @app_commands.command(name="help", description="Displays a list of available commands.")
     async def help(self, interaction: Interaction):
-        debug_command("help", interaction.user)
-
-        pages = []
-
-    # 🎵 Music Commands
-        music_embed = Embed(title="🎵 Music Commands", color=discord.Color.blue())
-        music_embed.add_field(name="/play <url>", value="Plays a song from the given URL.", inline=False)
-        music_embed.add_field(name="/queue", value="Shows the current music queue.", inline=False)
-        music_embed.add_field(name="/skip", value="Skips the current song.", inline=False)
-        music_embed.add_field(name="/stop", value="Pauses the music.", inline=False)
-        music_embed.add_field(name="/start", value="Resumes paused music.", inline=False)
-        music_embed.add_field(name="/leave", value="Clears the queue and makes the bot leave the voice channel.", inline=False)
-        music_embed.set_footer(text="Page 1/5")
-        pages.append(music_embed)
-
-    # 📈 XP Commands
-        xp_embed = Embed(title="📈 XP System Commands", color=discord.Color.green())
-        xp_embed.add_field(name="/level", value="Shows your XP level and server rank.", inline=False)
-        xp_embed.add_field(name="/leaderboard", value="Shows the leaders in XP in this server.", inline=False)
-        xp_embed.add_field(name="/xpset <amount>", value="Sets the amount of XP gained per message.", inline=False)
-        xp_embed.add_field(name="/xpblock <channel>", value="Blocks XP in the given channel.", inline=False)
-        xp_embed.add_field(name="/xpunblock <channel>", value="Unblocks XP in the given channel.", inline=False)
-        xp_embed.add_field(name="/xpconfig", value="Shows the current XP settings.", inline=False)
-        xp_embed.set_footer(text="Page 2/5")
-        pages.append(xp_embed)
-
-    # 😂 Fun & Misc
-        misc_embed = Embed(title="😂 Miscellaneous Commands", color=discord.Color.purple())
-        misc_embed.add_field(name="/champ", value="Selects a random champion.", inline=False)
-        misc_embed.add_field(name="/spam <user> <num>", value="Spams a user a specified number of times.", inline=False)
-        misc_embed.add_field(name="/askjeng <prompt> <model>", value="Ask an AI that runs locally on Jeng's computer! If it is your first quetsion of the day, I recommend using /warmup <model> first.", inline=False)
-        misc_embed.add_field(name="/warmup <model>", value="Warms up a specific ollama model to prevent timeout errors.", inline=False)
-        misc_embed.set_footer(text="Page 3/5")
-        pages.append(misc_embed)
-
-    # 📊 Community Tools
-        community_embed = Embed(title="📊 Community Tools", color=discord.Color.orange())
-        community_embed.add_field(name="/poll", value="Create a poll with emoji-based voting.", inline=False)
-        community_embed.add_field(name="/event", value="Create an RSVP event for members.", inline=False)
-        community_embed.add_field(name="/welcommeconfig", value="Shows server's welcoming configuration.", inline=False)
-        community_embed.add_field(name="/setwelcome", value="Allows user to configure a welcoming system.", inline=False)
-        community_embed.set_footer(text="Page 4/5")
-        pages.append(community_embed)
-
-    # 💬 Quote System
-        quotes_embed = Embed(title="💬 Quote System", color=discord.Color.teal())
-        quotes_embed.add_field(name="/quote_add", value="Add a new quote.", inline=False)
-        quotes_embed.add_field(name="/quote_get", value="Get a random quote.", inline=False)
-        quotes_embed.add_field(name="/quote_list", value="View paginated list of quotes.", inline=False)
-        quotes_embed.add_field(name="/quote_edit <index> <new_text>", value="Edit a quote by number.", inline=False)
-        quotes_embed.add_field(name="/quote_delete <index>", value="Delete a quote by number.", inline=False)
-        quotes_embed.set_footer(text="Page 5/5")
-        pages.append(quotes_embed)
+        debug_command("help", interaction)
 
     # Send DM
         try:
-            view = HelpPaginator(pages)
-            await interaction.user.send(embed=pages[0], view=view)
+            view = Paginator(EmbedPageSource(self.help_pages))
+            view.message = await interaction.user.send(embed=view.get_embed(), view=view)
 
             confirmation = Embed(
                 title="📬 Help Sent!",
@@ -1,82 +1,52 @@
 import discord
 from discord.ext import commands
-from discord import app_commands, Interaction, Embed, ui
+from discord import app_commands, Interaction, Embed
 import asyncio
-import yt_dlp
-import math
+import importlib
+from utils.debug import debug_command
+from utils.paginator import Paginator, ListPageSource
 
 queues = {}
+QUEUE_PER_PAGE = 5
 
-RESET = "\033[0m"
-BLACK = "\033[30m"
-RED = "\033[31m"
-GREEN = "\033[32m"
-YELLOW = "\033[33m"
-BLUE = "\033[34m"
-MAGENTA = "\033[35m"
-CYAN = "\033[36m"
-WHITE = "\033[37m"
-
-# Debug logger
-def debug_command(command_name, user, **kwargs):
-    print(f"{RED}[COMMAND] /{command_name}{RESET} triggered by {YELLOW}{user.display_name}{RESET}")
-    if kwargs:
-        print(f"{BLUE}Input:{RESET}")
-        for key, value in kwargs.items():
-            print(f"{RED}  {key.capitalize()}: {value}{RESET}")
-
-class QueueView(ui.View):
-    def __init__(self, queue, per_page=5):
-        super().__init__(timeout=60)
-        self.queue = queue
-        self.per_page = per_page
-        self.page = 0
-        self.max_pages = math.ceil(len(queue) / per_page)
-
-    def format_embed(self):
-        start = self.page * self.per_page
-        end = start + self.per_page
-        embed = Embed(
-            title=f"🎶 Current Queue (Page {self.page + 1}/{self.max_pages})",
-            color=discord.Color.blue()
-        )
-        songs_on_page = self.queue[start:end]
-        for i, song in enumerate(songs_on_page, start=start + 1):
-            embed.add_field(name=f"{i}. {song['title']}", value=" ", inline=False)
-        if songs_on_page:
-            embed.set_thumbnail(url=songs_on_page[0]['thumbnail'])
-        return embed
-
-    @ui.button(label="⬅️", style=discord.ButtonStyle.blurple)
-    async def previous(self, interaction: Interaction, button: ui.Button):
-        if self.page > 0:
-            self.page -= 1
-            await interaction.response.edit_message(embed=self.format_embed(), view=self)
-        else:
-            await interaction.response.defer()
 
-    @ui.button(label="➡️", style=discord.ButtonStyle.blurple)
-    async def next(self, interaction: Interaction, button: ui.Button):
-        if self.page < self.max_pages - 1:
-            self.page += 1
-            await interaction.response.edit_message(embed=self.format_embed(), view=self)
-        else:
-            await interaction.response.defer()
+def format_queue_page(songs, page, max_pages):
+    embed = Embed(
+        title=f"🎶 Current Queue (Page {page + 1}/{max_pages})",
+        color=discord.Color.blue()
+    )
+    start = page * QUEUE_PER_PAGE
+    for i, song in enumerate(songs, start=start + 1):
+        embed.add_field(name=f"{i}. {song['title']}", value=" ", inline=False)
+    if songs:
+        embed.set_thumbnail(url=songs[0]['thumbnail'])
+    return embed
+
+async def load_yt_dlp():
+    # yt_dlp takes a few hundred ms to import; do it on a worker thread, never on the loop
+    return await asyncio.to_thread(importlib.import_module, "yt_dlp")
 
 class Music(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # Warm the import in the background so the first /play doesn't pay for it
+        await load_yt_dlp()
+
     @app_commands.command(name="play", description="Plays a song from a YouTube URL.")
     @app_commands.describe(url="YouTube URL")
     async def play(self, interaction: Interaction, url: str):
-        debug_command("play", interaction.user, url=url)
+        debug_command("play", interaction, url=url)
         await interaction.response.defer()
         guild_id = interaction.guild.id
 
         if guild_id not in queues:
             queues[guild_id] = []
 
+        yt_dlp = await load_yt_dlp()
+
         ydl_opts = {'format': 'bestaudio', 'noplaylist': True}
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             info = ydl.extract_info(url, download=False)
@@ -133,19 +103,19 @@ class Music(commands.Cog):
 
     @app_commands.command(name="queue", description="Shows the current music queue.")
     async def queue(self, interaction: Interaction):
-        debug_command("queue", interaction.user)
+        debug_command("queue", interaction)
         song_queue = queues.get(interaction.guild.id, [])
         if not song_queue:
             embed = Embed(title="Queue Empty", description="No songs in queue.", color=discord.Color.red())
             await interaction.response.send_message(embed=embed)
             return
-        view = QueueView(song_queue)
-        embed = view.format_embed()
-        await interaction.response.send_message(embed=embed, view=view)
+        view = Paginator(ListPageSource(song_queue, format_queue_page, per_page=QUEUE_PER_PAGE))
+        await interaction.response.send_message(embed=view.get_embed(), view=view)
+        view.interaction = interaction
 
     @app_commands.command(name="skip", description="Skips the current song.")
     async def skip(self, interaction: Interaction):
-        debug_command("skip", interaction.user)
+        debug_command("skip", interaction)
         if interaction.guild.voice_client and interaction.guild.voice_client.is_playing():
             interaction.guild.voice_client.stop()
             embed = Embed(title="Skipped", description="Skipped to the next song.", color=discord.Color.orange())
@@ -156,7 +126,7 @@ class Music(commands.Cog):
 
     @app_commands.command(name="stop", description="Pauses the music.")
     async def stop(self, interaction: Interaction):
-        debug_command("stop", interaction.user)
+        debug_command("stop", interaction)
         if interaction.guild.voice_client and interaction.guild.voice_client.is_playing():
             interaction.guild.voice_client.pause()
             embed = Embed(title="Paused", description="Music paused.", color=discord.Color.orange())
@@ -167,7 +137,7 @@ class Music(commands.Cog):
 
     @app_commands.command(name="start", description="Resumes paused music.")
     async def start(self, interaction: Interaction):
-        debug_command("start", interaction.user)
+        debug_command("start", interaction)
         if interaction.guild.voice_client and interaction.guild.voice_client.is_paused():
             interaction.guild.voice_client.resume()
             embed = Embed(title="Resumed", description="Music resumed.", color=discord.Color.green())
@@ -178,7 +148,7 @@ class Music(commands.Cog):
 
     @app_commands.command(name="leave", description="Disconnects from voice and clears queue.")
     async def leave(self, interaction: Interaction):
-        debug_command("leave", interaction.user)
+        debug_command("leave", interaction)
         if interaction.guild.voice_client:
             await interaction.guild.voice_client.disconnect()
             queues[interaction.guild.id] = []
@@ -1,31 +1,195 @@
 import discord
 from discord.ext import commands
-from discord import app_commands, Interaction, Embed
+from discord import app_commands, Interaction, Embed, ui
 import asyncio
+import time
 from datetime import datetime, timedelta
 import pytz
+from utils.coalesce import Coalescer
+from utils.debug import debug_command, get_logger
+from utils.storage import load_shared, save_shared, by_guild_field
 
-# --- Color Codes ---
-RESET = "\033[0m"
-BLACK = "\033[30m"
-RED = "\033[31m"
-GREEN = "\033[32m"
-YELLOW = "\033[33m"
-BLUE = "\033[34m"
-MAGENTA = "\033[35m"
-CYAN = "\033[36m"
-WHITE = "\033[37m"
-
-def debug_command(name, user, **kwargs):
-    print(f"{GREEN}[COMMAND] /{name}{RESET} triggered by {YELLOW}{user.display_name}{RESET}")
-    if kwargs:
-        print(f"{CYAN}Input:{RESET}")
-        for key, value in kwargs.items():
-            print(f"  {key}: {value}")
+log = get_logger("polls")
+
+POLL_FILE = "polls.json"
+EASTERN = pytz.timezone("US/Eastern")
+POLL_LIVE_EDIT_INTERVAL = 5  # seconds between live result edits per poll
+POLL_SAVE_INTERVAL = 10  # seconds between vote flushes for component polls
+POLL_CLOSE_RETRY = 30  # seconds before retrying a failed close; doubles each time
+POLL_CLOSE_ATTEMPTS = 5
+RESULT_BAR_WIDTH = 10
+MAX_COMPONENT_OPTIONS = 25
+
+# --- JSON Load/Save Helpers ---
+def load_poll_data():
+    return load_shared(POLL_FILE, by_guild_field)
+
+def save_poll_data(data):
+    save_shared(POLL_FILE, data, by_guild_field)
+
+class PollTally:
+    """Live vote counts for one poll.
+
+    Every option a user picked is remembered in order; their vote is the
+    earliest one they still hold, so removing it promotes the next.
+    """
+
+    def __init__(self, options):
+        self.emoji_index = {emoji: i for i, (_, emoji) in enumerate(options) if emoji}
+        self.counts = [0] * len(options)
+        self.picks = {}  # user_id -> [option index, ...]
+
+    @classmethod
+    def from_votes(cls, options, votes):
+        tally = cls(options)
+        for user_id, index in votes.items():
+            tally.set(int(user_id), index)
+        return tally
+
+    def set(self, user_id, index):
+        # Component polls: one pick per user, replacing any earlier one
+        picks = self.picks.get(user_id)
+        if picks:
+            if picks[0] == index:
+                return False
+            self.counts[picks[0]] -= 1
+        self.picks[user_id] = [index]
+        self.counts[index] += 1
+        return True
+
+    def choice(self, user_id):
+        picks = self.picks.get(user_id)
+        return picks[0] if picks else None
+
+    def votes(self):
+        return {str(user_id): picks[0] for user_id, picks in self.picks.items()}
+
+    def add(self, user_id, index):
+        picks = self.picks.setdefault(user_id, [])
+        if index in picks:
+            return False
+        picks.append(index)
+        if len(picks) > 1:
+            return False
+        self.counts[index] += 1
+        return True
+
+    def remove(self, user_id, index):
+        picks = self.picks.get(user_id)
+        if not picks or index not in picks:
+            return False
+        was_vote = picks[0] == index
+        picks.remove(index)
+        if not picks:
+            del self.picks[user_id]
+        if not was_vote:
+            return False
+        self.counts[index] -= 1
+        if picks:
+            self.counts[picks[0]] += 1
+        return True
+
+    def voters(self):
+        by_option = [[] for _ in self.counts]
+        for user_id, picks in self.picks.items():
+            by_option[picks[0]].append(user_id)
+        return by_option
+
+def result_bar(count, total):
+    filled = round(RESULT_BAR_WIDTH * count / total) if total else 0
+    percent = round(100 * count / total) if total else 0
+    return f"`{'█' * filled}{'░' * (RESULT_BAR_WIDTH - filled)}` {count} ({percent}%)"
+
+def option_label(text, emoji):
+    return f"{emoji} {text}" if emoji else text
+
+def voter_list(user_ids, limit=1000):
+    # Mentions render as names in embeds without any member lookups
+    shown = []
+    length = 0
+    for user_id in user_ids:
+        mention = f"<@{user_id}>"
+        if length + len(mention) + 2 > limit:
+            break
+        shown.append(mention)
+        length += len(mention) + 2
+    text = ", ".join(shown)
+    if len(shown) < len(user_ids):
+        text += f" +{len(user_ids) - len(shown)} more"
+    return text or "No votes"
+
+class PollView(ui.View):
+    """Buttons or a select menu for a component poll.
+
+    Custom IDs only carry the option index; the view is bound to its
+    message through ``bot.add_view(..., message_id=...)`` on resume.
+    """
+
+    def __init__(self, cog, record):
+        super().__init__(timeout=None)
+        self.cog = cog
+
+        if record["kind"] == "menu":
+            select = ui.Select(
+                custom_id="poll:select",
+                placeholder="Cast your vote",
+                options=[discord.SelectOption(label=text[:100], value=str(i)) for i, (text, _) in enumerate(record["options"])]
+            )
+            select.callback = lambda interaction: self.vote(interaction, int(select.values[0]))
+            self.add_item(select)
+        else:
+            for i, (text, _) in enumerate(record["options"]):
+                button = ui.Button(label=text[:80], custom_id=f"poll:{i}", style=discord.ButtonStyle.secondary, row=i // 5)
+                button.callback = lambda interaction, index=i: self.vote(interaction, index)
+                self.add_item(button)
+
+    async def vote(self, interaction: Interaction, index: int):
+        result = self.cog.component_vote(str(interaction.message.id), interaction.user.id, index)
+        await interaction.response.send_message(result, ephemeral=True)
 
 class Polls(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        # message_id (str) -> poll record; only open polls are kept
+        self.polls = {}
+        # message_id (str) -> PollTally, fed by reactions or component clicks
+        self.tallies = {}
+        self.resyncs = {}
+        self.views = {}
+        self.close_attempts = {}  # message_id -> failed closes so far
+        self.closing = set()  # message_ids whose results edit is in flight; they take no more live edits
+        self.live_edits = Coalescer(POLL_LIVE_EDIT_INTERVAL)
+        self.saves = Coalescer(POLL_SAVE_INTERVAL)
+
+    async def cog_load(self):
+        self.polls = await asyncio.to_thread(load_poll_data)
+
+        # Resume every open poll; overdue ones fire as soon as the scheduler runs
+        for message_id, record in self.polls.items():
+            if record.get("kind", "reaction") == "reaction":
+                self.tallies[message_id] = PollTally(record["options"])
+                # Votes cast while we were offline are only visible on the message itself
+                self.resyncs[message_id] = asyncio.create_task(self.resync_tally(message_id))
+            else:
+                self.tallies[message_id] = PollTally.from_votes(record["options"], record.get("votes", {}))
+                self.views[message_id] = PollView(self, record)
+                self.bot.add_view(self.views[message_id], message_id=int(message_id))
+            self.schedule_close(message_id, record["end"])
+        if self.polls:
+            log.info(f"Resumed {len(self.polls)} open poll(s)")
+
+    async def cog_unload(self):
+        for message_id in self.polls:
+            self.bot.scheduler.cancel(("poll", message_id))
+            self.live_edits.cancel(message_id)
+        for task in self.resyncs.values():
+            task.cancel()
+        for view in self.views.values():
+            view.stop()
+        self.flush_votes()
+
+    def schedule_close(self, message_id, end):
+        self.bot.scheduler.schedule(end, ("poll", message_id), lambda: self.close_poll(message_id))
 
     @app_commands.command(name="poll", description="Create a custom emoji poll with 2–6 options and a closing timer.")
     @app_commands.describe(
@@ -36,7 +200,8 @@ class Polls(commands.Cog):
         option3_text="Option 3 text", option3_emoji="Option 3 emoji",
         option4_text="Option 4 text", option4_emoji="Option 4 emoji",
         option5_text="Option 5 text", option5_emoji="Option 5 emoji",
-        option6_text="Option 6 text", option6_emoji="Option 6 emoji"
+        option6_text="Option 6 text", option6_emoji="Option 6 emoji",
+        live_results="Show a live results bar on the poll while it is open"
     )
     async def poll(
         self,
@@ -48,13 +213,14 @@ class Polls(commands.Cog):
         option3_text: str = None, option3_emoji: str = None,
         option4_text: str = None, option4_emoji: str = None,
         option5_text: str = None, option5_emoji: str = None,
-        option6_text: str = None, option6_emoji: str = None
+        option6_text: str = None, option6_emoji: str = None,
+        live_results: bool = False
     ):
         await interaction.response.defer()
 
         # Debug log
         debug_command(
-            "poll", interaction.user,
+            "poll", interaction,
             question=question,
             duration=f"{duration_minutes} min",
             options={f"{text}": emoji for text, emoji in [
@@ -91,62 +257,277 @@ class Polls(commands.Cog):
             )
             return
 
-        # Record timestamps
-        eastern = pytz.timezone("US/Eastern")
-        start_time = datetime.now(eastern)
-        end_time = start_time + timedelta(minutes=duration_minutes)
+        record = self.new_record(interaction, "reaction", question, duration_minutes, options, live=live_results)
+        msg = await interaction.followup.send(embed=self.open_embed(record), wait=True)
+
+        # Queued together; the channel's reaction bucket spaces them out
+        reactions = [self.bot.outbound.add_reaction(msg, emoji) for _, emoji in options]
+        for result in await asyncio.gather(*reactions, return_exceptions=True):
+            if isinstance(result, Exception):
+                log.debug(f"Skipped poll reaction: {result}")  # Invalid emoji
+
+        self.start_poll(msg, record)
+
+    @app_commands.command(name="buttonpoll", description="Create a poll with buttons or a menu, up to 25 options.")
+    @app_commands.describe(
+        question="Your poll question",
+        duration_minutes="How many minutes until the poll closes?",
+        options="Options separated by ; (2–25)",
+        style="Vote with buttons or a dropdown menu",
+        anonymous="Hide who voted for what in the results",
+        allow_change="Let voters change their vote",
+        live_results="Show a live results bar on the poll while it is open"
+    )
+    @app_commands.choices(style=[
+        app_commands.Choice(name="Buttons", value="buttons"),
+        app_commands.Choice(name="Menu", value="menu")
+    ])
+    async def buttonpoll(
+        self,
+        interaction: Interaction,
+        question: str,
+        duration_minutes: int,
+        options: str,
+        style: str = "buttons",
+        anonymous: bool = False,
+        allow_change: bool = True,
+        live_results: bool = False
+    ):
+        debug_command(
+            "buttonpoll", interaction,
+            question=question,
+            duration=f"{duration_minutes} min",
+            options=options,
+            style=style,
+            anonymous=anonymous
+        )
 
-        # Initial poll embed
-        embed = Embed(title="📊 Poll", description=question, color=discord.Color.blurple())
-        for text, emoji in options:
-            embed.add_field(name=f"{emoji} {text}", value=" ", inline=False)
-        embed.set_footer(
-            text=f"Poll closes at {end_time.strftime('%I:%M %p %Z')} • Created by {interaction.user.display_name}"
+        choices = [option.strip() for option in options.split(";") if option.strip()]
+        if not 2 <= len(choices) <= MAX_COMPONENT_OPTIONS:
+            await interaction.response.send_message(
+                embed=Embed(
+                    title="❌ Error",
+                    description=f"You need between 2 and {MAX_COMPONENT_OPTIONS} options, separated by `;`.",
+                    color=discord.Color.red()
+                ),
+                ephemeral=True
+            )
+            return
+
+        await interaction.response.defer()
+
+        record = self.new_record(
+            interaction, style, question, duration_minutes, [(text, None) for text in choices],
+            live=live_results, anonymous=anonymous, allow_change=allow_change, votes={}
         )
-        embed.timestamp = start_time
+        view = PollView(self, record)
+        msg = await interaction.followup.send(embed=self.open_embed(record), view=view, wait=True)
 
-        msg = await interaction.followup.send(embed=embed, wait=True)
+        self.views[str(msg.id)] = view
+        self.start_poll(msg, record)
 
-        for _, emoji in options:
-            try:
-                await msg.add_reaction(emoji)
-            except:
-                pass  # Skip invalid emojis
+    # --- Poll lifecycle ---
+    def new_record(self, interaction, kind, question, duration_minutes, options, **extra):
+        start_time = datetime.now(EASTERN)
+        end_time = start_time + timedelta(minutes=duration_minutes)
+        return {
+            "kind": kind,
+            "guild_id": str(interaction.guild.id) if interaction.guild else None,
+            "question": question,
+            "options": [[text, emoji] for text, emoji in options],
+            "start": start_time.timestamp(),
+            "end": end_time.timestamp(),
+            "creator": interaction.user.display_name,
+            **extra
+        }
+
+    def start_poll(self, msg, record):
+        # Persist the poll and hand it to the shared scheduler
+        message_id = str(msg.id)
+        record["channel_id"] = str(msg.channel.id)
+        self.polls[message_id] = record
+        self.tallies[message_id] = PollTally(record["options"])
+        save_poll_data(self.polls)
+        self.schedule_close(message_id, record["end"])
+
+    def open_embed(self, record, tally=None):
+        end_time = datetime.fromtimestamp(record["end"], EASTERN)
+        total = sum(tally.counts) if tally else 0
+        embed = Embed(title="📊 Poll", description=record["question"], color=discord.Color.blurple())
+        for i, (text, emoji) in enumerate(record["options"]):
+            value = result_bar(tally.counts[i], total) if tally else " "
+            embed.add_field(name=option_label(text, emoji), value=value, inline=False)
+        footer = f"Poll closes at {end_time.strftime('%I:%M %p %Z')} • Created by {record['creator']}"
+        if record.get("anonymous"):
+            footer += " • 🔒 Anonymous"
+        embed.set_footer(text=footer)
+        embed.timestamp = datetime.fromtimestamp(record["start"], EASTERN)
+        return embed
 
-        # Wait until poll closes
-        await asyncio.sleep(duration_minutes * 60)
+    def component_vote(self, message_id, user_id, index):
+        record = self.polls.get(message_id)
+        tally = self.tallies.get(message_id)
+        if not record or not tally or message_id in self.closing:
+            return "❌ This poll has already closed."
 
-        # Refresh message to get final reactions
-        msg = await interaction.channel.fetch_message(msg.id)
+        label = record["options"][index][0]
+        current = tally.choice(user_id)
+        if current == index:
+            return f"You already voted for **{label}**."
+        if current is not None and not record.get("allow_change", True):
+            return "❌ Votes on this poll can't be changed."
 
-        # Count votes
-        votes = {}
-        user_voted = set()
+        tally.set(user_id, index)
+        self.request_live_update(message_id)
+        # Votes are flushed to disk in batches rather than per click
+        self.saves.request("votes", self.write_votes)
+        return f"✅ Vote recorded for **{label}**."
+
+    def flush_votes(self):
+        for message_id, record in self.polls.items():
+            if record.get("kind", "reaction") != "reaction" and message_id in self.tallies:
+                record["votes"] = self.tallies[message_id].votes()
+        save_poll_data(self.polls)
+
+    async def write_votes(self):
+        self.flush_votes()
+
+    # --- Live vote tracking ---
+    def reaction_vote(self, payload):
+        message_id = str(payload.message_id)
+        tally = self.tallies.get(message_id)
+        if tally is None or payload.user_id == self.bot.user.id:
+            return None, None, None
+        return message_id, tally, tally.emoji_index.get(str(payload.emoji))
+
+    @commands.Cog.listener()
+    async def on_raw_reaction_add(self, payload):
+        message_id, tally, index = self.reaction_vote(payload)
+        if index is None or (payload.member and payload.member.bot):
+            return
+        if tally.add(payload.user_id, index):
+            self.request_live_update(message_id)
 
+    @commands.Cog.listener()
+    async def on_raw_reaction_remove(self, payload):
+        message_id, tally, index = self.reaction_vote(payload)
+        if index is None:
+            return
+        if tally.remove(payload.user_id, index):
+            self.request_live_update(message_id)
+
+    async def resync_tally(self, message_id):
+        await self.bot.wait_until_ready()
+        record = self.polls.get(message_id)
+        if not record:
+            return
+
+        try:
+            channel = self.bot.get_channel(int(record["channel_id"])) or await self.bot.fetch_channel(int(record["channel_id"]))
+            msg = await channel.fetch_message(int(message_id))
+        except (discord.NotFound, discord.Forbidden):
+            return
+
+        tally = PollTally(record["options"])
         for reaction in msg.reactions:
-            if str(reaction.emoji) not in [e for _, e in options]:
+            index = tally.emoji_index.get(str(reaction.emoji))
+            if index is None:
                 continue
             async for user in reaction.users():
-                if user.bot:
-                    continue
-                if user.id not in user_voted:
-                    votes.setdefault(str(reaction.emoji), []).append(user)
-                    user_voted.add(user.id)
-
-        # Results embed
-        result_embed = Embed(title="📊 Poll Results", description=question, color=discord.Color.yellow())
-        for text, emoji in options:
-            voters = votes.get(emoji, [])
-            count = len(voters)
-            value = f"**{count} vote(s)**\n" + (", ".join(u.display_name for u in voters) or "No votes")
-            result_embed.add_field(name=f"{emoji} {text}", value=value, inline=False)
+                if not user.bot:
+                    tally.add(user.id, index)
+
+        self.tallies[message_id] = tally
+        self.request_live_update(message_id)
+
+    def request_live_update(self, message_id):
+        record = self.polls.get(message_id)
+        if record and record.get("live") and message_id not in self.closing:
+            # Bursts of votes collapse into one edit per interval
+            self.live_edits.request(message_id, lambda: self.edit_live_results(message_id))
+
+    async def edit_live_results(self, message_id):
+        record = self.polls.get(message_id)
+        tally = self.tallies.get(message_id)
+        if not record or not tally or message_id in self.closing:
+            return
+
+        channel = self.bot.get_partial_messageable(int(record["channel_id"]))
+        await self.bot.outbound.edit(channel.get_partial_message(int(message_id)), embed=self.open_embed(record, tally))
+
+    async def close_poll(self, message_id):
+        await self.bot.wait_until_ready()
+
+        # A resumed poll needs its tally rebuilt before it can be closed
+        resync = self.resyncs.pop(message_id, None)
+        if resync:
+            try:
+                await resync
+            except Exception:
+                log.exception("Could not resync poll", extra={"poll_id": message_id})
+
+        record = self.polls.get(message_id)
+        if not record:
+            return
+
+        options = [tuple(option) for option in record["options"]]
+        start_time = datetime.fromtimestamp(record["start"], EASTERN)
+        end_time = datetime.fromtimestamp(record["end"], EASTERN)
+        tally = self.tallies.get(message_id) or PollTally(options)
+        # From here on nothing may queue an open-poll edit that would coalesce over the results
+        self.closing.add(message_id)
+        self.live_edits.cancel(message_id)
+
+        # Results embed, built entirely from the in-memory tally
+        voters = tally.voters()
+        total = sum(tally.counts)
+        result_embed = Embed(title="📊 Poll Results", description=record["question"], color=discord.Color.yellow())
+        for i, (text, emoji) in enumerate(options):
+            count = tally.counts[i]
+            value = result_bar(count, total) if record.get("live") else f"**{count} vote(s)**"
+            if not record.get("anonymous"):
+                value += "\n" + voter_list(voters[i])
+            result_embed.add_field(name=option_label(text, emoji), value=value, inline=False)
 
         result_embed.set_footer(
-            text=f"Poll started at {start_time.strftime('%I:%M %p %Z')} • Ended at {end_time.strftime('%I:%M %p %Z')} • Created by {interaction.user.display_name}"
+            text=f"Poll started at {start_time.strftime('%I:%M %p %Z')} • Ended at {end_time.strftime('%I:%M %p %Z')} • Created by {record['creator']}"
         )
         result_embed.timestamp = end_time
 
-        await msg.edit(embed=result_embed)
+        # Closing a component poll also strips its buttons
+        view = self.views.get(message_id)
+
+        channel = self.bot.get_partial_messageable(int(record["channel_id"]))
+        try:
+            # Replaces any live-results edit still waiting for the rate limit
+            message = channel.get_partial_message(int(message_id))
+            if view:
+                await self.bot.outbound.edit(message, embed=result_embed, view=None)
+            else:
+                await self.bot.outbound.edit(message, embed=result_embed)
+        except (discord.NotFound, discord.Forbidden):
+            # Message or channel is gone, nothing left to close
+            log.warning("Dropping poll: message no longer reachable", extra={"poll_id": message_id})
+        except (discord.HTTPException, asyncio.TimeoutError, OSError) as e:
+            # Discord hiccup: keep the poll and try again later rather than leave it open forever
+            attempt = self.close_attempts.get(message_id, 0) + 1
+            if attempt < POLL_CLOSE_ATTEMPTS:
+                self.close_attempts[message_id] = attempt
+                delay = POLL_CLOSE_RETRY * 2 ** (attempt - 1)
+                log.warning(f"Could not close poll, retrying in {delay}s: {e}", extra={"poll_id": message_id})
+                self.closing.discard(message_id)  # Still open until the retry; votes count again
+                self.schedule_close(message_id, time.time() + delay)
+                return
+            log.error(f"Giving up on closing poll after {attempt} attempts: {e}", extra={"poll_id": message_id})
+
+        if view:
+            view.stop()
+        self.closing.discard(message_id)
+        self.close_attempts.pop(message_id, None)
+        self.views.pop(message_id, None)
+        self.polls.pop(message_id, None)
+        self.tallies.pop(message_id, None)
+        save_poll_data(self.polls)
 
 # --- Cog setup ---
 async def setup(bot):
@@ -0,0 +1,242 @@
+import discord
+from discord.ext import commands
+from discord import app_commands, Interaction, Embed
+import asyncio
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from utils.debug import debug_command, get_logger
+
+MAX_PROFILE_SECONDS = 120
+SAMPLE_INTERVAL = 0.005  # seconds between stack samples of the event loop thread
+MEMORY_TRACE_FRAMES = 10  # frames kept per allocation; more is slower but groups better
+TOP_ALLOCATIONS = 40
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+log = get_logger("profiling")
+
+
+def owner_only():
+    async def predicate(interaction: Interaction):
+        return await interaction.client.is_owner(interaction.user)
+    return app_commands.check(predicate)
+
+
+def text_file(text, filename):
+    return discord.File(io.BytesIO(text.encode()), filename=filename)
+
+
+def owner_of(filename):
+    """Which part of the bot a source file belongs to, e.g. ``cogs.xp`` or ``discord``."""
+    path = os.path.abspath(filename)
+    if path.startswith(PROJECT_ROOT + os.sep):
+        return os.path.splitext(os.path.relpath(path, PROJECT_ROOT))[0].replace(os.sep, ".")
+    parts = path.split(os.sep)
+    if "site-packages" in parts:
+        return parts[parts.index("site-packages") + 1].split(".")[0]
+    return "stdlib/other"
+
+
+# --- Profilers ---
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack on a timer, collapsed flamegraph style.
+
+    Unlike cProfile this sees time spent blocked inside C calls (sockets,
+    subprocesses, ``extract_info``), which is what stalls the loop.
+    """
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def report(self):
+        # One "outer;...;inner count" line per stack, readable by flamegraph.pl / speedscope
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+
+def task_dump():
+    lines = []
+    tasks = sorted(asyncio.all_tasks(), key=lambda task: task.get_name())
+    lines.append(f"{len(tasks)} task(s)\n")
+    for task in tasks:
+        coro = task.get_coro()
+        lines.append(f"=== {task.get_name()} - {getattr(coro, '__qualname__', coro)}")
+        buffer = io.StringIO()
+        task.print_stack(file=buffer)
+        lines.append(buffer.getvalue())
+    return "\n".join(lines)
+
+
+def memory_report(snapshot):
+    # Charge each allocation to the innermost frame from our own code, so json/discord
+    # objects built on behalf of a cog count against that cog
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    groups = defaultdict(lambda: [0, 0])
+    for stat in snapshot.statistics("traceback"):
+        owners = [owner_of(frame.filename) for frame in stat.traceback]
+        ours = [owner for owner in reversed(owners) if owner.startswith(("cogs.", "utils.", "main"))]
+        group = groups[ours[0] if ours else owners[-1]]
+        group[0] += stat.size
+        group[1] += stat.count
+
+    lines = ["Allocated memory by owner", ""]
+    for owner, (size, count) in sorted(groups.items(), key=lambda item: item[1][0], reverse=True):
+        lines.append(f"{size / 1024:12.1f} KiB {count:10} blocks  {owner}")
+
+    lines += ["", f"Top {TOP_ALLOCATIONS} allocation sites", ""]
+    for stat in snapshot.statistics("lineno")[:TOP_ALLOCATIONS]:
+        frame = stat.traceback[0]
+        lines.append(f"{stat.size / 1024:12.1f} KiB {stat.count:10} blocks  {frame.filename}:{frame.lineno}")
+    return "\n".join(lines)
+
+
+class Profiling(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.busy = False  # cProfile and the sampler can't be stacked
+
+    async def cog_unload(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    async def cog_app_command_error(self, interaction: Interaction, error):
+        if isinstance(error, app_commands.CheckFailure):
+            await interaction.response.send_message("🔒 Only the bot owner can use profiling commands.", ephemeral=True)
+
+    @app_commands.command(name="profile_cpu", description="Owner only: profile the event loop for a few seconds.")
+    @app_commands.describe(seconds="How long to profile (max 120)", mode="sample: wall-clock stacks, includes blocking calls. cprofile: exact call counts.")
+    @app_commands.choices(mode=[
+        app_commands.Choice(name="sample", value="sample"),
+        app_commands.Choice(name="cprofile", value="cprofile")
+    ])
+    @app_commands.default_permissions(administrator=True)
+    @owner_only()
+    async def profile_cpu(self, interaction: Interaction, seconds: app_commands.Range[int, 1, MAX_PROFILE_SECONDS] = 10, mode: str = "sample"):
+        debug_command("profile_cpu", interaction, seconds=seconds, mode=mode)
+
+        if self.busy:
+            await interaction.response.send_message("⏳ A profile is already running.", ephemeral=True)
+            return
+        self.busy = True
+        await interaction.response.defer(ephemeral=True, thinking=True)
+
+        try:
+            started = time.perf_counter()
+            if mode == "cprofile":
+                # cProfile only sees the thread that enabled it, which here is the loop's
+                profiler = cProfile.Profile()
+                profiler.enable()
+                try:
+                    await asyncio.sleep(seconds)
+                finally:
+                    profiler.disable()
+
+                text = io.StringIO()
+                stats = pstats.Stats(profiler, stream=text)
+                stats.sort_stats("cumulative").print_stats(60)
+                stats.sort_stats("tottime").print_stats(30)
+                profiler.create_stats()
+                files = [
+                    text_file(text.getvalue(), "profile.txt"),
+                    # Load with pstats.Stats("profile.prof") or snakeviz
+                    discord.File(io.BytesIO(marshal.dumps(profiler.stats)), filename="profile.prof")
+                ]
+                summary = f"cProfile ran for **{time.perf_counter() - started:.1f}s**."
+            else:
+                sampler = StackSampler(threading.get_ident())
+                sampler.start()
+                try:
+                    await asyncio.sleep(seconds)
+                finally:
+                    sampler.stopped.set()
+                    await asyncio.to_thread(sampler.join)
+
+                files = [text_file(sampler.report(), "stacks.folded")]
+                summary = (
+                    f"Took **{sampler.samples}** samples over **{time.perf_counter() - started:.1f}s**.\n"
+                    f"Open `stacks.folded` with speedscope or flamegraph.pl."
+                )
+        finally:
+            self.busy = False
+
+        log.info(f"CPU profile finished ({mode}, {seconds}s)")
+        await interaction.followup.send(
+            embed=Embed(title="🔬 CPU Profile", description=summary, color=discord.Color.blurple()),
+            files=files, ephemeral=True
+        )
+
+    @app_commands.command(name="profile_tasks", description="Owner only: dump every asyncio task with its stack.")
+    @app_commands.default_permissions(administrator=True)
+    @owner_only()
+    async def profile_tasks(self, interaction: Interaction):
+        debug_command("profile_tasks", interaction)
+        dump = task_dump()
+        await interaction.response.send_message(
+            embed=Embed(title="🧵 Task Snapshot", description=dump.split("\n", 1)[0], color=discord.Color.blurple()),
+            file=text_file(dump, "tasks.txt"), ephemeral=True
+        )
+
+    @app_commands.command(name="profile_memory", description="Owner only: trace allocations and report the top allocators by cog.")
+    @app_commands.describe(action="start tracing, take a snapshot, or stop tracing")
+    @app_commands.choices(action=[
+        app_commands.Choice(name="start", value="start"),
+        app_commands.Choice(name="snapshot", value="snapshot"),
+        app_commands.Choice(name="stop", value="stop")
+    ])
+    @app_commands.default_permissions(administrator=True)
+    @owner_only()
+    async def profile_memory(self, interaction: Interaction, action: str):
+        debug_command("profile_memory", interaction, action=action)
+
+        if action == "start":
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(MEMORY_TRACE_FRAMES)
+            message = "📈 Tracing allocations. Run `/profile_memory snapshot` once the bot has been busy for a while."
+        elif action == "stop":
+            tracemalloc.stop()
+            message = "🛑 Stopped tracing allocations."
+        elif not tracemalloc.is_tracing():
+            message = "⚠️ Not tracing yet. Run `/profile_memory start` first."
+        else:
+            await interaction.response.defer(ephemeral=True, thinking=True)
+            snapshot = tracemalloc.take_snapshot()
+            # Grouping thousands of tracebacks is slow, keep it off the loop
+            report = await asyncio.to_thread(memory_report, snapshot)
+            current, peak = tracemalloc.get_traced_memory()
+            await interaction.followup.send(
+                embed=Embed(
+                    title="🧠 Memory Snapshot",
+                    description=f"Traced: **{current / 1048576:.1f} MiB** (peak {peak / 1048576:.1f} MiB)",
+                    color=discord.Color.blurple()
+                ),
+                file=text_file(report, "memory.txt"), ephemeral=True
+            )
+            return
+
+        await interaction.response.send_message(message, ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(Profiling(bot))
@@ -1,151 +1,199 @@
 import discord
 from discord.ext import commands
-from discord import app_commands, Interaction, Embed, ui
-import os
-import json
+from discord import app_commands, Interaction, Embed
+import asyncio
+import time
+from utils.debug import debug_command
+from utils.quote_index import QuoteIndex
+from utils.quote_sampler import ShuffleSampler, FenwickSampler
+from utils.paginator import Paginator, ListPageSource
+from utils.quote_store import QuoteStore
 
 QUOTE_FILE = "quotes.json"
+QUOTE_LOG = "quotes.log"
+SEARCH_RESULTS = 10
 
-# Color codes for debug output
-RESET = "\033[0m"
-BOLD = "\033[1m"
-DIM = "\033[2m"
-ITALIC = "\033[3m"
-UNDERLINE = "\033[4m"
-BLINK = "\033[5m"
-REVERSE = "\033[7m"
-HIDDEN = "\033[8m"
-RED = "\033[31m"
-
-def load_quote_data():
-    if os.path.exists(QUOTE_FILE):
-        try:
-            with open(QUOTE_FILE, "r") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return {}
-    return {}
-
-def save_quote_data(data):
-    with open(QUOTE_FILE, "w") as f:
-        json.dump(data, f, indent=4)
-
-def debug_command(name, user, **kwargs):
-    print(f"{GREEN}[COMMAND] /{name}{RESET} triggered by {YELLOW}{user.display_name}{RESET}")
-    if kwargs:
-        print(f"{CYAN}Input:{RESET}")
-        for key, val in kwargs.items():
-            print(f"{RED}  {key.capitalize()}: {val}{RESET}")
-
-class QuotePagination(ui.View):
-    def __init__(self, quotes, per_page=5):
-        super().__init__(timeout=60)
-        self.quotes = quotes
-        self.per_page = per_page
-        self.page = 0
-        self.max_pages = (len(quotes) - 1) // per_page + 1
-
-    def get_embed(self):
-        start = self.page * self.per_page
-        end = start + self.per_page
-        embed = discord.Embed(
-            title=f"📜 Saved Quotes (Page {self.page + 1}/{self.max_pages})",
-            description="\n".join([f"**{i+1}.** {q}" for i, q in enumerate(self.quotes[start:end], start=start)]),
-            color=discord.Color.blurple()
-        )
-        return embed
-
-    @ui.button(label="⬅️ Prev", style=discord.ButtonStyle.blurple)
-    async def prev(self, interaction: Interaction, button: ui.Button):
-        if self.page > 0:
-            self.page -= 1
-            await interaction.response.edit_message(embed=self.get_embed(), view=self)
-        else:
-            await interaction.response.defer()
-
-    @ui.button(label="➡️ Next", style=discord.ButtonStyle.blurple)
-    async def next(self, interaction: Interaction, button: ui.Button):
-        if self.page < self.max_pages - 1:
-            self.page += 1
-            await interaction.response.edit_message(embed=self.get_embed(), view=self)
-        else:
-            await interaction.response.defer()
+def recency_weight(quote_id):
+    # IDs only grow, so a newer quote is always weighted at least as high
+    return float(quote_id)
+
+def format_quote_page(quotes, page, max_pages):
+    return discord.Embed(
+        title=f"📜 Saved Quotes (Page {page + 1}/{max_pages})",
+        description="\n".join([f"**{quote_id}.** {q}" for quote_id, q in quotes]),
+        color=discord.Color.blurple()
+    )
 
 class Quotes(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.quotes = load_quote_data()
-
-    def ensure_guild_entry(self, guild_id):
-        if str(guild_id) not in self.quotes:
-            self.quotes[str(guild_id)] = []
+        # Quote numbers are stable IDs; deleting one never renumbers the rest
+        self.store = QuoteStore(QUOTE_FILE, QUOTE_LOG)
+
+        # Search indexes and samplers are built per guild on first use, then kept in sync
+        self.indexes = {}
+        self.samplers = {}
+        self.recent_samplers = {}
+        self.last_recent = {}
+
+    async def cog_load(self):
+        # Replaying the log can take a moment on big stores, so keep it off the loop
+        await asyncio.to_thread(self.store.load)
+
+    async def cog_unload(self):
+        self.store.close()
+
+    def get_index(self, guild_id):
+        if guild_id not in self.indexes:
+            index = QuoteIndex()
+            for quote_id, text in self.store.quotes(guild_id).items():
+                index.add(quote_id, text)
+            self.indexes[guild_id] = index
+        return self.indexes[guild_id]
+
+    def get_sampler(self, guild_id, mode):
+        if mode == "recent":
+            if guild_id not in self.recent_samplers:
+                sampler = FenwickSampler()
+                for quote_id in self.store.quotes(guild_id):
+                    sampler.set(quote_id, recency_weight(quote_id))
+                self.recent_samplers[guild_id] = sampler
+            return self.recent_samplers[guild_id]
+
+        if guild_id not in self.samplers:
+            self.samplers[guild_id] = ShuffleSampler(self.store.quotes(guild_id))
+        return self.samplers[guild_id]
+
+    def track_add(self, guild_id, quote_id, text):
+        if guild_id in self.indexes:
+            self.indexes[guild_id].add(quote_id, text)
+        if guild_id in self.samplers:
+            self.samplers[guild_id].add(quote_id)
+        if guild_id in self.recent_samplers:
+            self.recent_samplers[guild_id].set(quote_id, recency_weight(quote_id))
+
+    def track_delete(self, guild_id, quote_id, text):
+        if guild_id in self.indexes:
+            self.indexes[guild_id].remove(quote_id, text)
+        if guild_id in self.samplers:
+            self.samplers[guild_id].remove(quote_id)
+        if guild_id in self.recent_samplers:
+            self.recent_samplers[guild_id].remove(quote_id)
+
+    def no_quotes_embed(self):
+        return Embed(title="❌ No Quotes", description="There are no quotes saved for this server.", color=discord.Color.red())
+
+    def invalid_quote_embed(self):
+        return Embed(title="❌ Invalid Quote", description="Quote number is invalid.", color=discord.Color.red())
 
     @app_commands.command(name="quote_add", description="Add a new quote.")
     @app_commands.describe(text="The quote and who said it.")
     async def quote_add(self, interaction: Interaction, text: str):
-        debug_command("quote_add", interaction.user, text=text)
+        debug_command("quote_add", interaction, text=text)
         guild_id = str(interaction.guild.id)
-        self.ensure_guild_entry(guild_id)
-        self.quotes[guild_id].append(text)
-        save_quote_data(self.quotes)
-        embed = Embed(title="✅ Quote Saved", description="Your quote was added!", color=discord.Color.green())
+        quote_id = self.store.add(guild_id, text)
+        self.track_add(guild_id, quote_id, text)
+        embed = Embed(title="✅ Quote Saved", description=f"Your quote was added as #{quote_id}!", color=discord.Color.green())
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="quote_get", description="Get a random quote.")
-    async def quote_get(self, interaction: Interaction):
-        debug_command("quote_get", interaction.user)
+    @app_commands.describe(mode="Shuffle through every quote before repeating, or favour recent ones")
+    @app_commands.choices(mode=[
+        app_commands.Choice(name="Shuffle", value="shuffle"),
+        app_commands.Choice(name="Recent", value="recent")
+    ])
+    async def quote_get(self, interaction: Interaction, mode: str = "shuffle"):
+        debug_command("quote_get", interaction, mode=mode)
         guild_id = str(interaction.guild.id)
-        if guild_id not in self.quotes or not self.quotes[guild_id]:
-            embed = Embed(title="❌ No Quotes", description="There are no quotes saved for this server.", color=discord.Color.red())
-            await interaction.response.send_message(embed=embed)
+        quotes = self.store.quotes(guild_id)
+        if not quotes:
+            await interaction.response.send_message(embed=self.no_quotes_embed())
             return
-        import random
-        quote = random.choice(self.quotes[guild_id])
+
+        sampler = self.get_sampler(guild_id, mode)
+        quote_id = sampler.next()
+        if mode == "recent":
+            # Weighted draws can repeat, so re-roll once to avoid showing the same quote twice in a row
+            if quote_id == self.last_recent.get(guild_id) and len(quotes) > 1:
+                quote_id = sampler.next()
+            self.last_recent[guild_id] = quote_id
+
+        quote = quotes[quote_id]
         embed = Embed(title="📜 Random Quote", description=f"\"{quote}\"", color=discord.Color.blurple())
+        embed.set_footer(text=f"Quote #{quote_id}")
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="quote_list", description="Lists all saved quotes with pagination.")
     async def quote_list(self, interaction: Interaction):
-        debug_command("quote_list", interaction.user)
+        debug_command("quote_list", interaction)
         guild_id = str(interaction.guild.id)
+        quotes = self.store.quotes(guild_id)
 
-        if guild_id not in self.quotes or not self.quotes[guild_id]:
-            embed = Embed(title="❌ No Quotes", description="There are no quotes saved for this server.", color=discord.Color.red())
-            await interaction.response.send_message(embed=embed)
+        if not quotes:
+            await interaction.response.send_message(embed=self.no_quotes_embed())
             return
 
-        view = QuotePagination(self.quotes[guild_id])
+        view = Paginator(ListPageSource(quotes.items(), format_quote_page))
         await interaction.response.send_message(embed=view.get_embed(), view=view)
+        view.interaction = interaction
+
+    @app_commands.command(name="quote_search", description="Search saved quotes by text and/or author.")
+    @app_commands.describe(query="Words to search for", author="Only quotes attributed to this person (e.g. \"... - Name\")")
+    async def quote_search(self, interaction: Interaction, query: str = None, author: str = None):
+        debug_command("quote_search", interaction, query=query, author=author)
+        guild_id = str(interaction.guild.id)
+
+        if not query and not author:
+            embed = Embed(title="❌ Nothing to Search", description="Give a search query, an author, or both.", color=discord.Color.red())
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+
+        start = time.perf_counter()
+        hits = self.get_index(guild_id).search(query, author=author, limit=SEARCH_RESULTS)
+        elapsed = (time.perf_counter() - start) * 1000
+
+        if not hits:
+            embed = Embed(title="🔍 No Matches", description="No quotes matched your search.", color=discord.Color.orange())
+            await interaction.response.send_message(embed=embed)
+            return
+
+        quotes = self.store.quotes(guild_id)
+        lines = [f"**{quote_id}.** {quotes[quote_id]}" for quote_id, _ in hits]
+
+        embed = Embed(title="🔍 Quote Search", description="\n".join(lines), color=discord.Color.blurple())
+        embed.set_footer(text=f"{len(hits)} result(s) in {elapsed:.1f} ms")
+        await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="quote_edit", description="Edit an existing quote.")
     @app_commands.describe(index="The quote number to edit", new_text="The new quote text")
     async def quote_edit(self, interaction: Interaction, index: int, new_text: str):
-        debug_command("quote_edit", interaction.user, index=index, new_text=new_text)
+        debug_command("quote_edit", interaction, index=index, new_text=new_text)
         guild_id = str(interaction.guild.id)
 
-        if guild_id not in self.quotes or index < 1 or index > len(self.quotes[guild_id]):
-            embed = Embed(title="❌ Invalid Quote", description="Quote number is invalid.", color=discord.Color.red())
-            await interaction.response.send_message(embed=embed)
+        old_text = self.store.edit(guild_id, index, new_text)
+        if old_text is None:
+            await interaction.response.send_message(embed=self.invalid_quote_embed())
             return
 
-        self.quotes[guild_id][index - 1] = new_text
-        save_quote_data(self.quotes)
+        # Same ID, so the samplers are unaffected
+        if guild_id in self.indexes:
+            self.indexes[guild_id].remove(index, old_text)
+            self.indexes[guild_id].add(index, new_text)
         embed = Embed(title="✏️ Quote Updated", description=f"Quote #{index} has been updated.", color=discord.Color.green())
         await interaction.response.send_message(embed=embed)
 
     @app_commands.command(name="quote_delete", description="Delete a quote by its number.")
     @app_commands.describe(index="The quote number to delete")
     async def quote_delete(self, interaction: Interaction, index: int):
-        debug_command("quote_delete", interaction.user, index=index)
+        debug_command("quote_delete", interaction, index=index)
         guild_id = str(interaction.guild.id)
 
-        if guild_id not in self.quotes or index < 1 or index > len(self.quotes[guild_id]):
-            embed = Embed(title="❌ Invalid Quote", description="Quote number is invalid.", color=discord.Color.red())
-            await interaction.response.send_message(embed=embed)
+        removed = self.store.delete(guild_id, index)
+        if removed is None:
+            await interaction.response.send_message(embed=self.invalid_quote_embed())
             return
 
-        removed = self.quotes[guild_id].pop(index - 1)
-        save_quote_data(self.quotes)
+        self.track_delete(guild_id, index, removed)
         embed = Embed(
             title="🗑️ Quote Deleted",
             description=f"Removed quote #{index}:\n\n\"{removed}\"",
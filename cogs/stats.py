@@ -0,0 +1,153 @@
+import discord
+from discord.ext import commands
+from discord import app_commands, Interaction, Embed
+import asyncio
+import os
+import time
+from aiohttp import web
+from utils.debug import debug_command, get_logger
+from utils.metrics import metrics, command_seconds, listener_seconds, loop_lag_seconds
+from utils.outbound import PRIORITY_NAMES
+
+METRICS_HOST = "127.0.0.1"  # only reachable from this machine
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))  # 0 turns the endpoint off
+LAG_SAMPLE_INTERVAL = 0.5  # seconds between event loop lag samples
+STATS_TOP = 8  # commands/listeners listed in /stats
+
+log = get_logger("stats")
+
+
+def executor_queue_depth():
+    # Jobs waiting for a thread in the default executor (asyncio.to_thread, run_in_executor)
+    executor = getattr(asyncio.get_running_loop(), "_default_executor", None)
+    work_queue = getattr(executor, "_work_queue", None)
+    return work_queue.qsize() if work_queue is not None else 0
+
+
+def since_created(interaction):
+    return max(0.0, (discord.utils.utcnow() - interaction.created_at).total_seconds())
+
+
+def slowest(histogram, limit):
+    rows = [(histogram.quantile(0.95, labels), histogram.count(labels), labels) for labels in histogram.series]
+    rows.sort(key=lambda row: row[0] or 0, reverse=True)
+    return rows[:limit]
+
+
+def ms(seconds):
+    return "n/a" if seconds is None else f"{seconds * 1000:.0f} ms"
+
+
+class Stats(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+        self.last_lag = 0.0
+        self.lag_task = None
+        self.runner = None
+        self.previous_on_error = None
+
+    async def cog_load(self):
+        metrics.gauge("jeng_event_loop_lag_last_seconds", "Most recent event loop lag sample.", lambda: self.last_lag)
+        metrics.gauge("jeng_gateway_latency_seconds", "Average heartbeat latency across this process's shards.", lambda: self.bot.latency)
+        metrics.gauge("jeng_pending_tasks", "asyncio tasks that haven't finished.", lambda: len(asyncio.all_tasks()))
+        metrics.gauge("jeng_executor_queue_depth", "Jobs queued for the default thread pool.", executor_queue_depth)
+        metrics.gauge("jeng_guilds", "Guilds on this process's shards.", lambda: len(self.bot.guilds))
+        metrics.gauge("jeng_outbound_queued", "REST calls waiting in the outbound queue.", lambda: self.bot.outbound.queued())
+        metrics.gauge("jeng_outbound_in_flight", "Outbound REST calls currently running.", lambda: self.bot.outbound.in_flight())
+        metrics.counter("jeng_outbound_dropped_total", "Bulk outbound calls dropped because their route was backed up.", lambda: self.bot.outbound.stats["dropped"])
+        metrics.counter("jeng_outbound_coalesced_total", "Outbound edits replaced by a newer edit before being sent.", lambda: self.bot.outbound.stats["coalesced"])
+
+        # Failed commands never reach on_app_command_completion, so catch them here
+        self.previous_on_error = self.bot.tree.on_error
+
+        async def on_error(interaction, error):
+            name = interaction.command.qualified_name if interaction.command else "unknown"
+            command_seconds.observe(since_created(interaction), name, "error")
+            await self.previous_on_error(interaction, error)
+
+        self.bot.tree.on_error = on_error
+
+        self.lag_task = asyncio.create_task(self.sample_loop_lag(), name="loop-lag")
+        if METRICS_PORT:
+            await self.start_server()
+
+    async def cog_unload(self):
+        if self.previous_on_error:
+            self.bot.tree.on_error = self.previous_on_error
+        if self.lag_task:
+            self.lag_task.cancel()
+        if self.runner:
+            await self.runner.cleanup()
+
+    async def sample_loop_lag(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_SAMPLE_INTERVAL)
+            # Anything past the requested sleep is time the loop was busy elsewhere
+            self.last_lag = max(0.0, time.perf_counter() - start - LAG_SAMPLE_INTERVAL)
+            loop_lag_seconds.observe(self.last_lag)
+
+    async def start_server(self):
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        self.runner = web.AppRunner(app, access_log=None)
+        await self.runner.setup()
+        try:
+            await web.TCPSite(self.runner, METRICS_HOST, METRICS_PORT).start()
+        except OSError as e:
+            log.warning(f"Metrics endpoint disabled: {e}", extra={"port": METRICS_PORT})
+            await self.runner.cleanup()
+            self.runner = None
+            return
+        log.info(f"Serving metrics on http://{METRICS_HOST}:{METRICS_PORT}/metrics")
+
+    async def handle_metrics(self, request):
+        return web.Response(
+            body=metrics.render().encode(),
+            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"}
+        )
+
+    @commands.Cog.listener()
+    async def on_app_command_completion(self, interaction: Interaction, command):
+        command_seconds.observe(since_created(interaction), command.qualified_name, "ok")
+
+    @app_commands.command(name="stats", description="Show command latency and event loop health.")
+    @app_commands.default_permissions(administrator=True)
+    async def stats(self, interaction: Interaction):
+        debug_command("stats", interaction)
+
+        embed = Embed(title="📈 Bot Stats", color=discord.Color.blurple())
+        embed.add_field(name="Event Loop", value=(
+            f"Lag: **{ms(self.last_lag)}** now, **{ms(loop_lag_seconds.quantile(0.99, ()))}** p99\n"
+            f"Pending tasks: **{len(asyncio.all_tasks())}**\n"
+            f"Executor queue: **{executor_queue_depth()}**"
+        ), inline=False)
+
+        outbound = self.bot.outbound
+        queued = ", ".join(f"{name} {outbound.queued(priority)}" for priority, name in PRIORITY_NAMES.items())
+        embed.add_field(name="Outbound", value=(
+            f"Queued: **{outbound.queued()}** ({queued})\n"
+            f"Sent: **{outbound.stats['sent']}** • Coalesced: **{outbound.stats['coalesced']}** • "
+            f"Dropped: **{outbound.stats['dropped']}** • 429s: **{outbound.stats['rate_limited']}**"
+        ), inline=False)
+
+        shards = "\n".join(f"Shard {shard_id}: **{ms(latency)}**" for shard_id, latency in self.bot.latencies)
+        embed.add_field(name="Gateway", value=shards or "Not connected", inline=False)
+
+        commands_text = "\n".join(
+            f"`/{labels[0]}` {labels[1]}: **{ms(p95)}** p95 ({count} runs)"
+            for p95, count, labels in slowest(command_seconds, STATS_TOP)
+        )
+        embed.add_field(name="Slowest Commands", value=commands_text or "No commands yet", inline=False)
+
+        listeners_text = "\n".join(
+            f"`{labels[0]}`: **{ms(p95)}** p95 ({count} calls)"
+            for p95, count, labels in slowest(listener_seconds, STATS_TOP)
+        )
+        embed.add_field(name="Slowest Listeners", value=listeners_text or "No events yet", inline=False)
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(Stats(bot))
@@ -1,94 +1,311 @@
 import discord
 from discord.ext import commands
 from discord import app_commands, Interaction
-import json
-import os
-
-# --- Console Colors ---
-RESET = "\033[0m"
-BLACK = "\033[30m"
-RED = "\033[31m"
-GREEN = "\033[32m"
-YELLOW = "\033[33m"
-BLUE = "\033[34m"
-MAGENTA = "\033[35m"
-CYAN = "\033[36m"
-WHITE = "\033[37m"
+import asyncio
+import io
+import time
+from collections import deque
+from string import Formatter
+from utils.storage import load_shared, save_shared
+from utils.welcome_card import CardRenderer, CARDS_AVAILABLE
+from utils.debug import debug_command, get_logger
 
+log = get_logger("welcome")
 
 WELCOME_CONFIG = "welcome_config.json"
+WELCOME_BATCH_WINDOW = 3  # seconds joins are collected before they are welcomed
+WELCOME_BATCH_THRESHOLD = 3  # more joins than this in one window get one combined embed
+WELCOME_BATCH_MENTIONS = 50  # mentions listed in a combined embed before "+N more"
+CARD_WORKERS = 2  # processes used to render welcome cards
 
 def load_welcome_config():
-    if os.path.exists(WELCOME_CONFIG):
-        with open(WELCOME_CONFIG, "r") as f:
-            return json.load(f)
-    return {}
+    return load_shared(WELCOME_CONFIG)
 
 def save_welcome_config(config):
-    with open(WELCOME_CONFIG, "w") as f:
-        json.dump(config, f, indent=4)
+    save_shared(WELCOME_CONFIG, config)
+
+# --- Welcome Templates ---
+PLACEHOLDERS = {"user", "username", "server", "member_count", "account_age"}
+
+def account_age(created_at):
+    days = (discord.utils.utcnow() - created_at).days
+    if days >= 365:
+        return f"{days // 365} year(s)"
+    if days >= 30:
+        return f"{days // 30} month(s)"
+    return f"{days} day(s)"
+
+class WelcomeTemplate:
+    """A guild's welcome config, compiled once instead of on every join.
+
+    The message is split into literal text and placeholder slots up front,
+    and the channel/role are cached once found until the config changes or
+    they are deleted. Misses aren't cached, since the guild may still be
+    filling its cache at startup.
+    """
+
+    def __init__(self, config):
+        self.channel_id = int(config["channel_id"])
+        self.role_id = int(config["role_id"]) if config.get("role_id") else None
+        self.card = bool(config.get("card")) and CARDS_AVAILABLE
+        self.parts = []
+        self.fields = set()
+
+        # Raises ValueError on unbalanced braces, which /setwelcome reports
+        for literal, field, _, _ in Formatter().parse(config.get("message", "")):
+            self.parts.append((literal, None))
+            if field is None:
+                continue
+            if field in PLACEHOLDERS:
+                self.parts.append(("", field))
+                self.fields.add(field)
+            else:
+                # Unknown placeholders are left in the text as typed
+                self.parts.append(("{" + field + "}", None))
+
+        self.channel = None
+        self.role = None
+
+    def resolve(self, guild):
+        if self.channel is None:
+            self.channel = guild.get_channel(self.channel_id)
+        if self.role is None and self.role_id:
+            self.role = guild.get_role(self.role_id)
+        return self.channel, self.role
+
+    def invalidate(self):
+        self.channel = None
+        self.role = None
+
+    def render(self, guild, members):
+        # Only the placeholders this template actually uses are computed
+        values = {}
+        if "user" in self.fields:
+            values["user"] = ", ".join(m.mention for m in members[:WELCOME_BATCH_MENTIONS])
+            if len(members) > WELCOME_BATCH_MENTIONS:
+                values["user"] += f" +{len(members) - WELCOME_BATCH_MENTIONS} more"
+        if "username" in self.fields:
+            values["username"] = members[0].name if len(members) == 1 else f"{len(members)} new members"
+        if "server" in self.fields:
+            values["server"] = guild.name
+        if "member_count" in self.fields:
+            values["member_count"] = str(guild.member_count)
+        if "account_age" in self.fields:
+            values["account_age"] = account_age(members[0].created_at) if len(members) == 1 else ""
+        return "".join(values[field] if field else literal for literal, field in self.parts)
+
+def compile_templates(config):
+    templates = {}
+    for guild_id, guild_config in config.items():
+        try:
+            templates[guild_id] = WelcomeTemplate(guild_config)
+        except ValueError:
+            log.warning("Skipping invalid welcome message", extra={"guild_id": guild_id})
+    return templates
 
 class Welcome(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.welcome_config = load_welcome_config()
+        self.welcome_config = {}
+        self.templates = {}
+        # Worker pool is only started once a guild actually uses cards
+        self.cards = None
+
+        # Per-guild queues; each is drained by at most one worker task at a time
+        self.join_queues = {}
+        self.join_workers = {}
+        self.role_queues = {}
+        self.role_workers = {}
+        self.stats = {
+            "joins": 0,
+            "welcomed": 0,
+            "batches": 0,
+            "roles_assigned": 0,
+            "role_failures": 0,
+            "welcome_lag": 0.0,
+            "role_lag": 0.0
+        }
+
+    async def cog_load(self):
+        self.welcome_config = await asyncio.to_thread(load_welcome_config)
+        self.templates = compile_templates(self.welcome_config)
+
+    async def cog_unload(self):
+        for task in [*self.join_workers.values(), *self.role_workers.values()]:
+            task.cancel()
+        if self.cards:
+            self.cards.close()
+
+    async def render_card(self, member, member_number):
+        if self.cards is None:
+            self.cards = CardRenderer(CARD_WORKERS)
+        try:
+            return await self.cards.render(member, member_number)
+        except Exception:
+            log.exception(f"Could not render card for {member.name}", extra={"guild_id": member.guild.id})
+            return None
 
     @commands.Cog.listener()
     async def on_member_join(self, member):
         guild_id = str(member.guild.id)
 
-        config = self.welcome_config.get(guild_id)
-        if not config:
+        template = self.templates.get(guild_id)
+        if not template:
             return
 
-        channel_id = config.get("channel_id")
-        welcome_message = config.get("message", "")
-        role_id = config.get("role_id")
+        self.stats["joins"] += 1
+        now = time.monotonic()
 
         # Give role if defined
-        if role_id:
-            role = member.guild.get_role(int(role_id))
-            if role:
-                await member.add_roles(role)
+        _, role = template.resolve(member.guild)
+        if role:
+            self.role_queues.setdefault(guild_id, deque()).append((member, role, now))
+            if guild_id not in self.role_workers:
+                self.role_workers[guild_id] = asyncio.create_task(self.assign_roles(guild_id))
 
-        # Format the welcome message
-        formatted_message = welcome_message.format(user=member.mention, server=member.guild.name)
+        self.join_queues.setdefault(guild_id, deque()).append((member, now))
+        if guild_id not in self.join_workers:
+            self.join_workers[guild_id] = asyncio.create_task(self.send_welcomes(guild_id))
+
+    # --- Join pipeline ---
+    async def assign_roles(self, guild_id):
+        queue = self.role_queues[guild_id]
+        try:
+            while queue:
+                member, role, queued_at = queue.popleft()
+                try:
+                    # Paced by the guild's role bucket in bot.outbound
+                    await self.bot.outbound.add_roles(member, role)
+                    self.stats["roles_assigned"] += 1
+                except discord.HTTPException as e:
+                    self.stats["role_failures"] += 1
+                    log.warning(f"Could not give {role.name} to {member.name}: {e}", extra={"guild_id": member.guild.id})
+                self.stats["role_lag"] = time.monotonic() - queued_at
+        finally:
+            self.role_workers.pop(guild_id, None)
+
+    async def send_welcomes(self, guild_id):
+        try:
+            while self.join_queues.get(guild_id):
+                # Let joins pile up for a moment so bursts can be welcomed together
+                await asyncio.sleep(WELCOME_BATCH_WINDOW)
+                joins = self.join_queues.pop(guild_id, deque())
+                try:
+                    await self.welcome(guild_id, list(joins))
+                except discord.HTTPException as e:
+                    log.warning(f"Could not send welcome: {e}", extra={"guild_id": guild_id})
+                if joins:
+                    self.stats["welcome_lag"] = time.monotonic() - joins[0][1]
+        finally:
+            self.join_workers.pop(guild_id, None)
+
+    async def welcome(self, guild_id, joins):
+        template = self.templates.get(guild_id)
+        if not template or not joins:
+            return
+
+        guild = joins[0][0].guild
+        channel, _ = template.resolve(guild)
+        if not channel:
+            return
 
-        # Send the welcome embed
-        channel = member.guild.get_channel(int(channel_id))
-        if channel:
+        members = [member for member, _ in joins]
+
+        if len(members) > WELCOME_BATCH_THRESHOLD:
+            embed = discord.Embed(
+                title="🎉 Welcome, everyone!",
+                description=template.render(guild, members),
+                color=discord.Color.purple()
+            )
+            embed.set_footer(text=f"{len(members)} new members • Member #{guild.member_count}")
+            embed.timestamp = discord.utils.utcnow()
+
+            await self.bot.outbound.send(channel, embed=embed)
+            self.stats["batches"] += 1
+            self.stats["welcomed"] += len(members)
+
+            log.info(f"Welcomed {len(members)} members to {guild.name} in one batch", extra={"guild_id": guild.id})
+            return
+
+        numbers = [guild.member_count - len(members) + 1 + i for i in range(len(members))]
+        cards = [None] * len(members)
+        if template.card:
+            # Rendered in parallel in the worker pool, then sent in join order
+            cards = await asyncio.gather(*(self.render_card(m, n) for m, n in zip(members, numbers)))
+
+        for member, number, card in zip(members, numbers, cards):
             embed = discord.Embed(
                 title="🎉 Welcome!",
-                description=formatted_message,
+                description=template.render(guild, [member]),
                 color=discord.Color.purple()
             )
-            embed.set_thumbnail(url=member.avatar.url if member.avatar else member.default_avatar.url)
-            embed.set_footer(text=f"Member #{len(member.guild.members)}")
+            embed.set_footer(text=f"Member #{number}")
             embed.timestamp = discord.utils.utcnow()
 
-            await channel.send(embed=embed)
+            if card:
+                embed.set_image(url="attachment://welcome.png")
+                await self.bot.outbound.send(channel, embed=embed, file=discord.File(io.BytesIO(card), filename="welcome.png"))
+            else:
+                embed.set_thumbnail(url=member.display_avatar.url)
+                await self.bot.outbound.send(channel, embed=embed)
+            self.stats["welcomed"] += 1
+
+            log.info(f"Welcomed {member.name} to {guild.name}", extra={"guild_id": guild.id})
+
+    def metrics(self):
+        oldest = [queue[0][-1] for queue in [*self.join_queues.values(), *self.role_queues.values()] if queue]
+        return {
+            **self.stats,
+            "join_queue_depth": sum(len(q) for q in self.join_queues.values()),
+            "role_queue_depth": sum(len(q) for q in self.role_queues.values()),
+            "oldest_pending": time.monotonic() - min(oldest) if oldest else 0.0
+        }
+
+    @commands.Cog.listener()
+    async def on_guild_channel_delete(self, channel):
+        template = self.templates.get(str(channel.guild.id))
+        if template and template.channel_id == channel.id:
+            template.invalidate()
 
-            # DEBUG LOG
-            print(f"{BOLD}{RED}[WELCOME]{RESET} Welcomed {BOLD}{YELLOW}{member.name}{RESET} to {BOLD}{BLUE}{member.guild.name}{RESET}")
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role):
+        template = self.templates.get(str(role.guild.id))
+        if template and template.role_id == role.id:
+            template.invalidate()
 
     @app_commands.command(name="setwelcome", description="Configure the welcome message settings.")
-    @app_commands.describe(channel="The channel to send welcome messages to.", message="The welcome message. Use {user} and {server}.", role="Optional role to assign to new members.")
-    async def set_welcome(self, interaction: Interaction, channel: discord.TextChannel, message: str, role: discord.Role = None):
+    @app_commands.describe(channel="The channel to send welcome messages to.", message="The welcome message. Use {user}, {username}, {server}, {member_count} and {account_age}.", role="Optional role to assign to new members.", card="Attach a generated welcome card image.")
+    async def set_welcome(self, interaction: Interaction, channel: discord.TextChannel, message: str, role: discord.Role = None, card: bool = False):
         guild_id = str(interaction.guild.id)
 
-        self.welcome_config[guild_id] = {
+        config = {
             "channel_id": str(channel.id),
             "message": message,
-            "role_id": str(role.id) if role else None
+            "role_id": str(role.id) if role else None,
+            "card": card
         }
 
-        print(f"{BOLD}{RED}[COMMAND] /set_welcome{RESET}  used by {YELLOW}{interaction.user.display_name}{RESET}")
+        try:
+            template = WelcomeTemplate(config)
+        except ValueError:
+            embed = discord.Embed(
+                title="❌ Invalid Message",
+                description="The welcome message has unbalanced `{` or `}` braces.",
+                color=discord.Color.red()
+            )
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            return
+
+        self.welcome_config[guild_id] = config
+        self.templates[guild_id] = template
+
+        debug_command("setwelcome", interaction, channel=channel)
         
         save_welcome_config(self.welcome_config)
 
         embed = discord.Embed(
             title="✅ Welcome Configuration Set",
-            description=f"Welcome messages will be sent in {channel.mention}.\nMessage: `{message}`\nRole: {role.mention if role else 'None'}",
+            description=f"Welcome messages will be sent in {channel.mention}.\nMessage: `{message}`\nRole: {role.mention if role else 'None'}\nCard: {'On' if template.card else 'Off'}",
             color=discord.Color.green()
         )
         await interaction.response.send_message(embed=embed)
@@ -108,7 +325,7 @@ class Welcome(commands.Cog):
             return
 
 
-        print(f"{BOLD}{RED}[COMMAND] /level{RESET} used by {YELLOW}{interaction.user.display_name}{RESET}")
+        debug_command("welcomeconfig", interaction)
 
         channel = self.bot.get_channel(int(config['channel_id']))
         role = interaction.guild.get_role(int(config['role_id'])) if config.get('role_id') else None
@@ -121,6 +338,23 @@ class Welcome(commands.Cog):
         )
         await interaction.response.send_message(embed=embed)
 
+    @app_commands.command(name="welcomestats", description="Show welcome pipeline queue depth and lag.")
+    @app_commands.default_permissions(manage_guild=True)
+    async def welcome_stats(self, interaction: Interaction):
+        debug_command("welcomestats", interaction)
+
+        metrics = self.metrics()
+        embed = discord.Embed(title="📈 Welcome Pipeline", color=discord.Color.blue())
+        embed.add_field(name="Queued Welcomes", value=str(metrics["join_queue_depth"]), inline=True)
+        embed.add_field(name="Queued Roles", value=str(metrics["role_queue_depth"]), inline=True)
+        embed.add_field(name="Oldest Pending", value=f"{metrics['oldest_pending']:.1f}s", inline=True)
+        embed.add_field(name="Joins Seen", value=str(metrics["joins"]), inline=True)
+        embed.add_field(name="Welcomed", value=f"{metrics['welcomed']} ({metrics['batches']} batches)", inline=True)
+        embed.add_field(name="Roles Given", value=f"{metrics['roles_assigned']} ({metrics['role_failures']} failed)", inline=True)
+        embed.add_field(name="Last Welcome Lag", value=f"{metrics['welcome_lag']:.1f}s", inline=True)
+        embed.add_field(name="Last Role Lag", value=f"{metrics['role_lag']:.1f}s", inline=True)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
 # --- Cog setup ---
 async def setup(bot):
     await bot.add_cog(Welcome(bot))
@@ -1,26 +1,37 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import json
-import os
+import asyncio
 import random
+import tempfile
+import time
+from utils.coalesce import Coalescer
+from utils.debug import debug_command, get_logger
+from utils.outbound import PRIORITY_BULK
+from utils.storage import load_shared, save_shared
+from utils.xp_batch import BATCH_SIZE, BatchError, apply_import, export_lines, grant, parse_import, reset, run_async
+from utils.xp_history import GuildHistory, RankCache
 
-# --- Console Colors ---
-RESET = "\033[0m"
-BLACK = "\033[30m"
-RED = "\033[31m"
-GREEN = "\033[32m"
-YELLOW = "\033[33m"
-BLUE = "\033[34m"
-MAGENTA = "\033[35m"
-CYAN = "\033[36m"
-WHITE = "\033[37m"
-BOLD = "\033[1m"
+log = get_logger("xp")
 
 # --- XP Settings ---
 XP_FILE = "xp_data.json"
+HISTORY_FILE = "xp_history.json"
+XP_SAVE_INTERVAL = 5  # seconds between XP saves while messages keep earning it
+HISTORY_SAVE_INTERVAL = 30  # seconds; history only feeds the windowed leaderboards
+MAX_IMPORT_BYTES = 8 * 1024 * 1024
+EXPORT_SPOOL_BYTES = 4 * 1024 * 1024  # exports bigger than this spill to a temp file
 XP_PER_MESSAGE = 10
+XP_PER_VOICE_MINUTE = 5
+VOICE_SWEEP_INTERVAL = 60  # seconds between voice XP payouts
 BASE_XP = 100
+# period -> (leaderboard title, phrase for "XP earned ...")
+PERIODS = {
+    "all": ("🏆 Leaderboard", "all time"),
+    "week": ("🏆 Weekly Leaderboard", "in the past week"),
+    "month": ("🏆 Monthly Leaderboard", "in the past month"),
+    "year": ("🏆 Yearly Leaderboard", "in the past year")
+}
 
 level_up_responses = [
     "Fuck you {user}, you're now level {level}!",
@@ -30,26 +41,61 @@ level_up_responses = [
 
 # --- JSON Load/Save Helpers ---
 def load_xp_data():
-    if os.path.exists(XP_FILE):
-        try:
-            with open(XP_FILE, "r") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return {}
-    return {}
+    return load_shared(XP_FILE)
 
 def save_xp_data(xp_data):
-    with open(XP_FILE, "w") as f:
-        json.dump(xp_data, f, indent=4)
+    return save_shared(XP_FILE, xp_data)
+
+def load_history():
+    return {guild_id: GuildHistory(record) for guild_id, record in load_shared(HISTORY_FILE).items()}
+
+def save_history(history):
+    save_shared(HISTORY_FILE, {guild_id: guild.to_record() for guild_id, guild in history.items()})
 
 def get_xp_needed(level):
     return BASE_XP * (level + 1)
 
+def all_time_scores(guild_data):
+    return {
+        user_id: (data.get("level", 0), data.get("xp", 0))
+        for user_id, data in guild_data.items()
+        if user_id != "config" and isinstance(data, dict)
+    }
+
+def earns_voice_xp(member, state, blocked):
+    channel = state.channel
+    if channel is None or member.bot or channel == member.guild.afk_channel:
+        return False
+    if state.self_deaf or state.deaf or str(channel.id) in blocked:
+        return False
+    return True
+
 # --- XP Cog ---
 class XPSystem(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
-        self.xp_data = load_xp_data()
+        self.xp_data = {}
+        # (guild_id, user_id) -> monotonic time voice XP was last paid up to
+        self.voice_sessions = {}
+        self.history = {}  # guild_id -> GuildHistory
+        self.xp_saves = Coalescer(XP_SAVE_INTERVAL)
+        self.history_saves = Coalescer(HISTORY_SAVE_INTERVAL)
+        self.ranks = RankCache()
+
+    async def cog_load(self):
+        # Read off the event loop so other cogs can load meanwhile
+        self.xp_data, self.history = await asyncio.gather(asyncio.to_thread(load_xp_data), asyncio.to_thread(load_history))
+        self.schedule_voice_sweep()
+        if self.bot.is_ready():
+            self.seed_voice_sessions()
+
+    async def cog_unload(self):
+        self.bot.scheduler.cancel(("xp", "voice"))
+        await self.sweep_voice(reschedule=False)
+        self.xp_saves.cancel("xp")
+        save_xp_data(self.xp_data)
+        self.history_saves.cancel("history")
+        save_history(self.history)
 
     def ensure_user_entry(self, guild_id, user_id):
         guild_id = str(guild_id)
@@ -61,6 +107,52 @@ class XPSystem(commands.Cog):
         if user_id not in self.xp_data[guild_id]:
             self.xp_data[guild_id][user_id] = {"xp": 0, "level": 0}
 
+    def add_xp(self, guild_id, user_id, amount):
+        """Credit XP and return the new level if the user levelled up, else None."""
+        self.ensure_user_entry(guild_id, user_id)
+        user_data = self.xp_data[guild_id][user_id]
+        user_data["xp"] += amount
+
+        history = self.history.get(guild_id)
+        if history is None:
+            history = self.history[guild_id] = GuildHistory()
+        history.add(user_id, amount)
+        self.history_saves.request("history", self.write_history)
+
+        if user_data["xp"] >= get_xp_needed(user_data["level"]):
+            user_data["xp"] = 0
+            user_data["level"] += 1
+            return user_data["level"]
+        return None
+
+    def request_save(self):
+        # Serialising every user is O(guild size); bursts of XP collapse into one save per interval
+        self.xp_saves.request("xp", self.write_xp)
+
+    async def write_xp(self):
+        save_xp_data(self.xp_data)
+
+    async def write_history(self):
+        save_history(self.history)
+
+    def ranking(self, guild_id, period):
+        """``(ranking, positions)`` for a guild, from the rank cache."""
+        if period == "all":
+            return self.ranks.get(guild_id, period, lambda: all_time_scores(self.xp_data.get(guild_id, {})))
+        history = self.history.get(guild_id) or GuildHistory()
+        return self.ranks.get(guild_id, period, lambda: dict(history.scores(period)))
+
+    def announce_level_up(self, channel, member, level):
+        embed = discord.Embed(
+            title="🎮 Level Up!",
+            description=random.choice(level_up_responses).format(user=member.mention, level=level),
+            color=discord.Color.gold()
+        )
+        # Not awaited: during a flood level-ups queue (or drop) instead of stalling XP
+        self.bot.outbound.send(channel, PRIORITY_BULK, embed=embed)
+
+        log.info(f"{member.display_name} is now level {level}", extra={"guild_id": member.guild.id, "user_id": member.id})
+
     @commands.Cog.listener()
     async def on_message(self, message):
         if message.author.bot or not message.guild:
@@ -71,29 +163,99 @@ class XPSystem(commands.Cog):
 
         self.ensure_user_entry(guild_id, user_id)
 
-        user_data = self.xp_data[guild_id][user_id]
         xp_amount = self.xp_data.get(guild_id, {}).get("config", {}).get("xp_per_message", XP_PER_MESSAGE)
         blocked = self.xp_data.get(guild_id, {}).get("config", {}).get("blocked_channels", [])
         if str(message.channel.id) in blocked:
             return  # Skip XP in blocked channels
 
-        user_data["xp"] += xp_amount
-
-
-        if user_data["xp"] >= get_xp_needed(user_data["level"]):
-            user_data["xp"] = 0
-            user_data["level"] += 1
+        level = self.add_xp(guild_id, user_id, xp_amount)
+        if level is not None:
+            self.announce_level_up(message.channel, message.author, level)
+
+        self.request_save()
+
+    # --- Voice XP ---
+    # Joins and leaves only touch the session table; one sweep a minute pays
+    # everyone at once, so thousands of people in voice cost one pass and one save.
+    def blocked_channels(self, guild_id):
+        return self.xp_data.get(str(guild_id), {}).get("config", {}).get("blocked_channels", [])
+
+    def seed_voice_sessions(self):
+        now = time.monotonic()
+        earning = set()
+        for guild in self.bot.guilds:
+            blocked = self.blocked_channels(guild.id)
+            for channel in [*guild.voice_channels, *guild.stage_channels]:
+                for member in channel.members:
+                    if member.voice and earns_voice_xp(member, member.voice, blocked):
+                        earning.add((str(guild.id), str(member.id)))
+        # Anyone who left while we were disconnected never sent a leave
+        self.voice_sessions = {key: self.voice_sessions.get(key, now) for key in earning}
+
+    def still_earning(self, key):
+        guild_id, user_id = key
+        guild = self.bot.get_guild(int(guild_id))
+        member = guild.get_member(int(user_id)) if guild else None
+        return bool(member and member.voice and earns_voice_xp(member, member.voice, self.blocked_channels(guild_id)))
 
-            embed = discord.Embed(
-                title="🎮 Level Up!",
-                description=random.choice(level_up_responses).format(user=message.author.mention, level=user_data["level"]),
-                color=discord.Color.gold()
-            )
-            await message.channel.send(embed=embed)
-
-            print(f"{BOLD}{GREEN}[LEVEL UP]{RESET} {message.author.display_name} is now level {user_data['level']}")
+    @commands.Cog.listener()
+    async def on_ready(self):
+        # People already in voice when the bot (re)connects never send a join
+        self.seed_voice_sessions()
 
-        save_xp_data(self.xp_data)
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        blocked = self.blocked_channels(member.guild.id)
+        is_earning = earns_voice_xp(member, after, blocked)
+        key = (str(member.guild.id), str(member.id))
+
+        if is_earning:
+            self.voice_sessions.setdefault(key, time.monotonic())
+        elif key in self.voice_sessions:
+            # Checked against the session table, not ``before``: a channel blocked
+            # or made the AFK channel mid-session would otherwise never close it.
+            # Leaving mid-interval still pays for the whole minutes spent.
+            started = self.voice_sessions.pop(key)
+            if self.pay_voice(key, time.monotonic() - started):
+                self.request_save()
+
+    def pay_voice(self, key, seconds):
+        """Credit whole minutes of voice time; returns the seconds paid for."""
+        minutes = int(seconds // 60)
+        if not minutes:
+            return 0
+        guild_id, user_id = key
+        rate = self.xp_data.get(guild_id, {}).get("config", {}).get("xp_per_voice_minute", XP_PER_VOICE_MINUTE)
+        level = self.add_xp(guild_id, user_id, minutes * rate)
+        if level is not None:
+            guild = self.bot.get_guild(int(guild_id))
+            member = guild.get_member(int(user_id)) if guild else None
+            if member and guild.system_channel:
+                self.announce_level_up(guild.system_channel, member, level)
+        return minutes * 60
+
+    def schedule_voice_sweep(self):
+        self.bot.scheduler.schedule(time.time() + VOICE_SWEEP_INTERVAL, ("xp", "voice"), self.sweep_voice)
+
+    async def sweep_voice(self, reschedule=True):
+        try:
+            now = time.monotonic()
+            paid = False
+            # Sessions whose member left without us seeing it, or whose channel
+            # stopped earning, are dropped instead of paid forever
+            for key in [key for key in self.voice_sessions if not self.still_earning(key)]:
+                del self.voice_sessions[key]
+            for key, started in self.voice_sessions.items():
+                seconds = self.pay_voice(key, now - started)
+                if seconds:
+                    # Keep the unpaid remainder so partial minutes aren't lost
+                    self.voice_sessions[key] = started + seconds
+                    paid = True
+            if paid:
+                self.request_save()
+        finally:
+            if reschedule:
+                self.schedule_voice_sweep()
 
     @app_commands.command(name="level", description="Check your current level and XP.")
     async def level(self, interaction: discord.Interaction):
@@ -110,17 +272,19 @@ class XPSystem(commands.Cog):
 
         user_data = self.xp_data[guild_id][user_id]
 
-        # Sort all users in the guild
-        all_users = sorted(
-            self.xp_data[guild_id].items(),
-            key=lambda x: (x[1].get("level", 0), x[1].get("xp", 0)),
-            reverse=True
-        )
-
     # Determine the rank
-        rank = next((i for i, (uid, _) in enumerate(all_users, 1) if uid == user_id), "Unknown")
+        _, positions = self.ranking(guild_id, "all")
+        if user_id not in positions:
+            # New since the cached ranking was built
+            self.ranks.invalidate(guild_id)
+            _, positions = self.ranking(guild_id, "all")
+        rank = positions.get(user_id, "Unknown")
 
-        print(f"{BOLD}{CYAN}[COMMAND] /level{RESET} used by {YELLOW}{interaction.user.display_name}{RESET}")
+        history = self.history.get(guild_id)
+        weekly = history.scores("week").get(user_id, 0) if history else 0
+        monthly = history.scores("month").get(user_id, 0) if history else 0
+
+        debug_command("level", interaction)
 
         embed = discord.Embed(
             title="🏆 XP Level",
@@ -128,7 +292,8 @@ class XPSystem(commands.Cog):
                 f"{interaction.user.mention}\n"
                 f"**Level:** {user_data['level']}\n"
                 f"**XP:** {user_data['xp']}\n"
-                f"**Rank:** #{rank}"
+                f"**Rank:** #{rank}\n"
+                f"**This week:** {weekly} XP • **This month:** {monthly} XP"
             ),
             color=discord.Color.green()
         )
@@ -141,53 +306,52 @@ class XPSystem(commands.Cog):
 
 
     @app_commands.command(name="leaderboard", description="See the top 10 users by level and XP.")
-    async def leaderboard(self, interaction: discord.Interaction):
+    @app_commands.describe(period="Rank by all-time level, or by XP earned in the past week, month or year")
+    @app_commands.choices(period=[
+        app_commands.Choice(name="all time", value="all"),
+        app_commands.Choice(name="week", value="week"),
+        app_commands.Choice(name="month", value="month"),
+        app_commands.Choice(name="year", value="year")
+    ])
+    async def leaderboard(self, interaction: discord.Interaction, period: str = "all"):
         guild_id = str(interaction.guild.id)
 
-        print(f"{BOLD}{CYAN}[COMMAND] /leaderboard{RESET} used by {YELLOW}{interaction.user.display_name}{RESET}")
+        debug_command("leaderboard", interaction, period=period)
+        title, phrase = PERIODS[period]
+
+    # Ranked from pre-aggregated totals; the cache only re-sorts every few seconds
+        ranking, _ = self.ranking(guild_id, period)
 
     # If there's no data yet
-        if guild_id not in self.xp_data or not self.xp_data[guild_id]:
+        if not ranking:
             embed = discord.Embed(
-                title="🏆 Leaderboard",
-                description="No XP data for this server yet.",
+                title=title,
+                description="No XP data for this server yet." if period == "all" else f"Nobody has earned XP {phrase} yet.",
                 color=discord.Color.orange()
             )
             await interaction.response.send_message(embed=embed, ephemeral=True)
             return
 
-    # Ensure all users have valid XP/level data
-        for user_id, data in self.xp_data[guild_id].items():
-            if not isinstance(data, dict):
-                self.xp_data[guild_id][user_id] = {"xp": 0, "level": 0}
-            else:
-                data.setdefault("xp", 0)
-                data.setdefault("level", 0)
-
-    # Sort safely using fallback values
-        def safe_sort_key(item):
-            data = item[1]
-            return (data.get("level", 0), data.get("xp", 0))
-
-        sorted_users = sorted(
-            self.xp_data[guild_id].items(),
-            key=safe_sort_key,
-            reverse=True
-        )
-
     # Create embed
-        embed = discord.Embed(title="🏆 Leaderboard", color=discord.Color.blue())
+        embed = discord.Embed(title=title, color=discord.Color.blue())
+        history = self.history.get(guild_id)
 
-        for i, (user_id, data) in enumerate(sorted_users[:10], start=1):
+        for i, user_id in enumerate(ranking[:10], start=1):
             try:
                 user = await self.bot.fetch_user(int(user_id))
                 name = user.display_name
             except:
                 name = f"<Unknown User {user_id}>"
 
+            if period == "all":
+                data = self.xp_data[guild_id].get(user_id, {})
+                value = f"Level {data.get('level', 0)} ({data.get('xp', 0)} XP)"
+            else:
+                value = f"{history.scores(period).get(user_id, 0) if history else 0} XP {phrase}"
+
             embed.add_field(
                 name=f"{i}. {name}",
-                value=f"Level {data['level']} ({data['xp']} XP)",
+                value=value,
                 inline=False
             )
 
@@ -278,6 +442,7 @@ class XPSystem(commands.Cog):
 
         embed = discord.Embed(title="⚙️ XP System Config", color=discord.Color.blurple())
         embed.add_field(name="XP per Message", value=f"**{xp_amount}**", inline=False)
+        embed.add_field(name="XP per Voice Minute", value=f"**{config.get('xp_per_voice_minute', XP_PER_VOICE_MINUTE)}**", inline=False)
         if blocked_channels:
             mentions = ", ".join(f"<#{cid}>" for cid in blocked_channels)
             embed.add_field(name="Blocked Channels", value=mentions, inline=False)
@@ -285,7 +450,137 @@ class XPSystem(commands.Cog):
             embed.add_field(name="Blocked Channels", value="None", inline=False)
 
         await interaction.response.send_message(embed=embed)
-                                                
+
+    # --- Batch admin commands ---
+    # Each runs as one pass that yields to the loop between chunks, then saves
+    # and refreshes the rankings once for the whole guild.
+    def finish_batch(self, guild_id, action, users):
+        save_xp_data(self.xp_data)
+        self.ranks.invalidate(guild_id)
+        log.info(f"Batch {action} changed {users} user(s)", extra={"guild_id": guild_id})
+
+    def batch_embed(self, title, description, ok=True):
+        return discord.Embed(title=title, description=description, color=discord.Color.green() if ok else discord.Color.red())
+
+    @app_commands.command(name="xpexport", description="Export this server's XP as a CSV or JSONL file.")
+    @app_commands.describe(format="File format")
+    @app_commands.choices(format=[
+        app_commands.Choice(name="csv", value="csv"),
+        app_commands.Choice(name="jsonl", value="jsonl")
+    ])
+    @app_commands.default_permissions(administrator=True)
+    async def xpexport(self, interaction: discord.Interaction, format: str = "csv"):
+        guild_id = str(interaction.guild.id)
+        debug_command("xpexport", interaction, format=format)
+        await interaction.response.defer(ephemeral=True, thinking=True)
+
+        # Written line by line, so a big guild never exists as one string
+        buffer = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+        rows = 0
+        for rows, line in enumerate(export_lines(self.xp_data.get(guild_id, {}), format, BASE_XP), start=1):
+            buffer.write(line.encode())
+            if rows % BATCH_SIZE == 0:
+                await asyncio.sleep(0)
+        buffer.seek(0)
+        users = rows - 1 if format == "csv" else rows
+
+        await interaction.followup.send(
+            embed=self.batch_embed("📤 XP Export", f"Exported **{users}** user(s)."),
+            file=discord.File(buffer, filename=f"xp-{guild_id}.{format}"),
+            ephemeral=True
+        )
+
+    @app_commands.command(name="xpimport", description="Import XP from a CSV or JSONL export (this bot's or another's).")
+    @app_commands.describe(file="CSV or JSONL with user_id plus level and xp, or total_xp", mode="merge: update listed users. replace: drop everyone else.")
+    @app_commands.choices(mode=[
+        app_commands.Choice(name="merge", value="merge"),
+        app_commands.Choice(name="replace", value="replace")
+    ])
+    @app_commands.default_permissions(administrator=True)
+    async def xpimport(self, interaction: discord.Interaction, file: discord.Attachment, mode: str = "merge"):
+        guild_id = str(interaction.guild.id)
+        debug_command("xpimport", interaction, file=file.filename, mode=mode)
+
+        if file.size > MAX_IMPORT_BYTES:
+            await interaction.response.send_message(
+                embed=self.batch_embed("❌ File Too Large", f"Imports are limited to {MAX_IMPORT_BYTES // 1048576} MB.", ok=False),
+                ephemeral=True
+            )
+            return
+        await interaction.response.defer(ephemeral=True, thinking=True)
+
+        fmt = "jsonl" if file.filename.lower().endswith((".jsonl", ".json")) else "csv"
+        try:
+            text = (await file.read()).decode("utf-8-sig")
+            entries = await run_async(parse_import(text, fmt, BASE_XP))
+        except BatchError as e:
+            errors = "\n".join(e.errors[:10])
+            await interaction.followup.send(
+                embed=self.batch_embed("❌ Import Rejected", f"Nothing was changed.\n```\n{errors}\n```", ok=False),
+                ephemeral=True
+            )
+            return
+        except UnicodeDecodeError:
+            await interaction.followup.send(embed=self.batch_embed("❌ Import Rejected", "The file isn't UTF-8 text.", ok=False), ephemeral=True)
+            return
+
+        # Validated in full first, then swapped in at once
+        self.xp_data[guild_id] = apply_import(self.xp_data.get(guild_id, {}), entries, replace=mode == "replace")
+        self.finish_batch(guild_id, f"import ({mode})", len(entries))
+
+        await interaction.followup.send(
+            embed=self.batch_embed("📥 XP Import", f"Imported **{len(entries)}** user(s) ({mode})."),
+            ephemeral=True
+        )
+
+    @app_commands.command(name="xpgrant", description="Give or take XP from everyone with a role.")
+    @app_commands.describe(role="Members with this role", amount="XP to give; negative takes it away")
+    @app_commands.default_permissions(administrator=True)
+    async def xpgrant(self, interaction: discord.Interaction, role: discord.Role, amount: int):
+        guild_id = str(interaction.guild.id)
+        debug_command("xpgrant", interaction, role=role.name, amount=amount)
+
+        if amount == 0:
+            await interaction.response.send_message(embed=self.batch_embed("❌ Invalid Value", "Amount can't be 0.", ok=False), ephemeral=True)
+            return
+        await interaction.response.defer(ephemeral=True, thinking=True)
+
+        user_ids = [str(member.id) for member in role.members if not member.bot]
+        changed = await run_async(grant(self.xp_data.setdefault(guild_id, {}), user_ids, amount, BASE_XP))
+        self.finish_batch(guild_id, f"grant {amount:+}", changed)
+
+        verb = "Gave" if amount > 0 else "Took"
+        await interaction.followup.send(
+            embed=self.batch_embed("🎁 XP Granted", f"{verb} **{abs(amount)} XP** {'to' if amount > 0 else 'from'} **{changed}** member(s) of {role.mention}."),
+            ephemeral=True
+        )
+
+    @app_commands.command(name="xpreset", description="Reset everyone's XP in this server, e.g. for a new season.")
+    @app_commands.describe(confirm="Set to True to really wipe all XP (export first if you want a copy)")
+    @app_commands.default_permissions(administrator=True)
+    async def xpreset(self, interaction: discord.Interaction, confirm: bool = False):
+        guild_id = str(interaction.guild.id)
+        debug_command("xpreset", interaction, confirm=confirm)
+
+        if not confirm:
+            await interaction.response.send_message(
+                embed=self.batch_embed("⚠️ Are You Sure?", "This wipes every member's XP and history. Run `/xpreset confirm:True` to go ahead.", ok=False),
+                ephemeral=True
+            )
+            return
+
+        guild_data = self.xp_data.get(guild_id, {})
+        users = sum(1 for key in guild_data if key != "config")
+        self.xp_data[guild_id] = reset(guild_data)
+        if self.history.pop(guild_id, None):
+            save_history(self.history)
+        self.finish_batch(guild_id, "reset", users)
+
+        await interaction.response.send_message(
+            embed=self.batch_embed("🧹 XP Reset", f"Cleared XP for **{users}** user(s). Settings were kept."),
+            ephemeral=True
+        )
+
 
 # --- Cog setup ---
 async def setup(bot):
@@ -0,0 +1,150 @@
+# launcher.py
+#
+# Runs the bot as several worker processes, each connecting a slice of the
+# shards, and restarts any worker that crashes. Run from the repo root:
+#
+#   python launcher.py --workers 4
+#   python launcher.py --workers 2 --shards 8
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import time
+import urllib.request
+
+from dotenv import load_dotenv
+
+RESET = "\033[0m"
+RED = "\033[31m"
+GREEN = "\033[32m"
+YELLOW = "\033[33m"
+CYAN = "\033[36m"
+
+GATEWAY_URL = "https://discord.com/api/v10/gateway/bot"
+IDENTIFY_INTERVAL = 5  # seconds Discord wants between identifies per concurrency bucket
+RESTART_BACKOFF = 5  # first restart delay; doubles on repeated crashes
+MAX_BACKOFF = 300
+STABLE_AFTER = 600  # a worker that ran this long gets its backoff reset
+
+
+def recommended_shards(token):
+    request = urllib.request.Request(GATEWAY_URL, headers={
+        "Authorization": f"Bot {token}",
+        "User-Agent": "DiscordBot (launcher, 1.0)"
+    })
+    with urllib.request.urlopen(request, timeout=10) as response:
+        data = json.load(response)
+    return data["shards"], data["session_start_limit"]["max_concurrency"]
+
+
+def split_shards(shard_count, workers):
+    # Round robin, so every worker gets a similar share of guilds
+    return [list(range(i, shard_count, workers)) for i in range(workers)]
+
+
+class Worker:
+    def __init__(self, number, shard_ids, shard_count):
+        self.number = number
+        self.shard_ids = shard_ids
+        self.shard_count = shard_count
+        self.process = None
+        self.started_at = 0
+        self.backoff = RESTART_BACKOFF
+        self.restart_at = None
+
+    def start(self):
+        env = dict(os.environ)
+        env["SHARD_COUNT"] = str(self.shard_count)
+        env["SHARD_IDS"] = ",".join(map(str, self.shard_ids))
+        # Each worker serves its own metrics endpoint on the next port up
+        env["METRICS_PORT"] = str(int(os.getenv("METRICS_PORT", "9108")) + self.number)
+        self.process = subprocess.Popen([sys.executable, "main.py"], env=env)
+        self.started_at = time.monotonic()
+        self.restart_at = None
+        print(f"{GREEN}[LAUNCHER] Worker {self.number} started (pid {self.process.pid}, shards {self.shard_ids}){RESET}")
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+
+
+def supervise(workers, stagger):
+    stopping = False
+
+    def request_stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+
+    # Stagger the first start so the workers don't all identify at once
+    for i, worker in enumerate(workers):
+        if i:
+            time.sleep(stagger * len(workers[i - 1].shard_ids))
+        if stopping:
+            break
+        worker.start()
+
+    while not stopping:
+        now = time.monotonic()
+        for worker in workers:
+            if worker.restart_at is not None:
+                if now >= worker.restart_at:
+                    worker.start()
+                continue
+
+            code = worker.process.poll()
+            if code is None:
+                continue
+            if code == 0:
+                print(f"{YELLOW}[LAUNCHER] Worker {worker.number} exited cleanly, not restarting{RESET}")
+                worker.restart_at = float("inf")
+                continue
+
+            if now - worker.started_at >= STABLE_AFTER:
+                worker.backoff = RESTART_BACKOFF
+            print(f"{RED}[LAUNCHER] Worker {worker.number} exited with {code}, restarting in {worker.backoff}s{RESET}")
+            worker.restart_at = now + worker.backoff
+            worker.backoff = min(worker.backoff * 2, MAX_BACKOFF)
+
+        if all(worker.restart_at == float("inf") for worker in workers):
+            break
+        time.sleep(1)
+
+    print(f"{CYAN}[LAUNCHER] Stopping workers...{RESET}")
+    for worker in workers:
+        worker.stop()
+    for worker in workers:
+        if worker.process:
+            try:
+                worker.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                worker.process.kill()
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run the bot across several sharded worker processes.")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WORKERS", "2")))
+    parser.add_argument("--shards", type=int, default=None, help="total shard count (default: Discord's recommendation)")
+    args = parser.parse_args()
+
+    concurrency = 1
+    shard_count = args.shards
+    if shard_count is None:
+        shard_count, concurrency = recommended_shards(os.getenv("TOKEN"))
+    workers = min(args.workers, shard_count)
+
+    print(f"{CYAN}[LAUNCHER] {shard_count} shard(s) across {workers} worker(s){RESET}")
+    supervise(
+        [Worker(i, shard_ids, shard_count) for i, shard_ids in enumerate(split_shards(shard_count, workers))],
+        stagger=IDENTIFY_INTERVAL / concurrency
+    )
+
+
+if __name__ == "__main__":
+    main()
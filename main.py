@@ -1,22 +1,32 @@
 import discord
 import os
+import asyncio
+import hashlib
+import json
+import logging
+import time
 from discord.ext import commands
 from dotenv import load_dotenv
 from datetime import datetime
+from utils.debug import get_logger, setup_logging, stop_logging
+from utils.metrics import timed
+from utils.outbound import Outbound
+from utils.scheduler import Scheduler
+from utils.snipe import SnipeStore
+from utils.storage import partition
 
 # Load environment variables
 load_dotenv()
 TOKEN = os.getenv("TOKEN")
+COMMAND_HASH_FILE = ".command_hash"
+STARTED_AT = time.perf_counter()
 
-RESET = "\033[0m"
-BLACK = "\033[30m"
-RED = "\033[31m"
-GREEN = "\033[32m"
-YELLOW = "\033[33m"
-BLUE = "\033[34m"
-MAGENTA = "\033[35m"
-CYAN = "\033[36m"
-WHITE = "\033[37m"
+# Sharding: leave both unset to let Discord pick the shard count and run them all here.
+# launcher.py sets them to split shards across worker processes.
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "0")) or None
+SHARD_IDS = [int(i) for i in os.getenv("SHARD_IDS", "").split(",") if i.strip()] or None
+
+log = get_logger("bot")
 
 
 # Intents
@@ -28,29 +38,110 @@ intents.guilds = True
 intents.voice_states = True
 
 # Bot Setup
-class JengBot(commands.Bot):
+class JengBot(commands.AutoShardedBot):
     def __init__(self):
-        super().__init__(command_prefix="!", intents=intents)
-        
-        
-        self.sniped_messages = {}
+        super().__init__(command_prefix="!", intents=intents, shard_count=SHARD_COUNT, shard_ids=SHARD_IDS)
+
+        # Per-guild state (music queues, snipes, timers) only ever sees this
+        # process's shards; files shared with other workers go through utils.storage
+        if SHARD_IDS is not None:
+            partition.configure(SHARD_IDS, SHARD_COUNT)
+
+        self.sniped_messages = SnipeStore()
+        # Single timer task shared by polls, events, etc.
+        self.scheduler = Scheduler()
+        # Rate-limit-aware queue for REST calls we make on our own (level-ups, welcomes, ...)
+        self.outbound = Outbound()
+
+        # Startup phase -> seconds, reported once the bot is ready
+        self.startup_timings = {}
+        self.ready_reported = False
+
+        # Cog listener -> its timed wrapper, so unloading a cog can find it again
+        self.listener_wrappers = {}
+
+    def add_listener(self, func, name=None):
+        # Every cog listener reports into the listener latency histogram
+        wrapped = timed(func.__qualname__)(func)
+        self.listener_wrappers[func] = wrapped
+        super().add_listener(wrapped, name or func.__name__)
+
+    def remove_listener(self, func, name=None):
+        super().remove_listener(self.listener_wrappers.pop(func, func), name or func.__name__)
 
     async def setup_hook(self):
-        # Load all cogs from the cogs/ directory
-        for filename in os.listdir("./cogs"):
-            if filename.endswith(".py"):
-                await self.load_extension(f"cogs.{filename[:-3]}")
+        self.startup_timings["init"] = time.perf_counter() - STARTED_AT
+        self.scheduler.start()
+
+        # Load all cogs from the cogs/ directory; they don't depend on each other
+        phase = time.perf_counter()
+        extensions = [f"cogs.{filename[:-3]}" for filename in sorted(os.listdir("./cogs")) if filename.endswith(".py")]
+        await asyncio.gather(*(self.timed_load(name) for name in extensions))
+        self.startup_timings["cogs"] = time.perf_counter() - phase
+
+        phase = time.perf_counter()
+        await self.sync_commands()
+        self.startup_timings["sync"] = time.perf_counter() - phase
+
+    async def timed_load(self, name):
+        start = time.perf_counter()
+        await self.load_extension(name)
+        self.startup_timings[name] = time.perf_counter() - start
+
+    def command_hash(self):
+        try:
+            payload = [command.to_dict(self.tree) for command in self.tree.get_commands()]
+        except TypeError:
+            # discord.py < 2.4 takes no tree argument
+            payload = [command.to_dict() for command in self.tree.get_commands()]
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+    async def sync_commands(self):
+        # Commands are global, so one worker syncing is enough
+        if SHARD_IDS is not None and 0 not in SHARD_IDS:
+            return
+
+        # Syncing is rate limited and slow, so only do it when the commands actually changed
+        current = self.command_hash()
+        previous = None
+        if os.path.exists(COMMAND_HASH_FILE):
+            with open(COMMAND_HASH_FILE, "r") as f:
+                previous = f.read().strip()
+
+        if current == previous:
+            log.info("Slash commands unchanged, skipping sync")
+            return
+
+        try:
+            await self.tree.sync()
+        except discord.HTTPException as e:
+            # Runs before login; a 429 or 5xx here shouldn't keep the bot offline.
+            # The hash isn't written, so the next start tries again.
+            log.error(f"Slash command sync failed: {e}")
+            return
+        with open(COMMAND_HASH_FILE, "w") as f:
+            f.write(current)
+        log.info("Slash commands synced globally")
 
-    
     async def on_ready(self):
         await self.change_presence(activity=discord.Activity(type=discord.ActivityType.listening, name="/help"))
-        print(f"{YELLOW}Logged in as {self.user}{RESET}")
-        print(f"{RED}Connected to:{RESET}")
-        print(f"{RED}Cogs Loaded: {list(bot.cogs.keys())}{RESET}")
-        for guild in self.guilds:
-            print(f"{BLUE} - {guild.name} ({guild.id}){RESET}")
-        await self.tree.sync()
-        print(f"{MAGENTA}Slash commands synced globally{RESET}")
+        log.info(f"Logged in as {self.user}", extra={
+            "shards": sorted(self.shards),
+            "shard_count": self.shard_count,
+            "guilds": len(self.guilds),
+            "cogs": list(self.cogs.keys())
+        })
+        if log.isEnabledFor(logging.DEBUG):
+            for guild in self.guilds:
+                log.debug(f"Connected to {guild.name}", extra={"guild_id": guild.id})
+
+        # on_ready fires again after every reconnect; only the first one is startup
+        if not self.ready_reported:
+            self.ready_reported = True
+            self.startup_timings["ready"] = time.perf_counter() - STARTED_AT
+            log.info("Startup timings", extra={
+                "timings_ms": {phase: round(seconds * 1000) for phase, seconds in self.startup_timings.items()}
+            })
 
 bot = JengBot()
 
@@ -59,13 +150,22 @@ async def on_message_delete(message):
     if message.author.bot:
         return
 
-    bot.sniped_messages[message.channel.id] = {
-        "content": message.content,
-        "author": message.author,
-        "time": message.created_at
-    }
+    bot.sniped_messages.add(message)
+
+@bot.event
+async def on_raw_bulk_message_delete(payload):
+    # Only messages still in the cache have content left to snipe
+    for message in payload.cached_messages:
+        if not message.author.bot:
+            bot.sniped_messages.add(message)
 
 
 
-print(f"🔒 Token: {TOKEN[:5]}********")
-bot.run(TOKEN)
+if __name__ == "__main__":
+    setup_logging()
+    log.info(f"Token: {TOKEN[:5]}********")
+    try:
+        # discord.py logs through our handler instead of installing its own
+        bot.run(TOKEN, log_handler=None)
+    finally:
+        stop_logging()
@@ -0,0 +1,106 @@
+# tests/test_polls.py
+#
+# Poll closing against the benchmark harness's fake Discord objects. Run
+# from the repo root:
+#
+#   python -m unittest tests.test_polls
+
+import asyncio
+import os
+import tempfile
+import unittest
+
+from benchmarks.harness import FakeChannel, FakeGuild, FakeInteraction, FakeMessage, FakeReactionPayload, make_bot
+from cogs.polls import PollView, result_bar
+from utils.coalesce import Coalescer
+from utils.outbound import Outbound
+from utils.persistence import writer
+
+
+class RecordingMessage(FakeMessage):
+    async def edit(self, **kwargs):
+        self.channel.edits.append(kwargs)
+
+
+class RecordingChannel(FakeChannel):
+    def __init__(self, guild):
+        super().__init__(guild)
+        self.edits = []
+
+    def get_partial_message(self, message_id):
+        return RecordingMessage(self, message_id=message_id)
+
+
+class VoteDuringCloseTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.cwd = os.getcwd()
+        self.tmp = tempfile.TemporaryDirectory()
+        os.chdir(self.tmp.name)  # polls.json is written relative to the working directory
+
+        self.guild = FakeGuild(3)
+        self.guild.channel = RecordingChannel(self.guild)
+        self.bot = make_bot([self.guild])
+        # One edit per 0.3 s, so the results edit has to wait in the queue behind a live one
+        self.bot.outbound = Outbound(route_limits={"edit": (1, 0.3)}, global_limit=None)
+        await self.bot.load_extension("cogs.polls")
+        self.cog = self.bot.get_cog("Polls")
+        self.cog.live_edits = Coalescer(0)
+
+    async def asyncTearDown(self):
+        await self.bot.unload_extension("cogs.polls")
+        self.bot.outbound.close()
+        writer.flush()
+        os.chdir(self.cwd)
+        self.tmp.cleanup()
+
+    def start(self, kind, options, **extra):
+        interaction = FakeInteraction(self.guild.members[0], self.guild)
+        record = self.cog.new_record(interaction, kind, "Lunch?", 60, options, live=True, **extra)
+        message = FakeMessage(self.guild.channel)
+        if kind != "reaction":
+            self.cog.views[str(message.id)] = PollView(self.cog, record)
+        self.cog.start_poll(message, record)
+        return str(message.id)
+
+    async def until(self, condition):
+        for _ in range(100):
+            if condition():
+                return
+            await asyncio.sleep(0.01)
+        self.fail("timed out")
+
+    async def close_with_queued_results(self, message_id):
+        # A live edit takes the route's only token...
+        await self.until(lambda: self.guild.channel.edits)
+        # ...so the results edit sits in the queue, where a newer edit could replace it
+        close = asyncio.create_task(self.cog.close_poll(message_id))
+        await self.until(lambda: self.bot.outbound.queued() == 1)
+        return close
+
+    async def test_reaction_vote_during_close(self):
+        message_id = self.start("reaction", [("Pizza", "🍕"), ("Tacos", "🌮")])
+        members = self.guild.members
+        await self.cog.on_raw_reaction_add(FakeReactionPayload(int(message_id), members[0], "🍕"))
+
+        close = await self.close_with_queued_results(message_id)
+        await self.cog.on_raw_reaction_add(FakeReactionPayload(int(message_id), members[1], "🌮"))
+        await asyncio.sleep(0.05)
+        await close
+
+        final = self.guild.channel.edits[-1]
+        self.assertEqual(final["embed"].title, "📊 Poll Results")
+        self.assertNotIn(message_id, self.cog.polls)
+
+    async def test_component_vote_during_close(self):
+        message_id = self.start("buttons", [("Pizza", None), ("Tacos", None)], votes={})
+        self.cog.component_vote(message_id, self.guild.members[0].id, 0)
+
+        close = await self.close_with_queued_results(message_id)
+        reply = self.cog.component_vote(message_id, self.guild.members[1].id, 1)
+        await close
+
+        self.assertEqual(reply, "❌ This poll has already closed.")
+        final = self.guild.channel.edits[-1]
+        self.assertEqual(final["embed"].title, "📊 Poll Results")
+        self.assertIsNone(final["view"])  # Buttons stripped
+        self.assertTrue(final["embed"].fields[1].value.startswith(result_bar(0, 1)))
@@ -0,0 +1,45 @@
+# utils/coalesce.py
+
+import asyncio
+
+from utils.debug import get_logger
+
+log = get_logger("coalesce")
+
+
+class Coalescer:
+    """Runs at most one callback per key every ``interval`` seconds.
+
+    Requests that arrive while a key is cooling down replace each other, so
+    only the most recent one runs once the interval is up.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self._pending = {}  # key -> latest callback
+        self._tasks = {}    # key -> drain task
+
+    def request(self, key, callback):
+        self._pending[key] = callback
+        if key not in self._tasks:
+            self._tasks[key] = asyncio.create_task(self._drain(key))
+
+    def cancel(self, key):
+        self._pending.pop(key, None)
+        task = self._tasks.pop(key, None)
+        if task:
+            task.cancel()
+
+    async def _drain(self, key):
+        try:
+            while key in self._pending:
+                callback = self._pending.pop(key)
+                try:
+                    await callback()
+                except Exception:
+                    log.exception(f"Update for {key} failed")
+                # Hold the slot so bursts collapse into the next run
+                await asyncio.sleep(self.interval)
+        finally:
+            if self._tasks.get(key) is asyncio.current_task():
+                del self._tasks[key]
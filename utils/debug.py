@@ -1,8 +1,175 @@
 # utils/debug.py
+#
+# Logging for the whole bot. Records are handed to a queue on the calling
+# thread and formatted/written by a listener thread, so a slow stdout never
+# stalls the event loop. Configured from the environment:
+#
+#   LOG_FORMAT=json|console        json lines (default) or coloured console output
+#   LOG_LEVEL=INFO                 level for everything not listed below
+#   LOG_LEVELS=xp=WARNING,gpt=DEBUG,discord=WARNING
+#   LOG_SAMPLING=xp=0.1,commands=0.5   fraction of sub-WARNING records kept
 
-def debug_command(command_name, user, **kwargs):
-    print(f"\033[1;32m[COMMAND] /{command_name}\033[0m triggered by \033[1;33m{user.display_name}\033[0m")
-    if kwargs:
-        print("\033[1;36mInput:\033[0m")
-        for key, value in kwargs.items():
-            print(f"\033[1;31m  {key.capitalize()}: {value}\033[0m")
+import copy
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+RESET = "\033[0m"
+RED = "\033[31m"
+GREEN = "\033[32m"
+YELLOW = "\033[33m"
+BLUE = "\033[34m"
+CYAN = "\033[36m"
+BOLD = "\033[1m"
+
+ROOT = "jeng"
+LEVEL_COLORS = {
+    logging.DEBUG: BLUE,
+    logging.INFO: GREEN,
+    logging.WARNING: YELLOW,
+    logging.ERROR: RED,
+    logging.CRITICAL: BOLD + RED
+}
+
+# Attributes every LogRecord has; anything else came in through ``extra``
+_STANDARD = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+_listener = None
+
+
+def get_logger(subsystem):
+    return logging.getLogger(f"{ROOT}.{subsystem}")
+
+
+def subsystem_of(name):
+    return name[len(ROOT) + 1:] if name.startswith(ROOT + ".") else name
+
+
+def extra_fields(record):
+    return {key: value for key, value in vars(record).items() if key not in _STANDARD}
+
+
+def parse_pairs(text):
+    pairs = {}
+    for item in text.split(","):
+        if "=" in item:
+            key, value = item.split("=", 1)
+            pairs[key.strip()] = value.strip()
+    return pairs
+
+
+# --- Formatters ---
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "subsystem": subsystem_of(record.name),
+            "msg": record.getMessage()
+        }
+        entry.update(extra_fields(record))
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class ColorFormatter(logging.Formatter):
+    def format(self, record):
+        color = LEVEL_COLORS.get(record.levelno, "")
+        stamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+        line = f"{stamp} {color}{record.levelname:<7}{RESET} {CYAN}[{subsystem_of(record.name)}]{RESET} {record.getMessage()}"
+        fields = extra_fields(record)
+        if fields:
+            line += " " + " ".join(f"{YELLOW}{key}{RESET}={value}" for key, value in fields.items())
+        if record.exc_text:
+            line += "\n" + record.exc_text
+        return line
+
+
+# --- Handlers ---
+class SamplingFilter(logging.Filter):
+    """Keeps a random fraction of routine records per subsystem.
+
+    WARNING and above always get through.
+    """
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates  # subsystem -> fraction kept
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(subsystem_of(record.name))
+        return rate is None or random.random() < rate
+
+
+class LoopSafeQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Only resolve what can't cross threads; formatting happens on the listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def setup_logging():
+    """Route every logger (ours and discord.py's) through one background writer."""
+    global _listener
+    if _listener is not None:
+        return
+
+    formatter = ColorFormatter() if os.getenv("LOG_FORMAT", "json") == "console" else JsonFormatter()
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(formatter)
+
+    records = queue.SimpleQueue()
+    handler = LoopSafeQueueHandler(records)
+    rates = {name: float(rate) for name, rate in parse_pairs(os.getenv("LOG_SAMPLING", "")).items()}
+    if rates:
+        handler.addFilter(SamplingFilter(rates))
+
+    root = logging.getLogger()
+    root.handlers[:] = [handler]
+    root.setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+
+    # Levels are set on the loggers themselves so disabled calls cost almost nothing
+    for name, level in parse_pairs(os.getenv("LOG_LEVELS", "")).items():
+        logging.getLogger(name if name == "discord" or name.startswith("discord.") else f"{ROOT}.{name}").setLevel(level.upper())
+
+    _listener = QueueListener(records, stream, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging():
+    global _listener
+    if _listener is not None:
+        _listener.stop()  # Flushes whatever is still queued
+        _listener = None
+
+
+# --- Commands ---
+command_log = get_logger("commands")
+
+
+def debug_command(command_name, interaction, **kwargs):
+    if not command_log.isEnabledFor(logging.INFO):
+        return
+    user = interaction.user
+    command_log.info(f"/{command_name} by {user.display_name}", extra={
+        "command": command_name,
+        "user_id": user.id,
+        "guild_id": interaction.guild_id,
+        # Time from Discord creating the interaction to our handler running
+        "latency_ms": round((datetime.now(timezone.utc) - interaction.created_at).total_seconds() * 1000, 1),
+        "options": {key: str(value) for key, value in kwargs.items()}
+    })
@@ -0,0 +1,142 @@
+# utils/metrics.py
+
+import bisect
+import functools
+import math
+import time
+
+# Upper bounds in seconds; Prometheus adds +Inf itself
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+class Histogram:
+    """Prometheus-style histogram with one series per label set."""
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}  # label values -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value, *label_values):
+        series = self.series.get(label_values)
+        if series is None:
+            series = self.series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+        # Buckets are stored non-cumulatively and summed up when exported
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def count(self, label_values):
+        return sum(self.series[label_values][:-1])
+
+    def quantile(self, q, label_values):
+        """Estimate a quantile by interpolating inside the bucket it falls in."""
+        series = self.series.get(label_values)
+        if not series:
+            return None
+        counts = series[:-1]
+        rank = q * sum(counts)
+        seen = 0
+        for i, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i else 0.0
+                if i == len(self.buckets):
+                    return lower  # Past the last bound, the best we know is "at least"
+                return lower + (self.buckets[i] - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return None
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, series in sorted(self.series.items()):
+            base = ",".join(f'{key}="{escape(value)}"' for key, value in zip(self.labels, label_values))
+            prefix = base + "," if base else ""
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), series[:-1]):
+                cumulative += bucket_count
+                le = "+Inf" if bound == math.inf else repr(bound)
+                lines.append(f'{self.name}_bucket{{{prefix}le="{le}"}} {cumulative}')
+            labels = f"{{{base}}}" if base else ""
+            lines.append(f"{self.name}_sum{labels} {format_number(series[-1])}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self.histograms = {}
+        self.gauges = {}  # name -> (help text, callable returning a number, metric type)
+
+    def histogram(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        if name not in self.histograms:
+            self.histograms[name] = Histogram(name, help_text, labels, buckets)
+        return self.histograms[name]
+
+    def gauge(self, name, help_text, func):
+        self.gauges[name] = (help_text, func, "gauge")
+
+    def counter(self, name, help_text, func):
+        """Like gauge(), for a value that only goes up; Prometheus rate() needs the type."""
+        self.gauges[name] = (help_text, func, "counter")
+
+    def render(self):
+        lines = []
+        for histogram in self.histograms.values():
+            lines.extend(histogram.render())
+        for name, (help_text, func, kind) in self.gauges.items():
+            try:
+                value = func()
+            except Exception:
+                continue  # A broken gauge shouldn't take the whole scrape down
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {format_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+def format_number(value):
+    if isinstance(value, float):
+        if math.isnan(value):
+            return "NaN"
+        if math.isinf(value):
+            return "+Inf" if value > 0 else "-Inf"
+    return repr(value)
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metrics = Registry()
+
+command_seconds = metrics.histogram(
+    "jeng_command_seconds", "Time from an interaction being created to its command finishing.",
+    labels=("command", "status")
+)
+listener_seconds = metrics.histogram(
+    "jeng_listener_seconds", "Time spent inside event listeners.",
+    labels=("listener",)
+)
+loop_lag_seconds = metrics.histogram(
+    "jeng_event_loop_lag_seconds", "How late the event loop woke a sleeping task.",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1)
+)
+outbound_wait_seconds = metrics.histogram(
+    "jeng_outbound_wait_seconds", "Time outbound REST calls spent queued behind rate limits.",
+    labels=("priority",), buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+)
+
+
+def timed(name, histogram=listener_seconds):
+    """Decorator that records how long an async function takes."""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, name)
+        return wrapper
+    return decorator
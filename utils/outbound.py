@@ -0,0 +1,245 @@
+# utils/outbound.py
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections import Counter
+
+import discord
+
+from utils.debug import get_logger
+from utils.metrics import outbound_wait_seconds
+
+log = get_logger("outbound")
+
+# Lower runs first
+PRIORITY_INTERACTION = 0  # work a user is waiting on right now (poll reactions, command replies)
+PRIORITY_NORMAL = 1       # edits, welcomes, channel reminders
+PRIORITY_BULK = 2         # level-ups, /spam, reminder DMs; first to wait and first to be dropped
+PRIORITY_NAMES = {PRIORITY_INTERACTION: "interaction", PRIORITY_NORMAL: "normal", PRIORITY_BULK: "bulk"}
+
+# (requests, per seconds) for one route, mirroring Discord's per-route buckets
+ROUTE_LIMITS = {
+    "send": (5, 5.0),       # POST /channels/{id}/messages
+    "edit": (5, 5.0),       # PATCH /channels/{id}/messages/{id}
+    "reaction": (1, 0.25),  # PUT /channels/{id}/messages/{id}/reactions/...
+    "roles": (10, 10.0)     # PUT /guilds/{id}/members/{id}/roles/{id}
+}
+GLOBAL_LIMIT = (50, 1.0)  # Discord's global limit per bot token
+BULK_RESERVE = 10  # global tokens bulk jobs leave free for interaction responses, which bypass the queue
+BULK_QUEUE_LIMIT = 10  # bulk jobs waiting on one route before new ones are dropped
+
+
+class TokenBucket:
+    def __init__(self, capacity, per):
+        self.capacity = capacity
+        self.rate = capacity / per
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now, reserve=0):
+        """Seconds until a token is free with ``reserve`` tokens left over."""
+        self.refill(now)
+        missing = 1 + reserve - self.tokens
+        return max(0.0, missing / self.rate)
+
+    def take(self):
+        self.tokens -= 1
+
+    def drain(self):
+        # Discord said 429; whatever we thought was left isn't
+        self.tokens = min(self.tokens, 0.0)
+
+
+class Job:
+    __slots__ = ("priority", "seq", "route", "call", "key", "future", "queued_at")
+
+    def __init__(self, priority, seq, route, call, key):
+        self.priority = priority
+        self.seq = seq
+        self.route = route
+        self.call = call  # zero-argument coroutine function
+        self.key = key
+        self.future = asyncio.get_running_loop().create_future()
+        self.queued_at = time.monotonic()
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class Outbound:
+    """Paces every REST call the bot makes on its own initiative.
+
+    Each route (``("send", channel_id)``, ``("roles", guild_id)``, ...) has
+    a token bucket shaped like Discord's, and all routes share a global one.
+    Whenever a token frees up, the best-priority job that can use it goes
+    next. Edits to the same message that haven't gone out yet collapse into
+    the newest one, and bulk jobs are dropped once a route is backed up, so
+    a burst degrades into fewer messages instead of a wall of 429s.
+
+    Interaction responses are never queued: they have their own limits and
+    a 3 second deadline. Bulk jobs just leave them some global headroom.
+    """
+
+    def __init__(self, route_limits=ROUTE_LIMITS, global_limit=GLOBAL_LIMIT):
+        self.route_limits = route_limits  # kinds without an entry aren't paced
+        self.global_bucket = TokenBucket(*global_limit) if global_limit else None
+        self._queues = {}   # route -> heap of jobs
+        self._buckets = {}  # route -> TokenBucket
+        self._keyed = {}    # coalescing key -> job still in the queue
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._in_flight = set()
+        self.stats = Counter()
+
+    # --- Submitting ---
+    def submit(self, route, call, priority=PRIORITY_NORMAL, key=None):
+        """Queue ``call()`` on ``route`` and return a future for its result.
+
+        Jobs with the same ``key`` replace each other until one is sent; every
+        caller gets that one's result. Dropped bulk jobs resolve to ``None``.
+        """
+        if key is not None and key in self._keyed:
+            job = self._keyed[key]
+            job.call = call
+            job.priority = min(job.priority, priority)
+            heapq.heapify(self._queues[job.route])
+            self.stats["coalesced"] += 1
+            return job.future
+
+        queue = self._queues.setdefault(route, [])
+        if priority >= PRIORITY_BULK and sum(job.priority >= PRIORITY_BULK for job in queue) >= BULK_QUEUE_LIMIT:
+            self.stats["dropped"] += 1
+            log.debug(f"Dropped bulk job on {route}", extra={"queued": len(queue)})
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(None)
+            return future
+
+        job = Job(priority, next(self._counter), route, call, key)
+        heapq.heappush(queue, job)
+        if key is not None:
+            self._keyed[key] = job
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="outbound")
+        self._wakeup.set()
+        return job.future
+
+    def send(self, channel, priority=PRIORITY_NORMAL, **kwargs):
+        return self.submit(("send", channel.id), lambda: channel.send(**kwargs), priority)
+
+    def edit(self, message, priority=PRIORITY_NORMAL, **kwargs):
+        channel_id = message.channel.id
+        return self.submit(("edit", channel_id), lambda: message.edit(**kwargs), priority, key=("edit", message.id))
+
+    def add_reaction(self, message, emoji, priority=PRIORITY_INTERACTION):
+        return self.submit(("reaction", message.channel.id), lambda: message.add_reaction(emoji), priority)
+
+    def add_roles(self, member, *roles, priority=PRIORITY_NORMAL):
+        return self.submit(("roles", member.guild.id), lambda: member.add_roles(*roles), priority)
+
+    # --- Introspection ---
+    def queued(self, priority=None):
+        return sum(
+            1 for queue in self._queues.values() for job in queue
+            if priority is None or job.priority == priority
+        )
+
+    def in_flight(self):
+        return len(self._in_flight)
+
+    def close(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        for queue in self._queues.values():
+            for job in queue:
+                job.future.cancel()
+        self._queues.clear()
+        self._keyed.clear()
+
+    # --- Dispatching ---
+    def bucket(self, route):
+        bucket = self._buckets.get(route)
+        if bucket is None and route[0] in self.route_limits:
+            bucket = self._buckets[route] = TokenBucket(*self.route_limits[route[0]])
+        return bucket
+
+    def next_job(self, now):
+        """The best job that can go right now, else seconds until one might."""
+        best = None
+        wait = None
+        for route, queue in list(self._queues.items()):
+            if not queue:
+                del self._queues[route]
+                bucket = self._buckets.get(route)
+                if bucket and bucket.delay(now, bucket.capacity - 1) == 0:
+                    del self._buckets[route]  # Full again, nothing to remember
+                continue
+            job = queue[0]
+            bucket = self.bucket(route)
+            delay = bucket.delay(now) if bucket else 0.0
+            if self.global_bucket:
+                reserve = BULK_RESERVE if job.priority >= PRIORITY_BULK else 0
+                delay = max(delay, self.global_bucket.delay(now, reserve))
+            if delay == 0:
+                if best is None or job < best:
+                    best = job
+            elif wait is None or delay < wait:
+                wait = delay
+        return best, wait
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            job, wait = self.next_job(now)
+            if job is None:
+                if not self._queues:
+                    wait = None
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            heapq.heappop(self._queues[job.route])
+            if job.key is not None:
+                self._keyed.pop(job.key, None)
+            bucket = self.bucket(job.route)
+            if bucket:
+                bucket.take()
+            if self.global_bucket:
+                self.global_bucket.take()
+            outbound_wait_seconds.observe(now - job.queued_at, PRIORITY_NAMES.get(job.priority, str(job.priority)))
+
+            # Calls run concurrently; the buckets already decided they may go
+            task = asyncio.create_task(self._call(job))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _call(self, job):
+        if job.future.cancelled():
+            return
+        try:
+            result = await job.call()
+        except Exception as e:
+            if isinstance(e, discord.HTTPException) and e.status == 429:
+                self.stats["rate_limited"] += 1
+                bucket = self.bucket(job.route)
+                if bucket:
+                    bucket.drain()
+            if not job.future.cancelled():
+                job.future.set_exception(e)
+                # Fire-and-forget callers never look at the future, so log it here
+                job.future.exception()
+                log.warning(f"Outbound call on {job.route} failed: {e}")
+            return
+        self.stats["sent"] += 1
+        if not job.future.cancelled():
+            job.future.set_result(result)
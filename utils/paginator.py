@@ -0,0 +1,89 @@
+# utils/paginator.py
+
+import math
+from collections import OrderedDict
+
+import discord
+from discord import ui, Interaction
+
+
+class ListPageSource:
+    """Pages over a snapshot of ``entries``, rendered only when shown.
+
+    The entries are copied into a tuple up front so later changes to the
+    live data can't shift pages under someone mid-scroll.
+    """
+
+    def __init__(self, entries, formatter, per_page=5):
+        self.entries = tuple(entries)
+        self.formatter = formatter  # (entries on page, page index, page count) -> Embed
+        self.per_page = per_page
+
+    def page_count(self):
+        return max(1, math.ceil(len(self.entries) / self.per_page))
+
+    def format_page(self, index):
+        start = index * self.per_page
+        return self.formatter(self.entries[start:start + self.per_page], index, self.page_count())
+
+
+class EmbedPageSource:
+    """Pages that are already built, e.g. static help embeds."""
+
+    def __init__(self, embeds):
+        self.embeds = embeds
+
+    def page_count(self):
+        return len(self.embeds)
+
+    def format_page(self, index):
+        return self.embeds[index]
+
+
+class Paginator(ui.View):
+    def __init__(self, source, timeout=60, cache_size=4):
+        super().__init__(timeout=timeout)
+        self.source = source
+        self.page = 0
+        self.max_pages = source.page_count()
+        self.cache = OrderedDict()
+        self.cache_size = cache_size
+        # Set one of these after sending so the buttons can be disabled on timeout
+        self.message = None
+        self.interaction = None
+
+    def get_embed(self):
+        embed = self.cache.get(self.page)
+        if embed is None:
+            embed = self.cache[self.page] = self.source.format_page(self.page)
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        else:
+            self.cache.move_to_end(self.page)
+        return embed
+
+    async def show(self, interaction: Interaction, page):
+        if 0 <= page < self.max_pages:
+            self.page = page
+            await interaction.response.edit_message(embed=self.get_embed(), view=self)
+        else:
+            await interaction.response.defer()
+
+    @ui.button(label="⬅️ Prev", style=discord.ButtonStyle.blurple)
+    async def prev(self, interaction: Interaction, button: ui.Button):
+        await self.show(interaction, self.page - 1)
+
+    @ui.button(label="➡️ Next", style=discord.ButtonStyle.blurple)
+    async def next(self, interaction: Interaction, button: ui.Button):
+        await self.show(interaction, self.page + 1)
+
+    async def on_timeout(self):
+        for item in self.children:
+            item.disabled = True
+        try:
+            if self.message:
+                await self.message.edit(view=self)
+            elif self.interaction:
+                await self.interaction.edit_original_response(view=self)
+        except discord.HTTPException:
+            pass  # Message deleted or interaction token expired
@@ -0,0 +1,163 @@
+# utils/persistence.py
+
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from utils.debug import get_logger
+
+try:
+    import orjson
+except ImportError:  # Optional; the stdlib is just slower and a little bigger
+    orjson = None
+
+BACKUP_COUNT = 3  # rolling copies kept next to each file: name.json.bak1 (newest) .. bakN
+BACKUP_INTERVAL = 600  # seconds; a file saved every message shouldn't rotate every message
+
+log = get_logger("persistence")
+
+
+# --- Serialising ---
+def dumps(data):
+    """Compact JSON as bytes."""
+    if orjson is not None:
+        # Keys are already strings everywhere, except quote IDs, which this converts
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def loads(payload):
+    if orjson is not None:
+        return orjson.loads(payload)
+    return json.loads(payload)
+
+
+# --- Files ---
+def backup_path(path, n):
+    return f"{path}.bak{n}"
+
+
+def rotate_backups(path):
+    if not os.path.exists(path):
+        return
+    newest = backup_path(path, 1)
+    if os.path.exists(newest) and time.time() - os.path.getmtime(newest) < BACKUP_INTERVAL:
+        return
+    for n in range(BACKUP_COUNT, 1, -1):
+        if os.path.exists(backup_path(path, n - 1)):
+            os.replace(backup_path(path, n - 1), backup_path(path, n))
+    # A hard link keeps the old contents once the new file is swapped in, without copying
+    try:
+        os.link(path, newest)
+    except OSError:
+        with open(path, "rb") as src, open(newest, "wb") as dst:
+            dst.write(src.read())
+
+
+def atomic_write(path, payload):
+    """Replace ``path`` with ``payload`` so a crash leaves either the old file or the new one."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(payload)
+        f.flush()
+        os.fsync(f.fileno())
+    rotate_backups(path)
+    os.replace(tmp_path, path)
+    # The rename itself only survives a power cut once the directory is synced
+    if hasattr(os, "O_DIRECTORY"):
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+def read_json(path):
+    """Load ``path``, falling back to its newest readable backup.
+
+    A missing file is an empty one. A corrupt file is moved aside rather
+    than treated as empty, so the next save can't overwrite what's left.
+    """
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "rb") as f:
+            return loads(f.read())
+    except ValueError as e:
+        corrupt = f"{path}.corrupt-{int(time.time())}"
+        log.error(f"{path} is unreadable ({e}), moved it to {corrupt}")
+        os.replace(path, corrupt)
+
+    for n in range(1, BACKUP_COUNT + 1):
+        try:
+            with open(backup_path(path, n), "rb") as f:
+                data = loads(f.read())
+        except (OSError, ValueError):
+            continue
+        log.warning(f"Restored {path} from {backup_path(path, n)}")
+        return data
+    log.error(f"No usable backup of {path}, starting empty")
+    return {}
+
+
+# --- Writer thread ---
+class Writer:
+    """One background thread that does every file write for the process.
+
+    Jobs are keyed by path and the newest job for a path replaces one that
+    hasn't started yet, so a file saved on every message is written as
+    often as the disk keeps up and no more often.
+    """
+
+    def __init__(self):
+        self._pending = {}  # path -> (job, future)
+        self._order = queue.SimpleQueue()  # paths, in the order they first became pending
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._busy = 0
+        self._thread = None
+
+    def submit(self, path, job):
+        """Run ``job()`` on the writer thread; returns a concurrent Future."""
+        with self._lock:
+            previous = self._pending.get(path)
+            if previous:
+                future = previous[1]  # Whoever waited on the old job gets the new one's result
+            else:
+                future = Future()
+                self._order.put(path)
+            self._pending[path] = (job, future)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="persistence", daemon=True)
+                self._thread.start()
+        return future
+
+    def flush(self, timeout=None):
+        """Block until everything submitted so far is on disk."""
+        with self._idle:
+            return self._idle.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def _run(self):
+        while True:
+            path = self._order.get()
+            with self._lock:
+                job, future = self._pending.pop(path)
+                self._busy += 1
+            try:
+                future.set_result(job())
+            except Exception as e:
+                log.exception(f"Writing {path} failed")
+                future.set_exception(e)
+            finally:
+                with self._idle:
+                    self._busy -= 1
+                    self._idle.notify_all()
+
+
+writer = Writer()
+# Daemon threads die with the interpreter; make sure queued saves land first
+atexit.register(writer.flush)
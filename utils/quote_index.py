@@ -0,0 +1,101 @@
+# utils/quote_index.py
+
+import heapq
+import math
+import re
+from collections import defaultdict
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+# "quote text - Author", also with an em dash or tilde
+AUTHOR_RE = re.compile(r"\s[-—~]\s*([^-—~]+?)\s*$")
+
+# BM25 tuning
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text.lower())
+
+
+def quote_author(text):
+    match = AUTHOR_RE.search(text)
+    return match.group(1).strip().lower() if match else None
+
+
+class QuoteIndex:
+    """Inverted index over one guild's quotes, ranked with BM25.
+
+    Documents are added and removed one at a time, so the index never has
+    to be rebuilt when quotes change.
+    """
+
+    def __init__(self):
+        self.postings = defaultdict(dict)  # term -> {doc_id: term frequency}
+        self.lengths = {}                  # doc_id -> token count
+        self.authors = defaultdict(set)    # author -> {doc_id}
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, doc_id, text):
+        tokens = tokenize(text)
+        for token in tokens:
+            postings = self.postings[token]
+            postings[doc_id] = postings.get(doc_id, 0) + 1
+        self.lengths[doc_id] = len(tokens)
+        self.total_length += len(tokens)
+
+        author = quote_author(text)
+        if author:
+            self.authors[author].add(doc_id)
+
+    def remove(self, doc_id, text):
+        if doc_id not in self.lengths:
+            return
+        for token in set(tokenize(text)):
+            postings = self.postings.get(token)
+            if postings is not None:
+                postings.pop(doc_id, None)
+                if not postings:
+                    del self.postings[token]
+        self.total_length -= self.lengths.pop(doc_id)
+
+        author = quote_author(text)
+        if author and author in self.authors:
+            self.authors[author].discard(doc_id)
+            if not self.authors[author]:
+                del self.authors[author]
+
+    def search(self, query, author=None, limit=10):
+        """Return up to ``limit`` (doc_id, score) pairs, best first."""
+        allowed = None
+        if author:
+            author = author.lower().strip()
+            allowed = set()
+            for name, doc_ids in self.authors.items():
+                if author in name:
+                    allowed |= doc_ids
+
+        terms = set(tokenize(query or ""))
+        if not terms:
+            # Author-only search: newest quotes first
+            return [(doc_id, 0.0) for doc_id in heapq.nlargest(limit, allowed or ())]
+
+        doc_count = len(self.lengths)
+        avg_length = self.total_length / doc_count if doc_count else 0
+        scores = defaultdict(float)
+
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                norm = K1 * (1 - B + B * self.lengths[doc_id] / avg_length) if avg_length else K1
+                scores[doc_id] += idf * tf * (K1 + 1) / (tf + norm)
+
+        return heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
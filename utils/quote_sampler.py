@@ -0,0 +1,128 @@
+# utils/quote_sampler.py
+
+import random
+from array import array
+
+
+class ShuffleSampler:
+    """Hands out every quote once, in random order, before any repeats.
+
+    ``order`` is a permutation of quote IDs split by ``cursor``: everything
+    before it has been shown this cycle. Each draw does one Fisher-Yates
+    step, so the shuffle happens lazily and adds/deletes are O(1).
+    """
+
+    def __init__(self, quote_ids=()):
+        self.order = array("q")
+        self.pos = array("q")  # quote_id -> index in order, -1 if absent
+        self.cursor = 0
+        for quote_id in quote_ids:
+            self.add(quote_id)
+
+    def __len__(self):
+        return len(self.order)
+
+    def _swap(self, i, j):
+        a, b = self.order[i], self.order[j]
+        self.order[i], self.order[j] = b, a
+        self.pos[a], self.pos[b] = j, i
+
+    def add(self, quote_id):
+        if quote_id >= len(self.pos):
+            self.pos.extend([-1] * (quote_id + 1 - len(self.pos)))
+        # Lands in the unseen part, so new quotes can come up this cycle
+        self.pos[quote_id] = len(self.order)
+        self.order.append(quote_id)
+
+    def remove(self, quote_id):
+        if quote_id >= len(self.pos) or self.pos[quote_id] < 0:
+            return
+        index = self.pos[quote_id]
+        if index < self.cursor:
+            # Pull it to the edge of the seen part, then shrink that part
+            self._swap(index, self.cursor - 1)
+            self.cursor -= 1
+            index = self.cursor
+        self._swap(index, len(self.order) - 1)
+        self.order.pop()
+        self.pos[quote_id] = -1
+
+    def next(self):
+        if not self.order:
+            return None
+        if self.cursor >= len(self.order):
+            self.cursor = 0  # New cycle
+        pick = random.randrange(self.cursor, len(self.order))
+        self._swap(self.cursor, pick)
+        self.cursor += 1
+        return self.order[self.cursor - 1]
+
+
+class FenwickSampler:
+    """Weighted random choice over quote IDs using a Fenwick (binary indexed) tree.
+
+    Setting a weight and drawing are both O(log n).
+    """
+
+    def __init__(self):
+        self.tree = [0.0]
+        self.weights = [0.0]
+
+    def _grow(self, size):
+        capacity = len(self.weights) - 1
+        while capacity < size:
+            capacity = max(1, capacity * 2)
+        weights = self.weights + [0.0] * (capacity + 1 - len(self.weights))
+        # Rebuild in O(n) at the new size
+        tree = weights[:]
+        for i in range(1, capacity + 1):
+            parent = i + (i & -i)
+            if parent <= capacity:
+                tree[parent] += tree[i]
+        self.weights, self.tree = weights, tree
+
+    def set(self, quote_id, weight):
+        index = quote_id + 1
+        if index >= len(self.weights):
+            self._grow(index)
+        delta = weight - self.weights[index]
+        self.weights[index] = weight
+        while index < len(self.tree):
+            self.tree[index] += delta
+            index += index & -index
+
+    def remove(self, quote_id):
+        if quote_id + 1 < len(self.weights):
+            self.set(quote_id, 0.0)
+
+    def total(self):
+        total, index = 0.0, len(self.tree) - 1
+        while index > 0:
+            total += self.tree[index]
+            index -= index & -index
+        return total
+
+    def next(self):
+        total = self.total()
+        if total <= 0:
+            return None
+        target = random.random() * total
+        index, step = 0, 1 << (len(self.tree) - 1).bit_length()
+        while step:
+            nxt = index + step
+            if nxt < len(self.tree) and self.tree[nxt] <= target:
+                index = nxt
+                target -= self.tree[nxt]
+            step >>= 1
+        # Float drift can land on an empty slot: take the next live one, or
+        # the last live one if there is nothing after it
+        slot = index + 1
+        while slot < len(self.weights) and self.weights[slot] <= 0:
+            slot += 1
+        if slot == len(self.weights):
+            slot = min(index, len(self.weights) - 1)
+            while slot > 0 and self.weights[slot] <= 0:
+                slot -= 1
+            if slot == 0:
+                return None  # Only rounding error left in the tree
+        return slot - 1
@@ -0,0 +1,196 @@
+# utils/quote_store.py
+
+import json
+import os
+
+from utils.persistence import atomic_write, dumps, read_json, writer
+from utils.storage import file_lock, partition
+
+COMPACT_EVERY = 1000  # minimum log entries written before folding them into the snapshot
+
+
+def trim_log(path, covered):
+    """Drop the first ``covered`` bytes of the log, which the snapshot now holds."""
+    if not os.path.exists(path):
+        return
+    if os.path.getsize(path) == covered:
+        os.truncate(path, 0)  # Nothing appended since the snapshot was taken
+        return
+    # Entries appended meanwhile aren't in the snapshot, so they move to a fresh log.
+    # Open append handles notice the swap on their next write.
+    with open(path, "rb") as f:
+        f.seek(covered)
+        tail = f.read()
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(tail)
+        f.flush()
+        os.fsync(f.fileno())
+    try:
+        os.replace(tmp_path, path)
+    except OSError:
+        # Windows won't replace a file that is open; replaying it whole again is harmless
+        os.remove(tmp_path)
+
+
+class QuoteStore:
+    """Quotes per guild with stable IDs, saved as a snapshot plus an append-only log.
+
+    Every change appends one line to the log instead of rewriting the whole
+    file; once the log grows past COMPACT_EVERY lines it is folded back into
+    the snapshot. Loading reads the snapshot and replays the log on top.
+
+    The threshold also scales with the number of quotes, so the cost of
+    compaction stays O(1) amortised per write however large the store gets.
+    Compaction only copies the quotes on the event loop; serialising, the
+    durable write and trimming the log happen on the persistence writer.
+
+    When the bot runs as several worker processes each one only keeps the
+    guilds on its own shards; appends and compaction take a shared file lock
+    and compaction keeps the other workers' guilds as they are on disk.
+    """
+
+    def __init__(self, snapshot_path, log_path):
+        self.snapshot_path = snapshot_path
+        self.log_path = log_path
+        self.guilds = {}    # guild_id -> {quote_id: text}, in id order
+        self.next_ids = {}  # guild_id -> next quote_id
+        self.count = 0      # quotes across every guild held here
+        self.log_entries = 0
+        self._log = None
+
+    # --- Loading ---
+    def load(self):
+        with file_lock(self.snapshot_path):
+            self._read()
+        if partition.partitioned:
+            self.guilds = {g: quotes for g, quotes in self.guilds.items() if partition.owns(g)}
+            self.next_ids = {g: next_id for g, next_id in self.next_ids.items() if partition.owns(g)}
+        self.count = sum(len(quotes) for quotes in self.guilds.values())
+        self._log = open(self.log_path, "a")
+
+    def _read(self):
+        self.guilds = {}
+        self.next_ids = {}
+
+        for guild_id, entry in read_json(self.snapshot_path).items():
+            if isinstance(entry, list):
+                # Old format: a plain list, so the numbers people know are positions
+                quotes = {i: text for i, text in enumerate(entry, start=1)}
+                next_id = len(entry) + 1
+            else:
+                quotes = {int(quote_id): text for quote_id, text in entry["quotes"].items()}
+                next_id = entry["next_id"]
+            self.guilds[guild_id] = quotes
+            self.next_ids[guild_id] = next_id
+
+        self.log_entries = 0
+        if os.path.exists(self.log_path):
+            good = 0  # byte offset just past the last complete entry
+            with open(self.log_path, "rb") as f:
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # Torn final write from a crash
+                    try:
+                        op = json.loads(line)
+                    except ValueError:
+                        break
+                    self._apply(op)
+                    self.log_entries += 1
+                    good += len(line)
+            # Cut the torn tail off, or new entries appended after it would be
+            # skipped along with it on the next replay
+            if good < os.path.getsize(self.log_path):
+                os.truncate(self.log_path, good)
+
+    def close(self):
+        if self._log:
+            self._log.close()
+            self._log = None
+
+    def _apply(self, op):
+        guild_id = op["guild"]
+        quotes = self.guilds.setdefault(guild_id, {})
+        if op["op"] == "add":
+            quotes[op["id"]] = op["text"]
+            self.next_ids[guild_id] = max(self.next_ids.get(guild_id, 1), op["id"] + 1)
+        elif op["op"] == "edit":
+            quotes[op["id"]] = op["text"]
+        elif op["op"] == "delete":
+            quotes.pop(op["id"], None)
+
+    # --- Changes ---
+    def quotes(self, guild_id):
+        return self.guilds.get(guild_id, {})
+
+    def add(self, guild_id, text):
+        quote_id = self.next_ids.get(guild_id, 1)
+        self.next_ids[guild_id] = quote_id + 1
+        self.guilds.setdefault(guild_id, {})[quote_id] = text
+        self.count += 1
+        self._append({"op": "add", "guild": guild_id, "id": quote_id, "text": text})
+        return quote_id
+
+    def edit(self, guild_id, quote_id, text):
+        quotes = self.guilds.get(guild_id, {})
+        if quote_id not in quotes:
+            return None
+        old_text = quotes[quote_id]
+        quotes[quote_id] = text
+        self._append({"op": "edit", "guild": guild_id, "id": quote_id, "text": text})
+        return old_text
+
+    def delete(self, guild_id, quote_id):
+        quotes = self.guilds.get(guild_id, {})
+        if quote_id not in quotes:
+            return None
+        removed = quotes.pop(quote_id)
+        self.count -= 1
+        self._append({"op": "delete", "guild": guild_id, "id": quote_id})
+        return removed
+
+    # --- Persistence ---
+    def _append(self, op):
+        with file_lock(self.snapshot_path):
+            if os.fstat(self._log.fileno()).st_nlink == 0:
+                # A compaction swapped the log out from under this handle
+                self._log.close()
+                self._log = open(self.log_path, "a")
+            self._log.write(json.dumps(op, separators=(",", ":")) + "\n")
+            self._log.flush()
+        self.log_entries += 1
+        if self.log_entries >= max(COMPACT_EVERY, self.count):
+            self.compact()
+
+    def snapshot(self):
+        return {
+            guild_id: {
+                "next_id": self.next_ids.get(guild_id, 1),
+                "quotes": {str(quote_id): text for quote_id, text in quotes.items()}
+            }
+            for guild_id, quotes in self.guilds.items()
+        }
+
+    def compact(self):
+        """Fold the log into the snapshot; returns a concurrent Future for the write."""
+        with file_lock(self.snapshot_path):
+            # Everything up to here in the log is in this copy of the quotes
+            data = self.snapshot()
+            covered = os.path.getsize(self.log_path) if os.path.exists(self.log_path) else 0
+        self.log_entries = 0
+
+        def write():
+            with file_lock(self.snapshot_path):
+                if partition.partitioned:
+                    # Other workers' guilds may only be in the log so far; fold them in as they are
+                    others = QuoteStore(self.snapshot_path, self.log_path)
+                    others._read()
+                    for guild_id, entry in others.snapshot().items():
+                        if not partition.owns(guild_id):
+                            data[guild_id] = entry
+
+                # The log is trimmed right after, so this write has to be durable first
+                atomic_write(self.snapshot_path, dumps(data))
+                trim_log(self.log_path, covered)
+
+        return writer.submit(self.snapshot_path, write)
@@ -0,0 +1,87 @@
+# utils/scheduler.py
+
+import asyncio
+import heapq
+import itertools
+import time
+
+from utils.debug import get_logger
+
+log = get_logger("scheduler")
+
+
+class Scheduler:
+    """One background task + a min-heap of due times, shared by every cog.
+
+    Jobs are keyed so they can be rescheduled or cancelled; stale heap
+    entries are skipped lazily when they surface instead of being removed.
+    """
+
+    def __init__(self):
+        self._heap = []            # (when, seq, key)
+        self._jobs = {}            # key -> (seq, callback)
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._running = set()  # The loop only keeps weak references to tasks
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name="scheduler")
+
+    def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def __len__(self):
+        return len(self._jobs)
+
+    def schedule(self, when, key, callback):
+        """Run ``callback()`` (a coroutine function) at unix time ``when``.
+
+        Scheduling an existing key replaces the previous job.
+        """
+        seq = next(self._counter)
+        self._jobs[key] = (seq, callback)
+        heapq.heappush(self._heap, (when, seq, key))
+        # Only wake the loop if the new job is now the earliest one
+        if self._heap[0][1] == seq:
+            self._wakeup.set()
+
+    def cancel(self, key):
+        return self._jobs.pop(key, None) is not None
+
+    def pending(self, key):
+        return key in self._jobs
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+
+            while self._heap and self._heap[0][0] <= now:
+                _, seq, key = heapq.heappop(self._heap)
+                job = self._jobs.get(key)
+                if not job or job[0] != seq:
+                    continue  # Cancelled or rescheduled
+                del self._jobs[key]
+                task = asyncio.create_task(self._fire(key, job[1]))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+            # Drop stale entries so the timeout below is for a live job
+            while self._heap and self._jobs.get(self._heap[0][2], (None,))[0] != self._heap[0][1]:
+                heapq.heappop(self._heap)
+
+            timeout = self._heap[0][0] - time.time() if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _fire(self, key, callback):
+        try:
+            await callback()
+        except Exception:
+            log.exception(f"Job {key} failed")
@@ -0,0 +1,88 @@
+# utils/snipe.py
+
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+
+SNIPE_HISTORY = 5          # deleted messages remembered per channel
+SNIPE_TTL = 60 * 60        # seconds a deleted message stays snipeable
+SNIPE_MAX_ENTRIES = 5000   # across every channel; the least recently active go first
+
+
+class SnipeRecord:
+    __slots__ = ("author_id", "author_name", "avatar_url", "content", "created_at", "deleted_at")
+
+    def __init__(self, message):
+        author = message.author
+        self.author_id = author.id
+        self.author_name = author.display_name
+        self.avatar_url = author.display_avatar.url
+        self.content = message.content
+        self.created_at = message.created_at.timestamp()
+        self.deleted_at = time.monotonic()
+
+    @property
+    def time(self):
+        return datetime.fromtimestamp(self.created_at, timezone.utc)
+
+
+class SnipeStore:
+    """Recently deleted messages, as a small ring buffer per channel.
+
+    Entries expire after ``ttl`` seconds and the whole store is capped at
+    ``max_entries``, evicting from the channel that was deleted in longest ago.
+    """
+
+    def __init__(self, history=SNIPE_HISTORY, ttl=SNIPE_TTL, max_entries=SNIPE_MAX_ENTRIES):
+        self.history = history
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.channels = OrderedDict()  # channel_id -> deque of SnipeRecord, newest last
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, message):
+        buffer = self.channels.get(message.channel.id)
+        if buffer is None:
+            buffer = self.channels[message.channel.id] = deque(maxlen=self.history)
+        else:
+            self.channels.move_to_end(message.channel.id)
+
+        if len(buffer) == self.history:
+            self.size -= 1  # The append below pushes the oldest one out
+        buffer.append(SnipeRecord(message))
+        self.size += 1
+
+        # Drop whatever has expired in the least recently active channel,
+        # then evict from it until we're back under the cap
+        cutoff = time.monotonic() - self.ttl
+        while self.channels:
+            channel_id, oldest = next(iter(self.channels.items()))
+            if oldest and oldest[0].deleted_at >= cutoff and self.size <= self.max_entries:
+                break
+            if oldest:
+                oldest.popleft()
+                self.size -= 1
+            if not oldest:
+                del self.channels[channel_id]
+
+    def get(self, channel_id, index=1):
+        """Return the ``index``-th most recent deleted message (1 = latest)."""
+        buffer = self.channels.get(channel_id)
+        if not buffer:
+            return None
+
+        # Expired entries are always at the front, so trim from there
+        cutoff = time.monotonic() - self.ttl
+        while buffer and buffer[0].deleted_at < cutoff:
+            buffer.popleft()
+            self.size -= 1
+        if not buffer:
+            del self.channels[channel_id]
+            return None
+
+        if not 1 <= index <= len(buffer):
+            return None
+        return buffer[-index]
@@ -0,0 +1,104 @@
+# utils/storage.py
+
+from contextlib import contextmanager
+
+from utils.persistence import atomic_write, dumps, loads, read_json, writer
+
+try:
+    import fcntl
+except ImportError:  # Windows; multi-process mode needs a POSIX host
+    fcntl = None
+
+
+class ShardPartition:
+    """Which guilds this process is responsible for.
+
+    Discord puts a guild on shard ``(guild_id >> 22) % shard_count``, and DMs
+    always arrive on shard 0. With no shards configured the process owns
+    everything, which is the normal single-process setup.
+    """
+
+    def __init__(self):
+        self.shard_ids = None
+        self.shard_count = None
+
+    @property
+    def partitioned(self):
+        return self.shard_ids is not None
+
+    def configure(self, shard_ids, shard_count):
+        self.shard_ids = frozenset(shard_ids) if shard_ids is not None else None
+        self.shard_count = shard_count
+
+    def owns(self, guild_id):
+        if not self.partitioned:
+            return True
+        if guild_id is None:
+            return 0 in self.shard_ids
+        return (int(guild_id) >> 22) % self.shard_count in self.shard_ids
+
+
+partition = ShardPartition()
+
+
+def by_key(key, value):
+    return key
+
+
+def by_guild_field(key, value):
+    # For files keyed by message ID, e.g. polls and events
+    return value.get("guild_id")
+
+
+@contextmanager
+def file_lock(path):
+    """Exclusive lock shared by every process touching ``path``."""
+    if fcntl is None:
+        yield
+        return
+    with open(path + ".lock", "a") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def owned(data, guild_of=by_key):
+    """Only the entries whose guild lives on this process's shards."""
+    if not partition.partitioned:
+        return data
+    return {key: value for key, value in data.items() if partition.owns(guild_of(key, value))}
+
+
+def load_shared(path, guild_of=by_key):
+    with file_lock(path):
+        return owned(read_json(path), guild_of)
+
+
+def save_shared(path, data, guild_of=by_key):
+    """Write ``data`` without clobbering entries other worker processes own.
+
+    Each process is the only writer for its own guilds, so under the lock we
+    take everyone else's entries from disk and ours from memory (including
+    deletions), then swap the file in atomically.
+
+    ``data`` is serialised right away, so the caller may keep changing it;
+    the disk work happens on the persistence writer thread. Returns a
+    concurrent Future for anyone who needs to know it landed.
+    """
+    payload = dumps(owned(data, guild_of))
+
+    def write():
+        with file_lock(path):
+            if partition.partitioned:
+                merged = {
+                    key: value for key, value in read_json(path).items()
+                    if not partition.owns(guild_of(key, value))
+                }
+                merged.update(loads(payload))
+                atomic_write(path, dumps(merged))
+            else:
+                atomic_write(path, payload)
+
+    return writer.submit(path, write)
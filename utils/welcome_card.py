@@ -0,0 +1,108 @@
+# utils/welcome_card.py
+
+import asyncio
+import io
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image, ImageDraw, ImageFont
+    CARDS_AVAILABLE = True
+except ImportError:
+    CARDS_AVAILABLE = False
+
+CARD_SIZE = (800, 250)
+AVATAR_SIZE = 180
+BACKGROUND_FILE = os.path.join("assets", "welcome_background.png")
+FONT_FILE = "DejaVuSans-Bold.ttf"
+AVATAR_CACHE_SIZE = 256
+
+# --- Worker process state, decoded once per process by _init_worker ---
+_background = None
+_mask = None
+_title_font = None
+_body_font = None
+
+
+def _load_font(size):
+    try:
+        return ImageFont.truetype(FONT_FILE, size)
+    except OSError:
+        return ImageFont.load_default()
+
+
+def _init_worker(background_file=BACKGROUND_FILE):
+    global _background, _mask, _title_font, _body_font
+
+    if os.path.exists(background_file):
+        _background = Image.open(background_file).convert("RGBA").resize(CARD_SIZE)
+    else:
+        # Plain vertical gradient when no background image is shipped
+        _background = Image.new("RGBA", CARD_SIZE)
+        draw = ImageDraw.Draw(_background)
+        for y in range(CARD_SIZE[1]):
+            shade = int(40 + 60 * y / CARD_SIZE[1])
+            draw.line([(0, y), (CARD_SIZE[0], y)], fill=(shade, 30, shade + 50, 255))
+
+    _mask = Image.new("L", (AVATAR_SIZE, AVATAR_SIZE), 0)
+    ImageDraw.Draw(_mask).ellipse((0, 0, AVATAR_SIZE, AVATAR_SIZE), fill=255)
+
+    _title_font = _load_font(48)
+    _body_font = _load_font(28)
+
+
+def render_card(avatar_bytes, name, member_number):
+    """Render one card to PNG bytes. Runs inside a worker process."""
+    if _background is None:
+        _init_worker()
+
+    card = _background.copy()
+    avatar = Image.open(io.BytesIO(avatar_bytes)).convert("RGBA").resize((AVATAR_SIZE, AVATAR_SIZE))
+    top = (CARD_SIZE[1] - AVATAR_SIZE) // 2
+    card.paste(avatar, (top, top), _mask)
+
+    draw = ImageDraw.Draw(card)
+    text_x = top * 2 + AVATAR_SIZE
+    draw.text((text_x, 60), "Welcome!", font=_title_font, fill=(255, 255, 255, 255))
+    draw.text((text_x, 125), name[:24], font=_body_font, fill=(230, 230, 230, 255))
+    draw.text((text_x, 165), f"Member #{member_number}", font=_body_font, fill=(200, 200, 200, 255))
+
+    out = io.BytesIO()
+    card.convert("RGB").save(out, format="PNG", optimize=False)
+    return out.getvalue()
+
+
+class CardRenderer:
+    """Renders welcome cards in a process pool so the event loop never blocks.
+
+    Avatars are cached by their Discord asset hash, so a returning avatar
+    (or the default avatars every raid account shares) is fetched once.
+    """
+
+    def __init__(self, workers=2):
+        self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+        self.avatars = OrderedDict()
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+
+    async def fetch_avatar(self, asset):
+        key = asset.key
+        if key in self.avatars:
+            self.avatars.move_to_end(key)
+            return self.avatars[key]
+
+        data = await asset.replace(size=256, format="png").read()
+        self.avatars[key] = data
+        if len(self.avatars) > AVATAR_CACHE_SIZE:
+            self.avatars.popitem(last=False)
+        return data
+
+    async def render(self, member, member_number):
+        avatar = await self.fetch_avatar(member.display_avatar)
+        return await self.render_bytes(avatar, member.display_name, member_number)
+
+    async def render_bytes(self, avatar_bytes, name, member_number):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.pool, render_card, avatar_bytes, name, member_number)
@@ -0,0 +1,187 @@
+# utils/xp_batch.py
+#
+# Whole-guild XP operations shared by the admin commands and xp_tool.py.
+# Long passes are generators that yield every BATCH_SIZE users; run() drives
+# one to completion, run_async() does the same but lets the event loop in
+# between chunks. Guild data is the {user_id: {"xp", "level"}, "config": {...}}
+# dict the XP cog keeps per guild.
+
+import asyncio
+import csv
+import io
+import json
+import math
+
+BATCH_SIZE = 500  # users handled between yields to the event loop
+MAX_IMPORT_ERRORS = 20  # bad rows reported before an import stops reading
+MAX_LEVEL = 10000  # anything past this in an import is a typo or an attack
+FORMATS = ("csv", "jsonl")
+CSV_HEADER = "user_id,level,xp,total_xp\n"
+
+
+class BatchError(Exception):
+    """A batch that was rejected before anything was changed."""
+
+    def __init__(self, errors):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+# --- Driving ---
+def run(steps):
+    try:
+        while True:
+            next(steps)
+    except StopIteration as done:
+        return done.value
+
+
+async def run_async(steps):
+    try:
+        while True:
+            next(steps)
+            await asyncio.sleep(0)
+    except StopIteration as done:
+        return done.value
+
+
+# --- XP curve ---
+# Level n -> n + 1 takes base_xp * (n + 1), so reaching level L takes
+# base_xp * L * (L + 1) / 2 in total. Closed forms keep every user O(1).
+def level_floor(level, base_xp):
+    return base_xp * level * (level + 1) // 2
+
+
+def total_xp(level, xp, base_xp):
+    return level_floor(level, base_xp) + xp
+
+
+def from_total(total, base_xp):
+    # Largest L with base_xp * L * (L + 1) / 2 <= total
+    level = (math.isqrt(1 + 8 * (total // base_xp)) - 1) // 2
+    return level, total - level_floor(level, base_xp)
+
+
+def max_total(base_xp):
+    return level_floor(MAX_LEVEL + 1, base_xp) - 1
+
+
+def users(guild_data):
+    # Snapshot, so a pass that yields isn't broken by new users chatting meanwhile
+    return [(user_id, data) for user_id, data in guild_data.items() if user_id != "config" and isinstance(data, dict)]
+
+
+# --- Export ---
+def export_lines(guild_data, fmt, base_xp):
+    """The guild's XP one line at a time, CSV header first."""
+    if fmt == "csv":
+        yield CSV_HEADER
+    for user_id, data in users(guild_data):
+        level, xp = data.get("level", 0), data.get("xp", 0)
+        total = total_xp(level, xp, base_xp)
+        if fmt == "csv":
+            yield f"{user_id},{level},{xp},{total}\n"
+        else:
+            yield json.dumps({"user_id": user_id, "level": level, "xp": xp, "total_xp": total}) + "\n"
+
+
+# --- Import ---
+def parse_row(row, base_xp):
+    if not isinstance(row, dict):
+        raise ValueError("expected an object")
+    user_id = str(row.get("user_id", "")).strip()
+    if not user_id.isdigit():
+        raise ValueError(f"bad user_id {user_id!r}")
+
+    if row.get("level") not in (None, "") and row.get("xp") not in (None, ""):
+        level, xp = int(row["level"]), int(row["xp"])
+        if level < 0 or xp < 0:
+            raise ValueError("level and xp can't be negative")
+        if level > MAX_LEVEL:
+            raise ValueError(f"level {level} is over the {MAX_LEVEL} limit")
+        if xp >= base_xp * (level + 1):
+            raise ValueError(f"{xp} XP is past level {level}")
+    elif row.get("total_xp") not in (None, ""):
+        # Other leveling bots usually only export a running total
+        total = int(row["total_xp"])
+        if total < 0:
+            raise ValueError("total_xp can't be negative")
+        if total > max_total(base_xp):
+            raise ValueError(f"total_xp {total} is past level {MAX_LEVEL}")
+        level, xp = from_total(total, base_xp)
+    else:
+        raise ValueError("needs level and xp, or total_xp")
+    return user_id, {"xp": xp, "level": level}
+
+
+def parse_import(text, fmt, base_xp):
+    """Validate a whole export into ``{user_id: entry}``.
+
+    Nothing is applied here; if any row is bad the import raises BatchError
+    listing them, so a file is either taken whole or not at all.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(io.StringIO(text))
+        rows = ((reader.line_num, row) for row in reader)
+    else:
+        rows = ((n, line) for n, line in enumerate(text.splitlines(), start=1) if line.strip())
+
+    entries = {}
+    errors = []
+    try:
+        for i, (line_num, row) in enumerate(rows, start=1):
+            try:
+                if fmt == "jsonl":
+                    row = json.loads(row)
+                user_id, entry = parse_row(row, base_xp)
+            except (ValueError, TypeError) as e:
+                errors.append(f"line {line_num}: {e}")
+                if len(errors) >= MAX_IMPORT_ERRORS:
+                    break
+            else:
+                entries[user_id] = entry
+            if i % BATCH_SIZE == 0:
+                yield
+    except csv.Error as e:
+        # The reader itself gave up (NUL bytes, an oversized field, ...); nothing past here is readable
+        errors.append(f"after line {reader.line_num}: {e}")
+    if errors:
+        raise BatchError(errors)
+    return entries
+
+
+def apply_import(guild_data, entries, replace=False):
+    """New guild data with ``entries`` merged in, or standing in for every user when ``replace``."""
+    merged = {key: value for key, value in guild_data.items() if key == "config"} if replace else dict(guild_data)
+    merged.update(entries)
+    return merged
+
+
+# --- Changes ---
+def grant(guild_data, user_ids, amount, base_xp):
+    """Give each user ``amount`` XP, or take it away when negative (never below
+    zero, never past MAX_LEVEL).
+
+    Each user is read and written in one step, so XP earned while the pass
+    is paused at a yield isn't lost. Returns how many users changed.
+    """
+    changed = 0
+    for i, user_id in enumerate(user_ids, start=1):
+        data = guild_data.get(user_id)
+        if not isinstance(data, dict):
+            if amount < 0:
+                continue
+            data = guild_data[user_id] = {"xp": 0, "level": 0}
+        total = total_xp(data.get("level", 0), data.get("xp", 0), base_xp)
+        level, xp = from_total(min(max(0, total + amount), max_total(base_xp)), base_xp)
+        if (level, xp) != (data.get("level", 0), data.get("xp", 0)):
+            data["level"], data["xp"] = level, xp
+            changed += 1
+        if i % BATCH_SIZE == 0:
+            yield
+    return changed
+
+
+def reset(guild_data):
+    """Guild data with every user removed and the settings kept."""
+    return {key: value for key, value in guild_data.items() if key == "config"}
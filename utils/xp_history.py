@@ -0,0 +1,133 @@
+# utils/xp_history.py
+
+import time
+
+DAY = 86400
+DAILY_DAYS = 35     # daily counters kept per user, enough to cover the month window
+WEEKLY_WEEKS = 47   # older days are folded into weekly counters; together about a year
+WINDOWS = {"week": 7, "month": 30}  # period -> days, served from the daily counters
+PERIODS = ("week", "month", "year")
+RANK_CACHE_SECONDS = 5  # how stale a cached leaderboard may get while XP keeps coming in
+
+
+def current_day():
+    return int(time.time() // DAY)
+
+
+class GuildHistory:
+    """XP earned per user per day in one guild, with running window totals.
+
+    Each user has a ring of DAILY_DAYS daily counters. Days that fall off
+    the ring are downsampled into a ring of WEEKLY_WEEKS weekly counters,
+    and weeks that fall off that are dropped. Totals for the last week,
+    month and year are updated as XP comes in and as days roll over, so a
+    windowed leaderboard never has to add anything up.
+    """
+
+    def __init__(self, record=None):
+        record = record or {}
+        self.day = record.get("day", current_day())
+        self.week = record.get("week", (self.day - DAILY_DAYS) // 7)  # newest week in the weekly ring
+        self.daily = record.get("daily", {})    # user_id -> [xp], indexed by day % DAILY_DAYS
+        self.weekly = record.get("weekly", {})  # user_id -> [xp], indexed by week % WEEKLY_WEEKS
+
+        self.totals = {period: {} for period in PERIODS}
+        for user_id, days in self.daily.items():
+            for period, length in WINDOWS.items():
+                total = sum(days[(self.day - i) % DAILY_DAYS] for i in range(length))
+                if total:
+                    self.totals[period][user_id] = total
+        for user_id in self.daily.keys() | self.weekly.keys():
+            total = sum(self.daily.get(user_id, ())) + sum(self.weekly.get(user_id, ()))
+            if total:
+                self.totals["year"][user_id] = total
+
+    def to_record(self):
+        return {"day": self.day, "week": self.week, "daily": self.daily, "weekly": self.weekly}
+
+    def add(self, user_id, amount, day=None):
+        day = current_day() if day is None else day
+        self.roll(day)
+        days = self.daily.get(user_id)
+        if days is None:
+            days = self.daily[user_id] = [0] * DAILY_DAYS
+        days[day % DAILY_DAYS] += amount
+        for totals in self.totals.values():
+            totals[user_id] = totals.get(user_id, 0) + amount
+
+    def scores(self, period, day=None):
+        self.roll(current_day() if day is None else day)
+        return self.totals[period]
+
+    # --- Expiry ---
+    def subtract(self, period, user_id, amount):
+        totals = self.totals[period]
+        remaining = totals.get(user_id, 0) - amount
+        if remaining > 0:
+            totals[user_id] = remaining
+        else:
+            totals.pop(user_id, None)
+
+    def roll(self, day):
+        """Move the window forward to ``day``; a no-op within the same day."""
+        if day <= self.day:
+            return
+        # Past DAILY_DAYS of downtime every slot is already empty
+        for d in range(self.day + 1, min(day, self.day + DAILY_DAYS) + 1):
+            slot = d % DAILY_DAYS
+            expired_week = (d - DAILY_DAYS) // 7
+            if expired_week > self.week:
+                self.expire_weeks(expired_week)
+            week_slot = expired_week % WEEKLY_WEEKS
+            for user_id, days in self.daily.items():
+                for period, length in WINDOWS.items():
+                    left = days[(d - length) % DAILY_DAYS]
+                    if left:
+                        self.subtract(period, user_id, left)
+                # The slot for day d last held day d - DAILY_DAYS; fold it into its week
+                if days[slot]:
+                    self.weekly.setdefault(user_id, [0] * WEEKLY_WEEKS)[week_slot] += days[slot]
+                    days[slot] = 0
+        self.expire_weeks((day - DAILY_DAYS) // 7)
+        self.day = day
+        self.daily = {user_id: days for user_id, days in self.daily.items() if any(days)}
+
+    def expire_weeks(self, week):
+        for w in range(self.week + 1, min(week, self.week + WEEKLY_WEEKS) + 1):
+            slot = w % WEEKLY_WEEKS
+            for user_id, weeks in self.weekly.items():
+                if weeks[slot]:
+                    self.subtract("year", user_id, weeks[slot])
+                    weeks[slot] = 0
+        if week > self.week:
+            self.week = week
+            self.weekly = {user_id: weeks for user_id, weeks in self.weekly.items() if any(weeks)}
+
+
+class RankCache:
+    """Sorted rankings per (guild, period), rebuilt at most every few seconds.
+
+    Scores change on every message, so rather than re-sorting a guild on
+    each /leaderboard or /level the last ranking is reused until it is
+    RANK_CACHE_SECONDS old or invalidated.
+    """
+
+    def __init__(self, max_age=RANK_CACHE_SECONDS):
+        self.max_age = max_age
+        self._entries = {}  # (guild_id, period) -> (built_at, ranking, positions)
+
+    def get(self, guild_id, period, scores):
+        """Return ``(ranking, positions)``; ``scores()`` gives user_id -> sortable score."""
+        key = (guild_id, period)
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is None or now - entry[0] > self.max_age:
+            values = scores()
+            ranking = sorted(values, key=values.get, reverse=True)
+            positions = {user_id: i for i, user_id in enumerate(ranking, start=1)}
+            entry = self._entries[key] = (now, ranking, positions)
+        return entry[1], entry[2]
+
+    def invalidate(self, guild_id=None):
+        for key in [key for key in self._entries if guild_id is None or key[0] == guild_id]:
+            del self._entries[key]
@@ -0,0 +1,103 @@
+# xp_tool.py
+#
+# Bulk XP operations on the saved data, for when the bot is stopped (a running
+# bot would overwrite these changes with its own copy on its next save). Run
+# from the repo root:
+#
+#   python xp_tool.py export GUILD_ID --format jsonl --out xp.jsonl
+#   python xp_tool.py import GUILD_ID mee6.csv --mode replace
+#   python xp_tool.py grant GUILD_ID 500 USER_ID [USER_ID ...]
+#   python xp_tool.py reset GUILD_ID --yes
+
+import argparse
+import sys
+
+from cogs.xp import BASE_XP, HISTORY_FILE, load_xp_data, save_xp_data
+from utils.storage import load_shared, save_shared
+from utils.xp_batch import FORMATS, BatchError, apply_import, export_lines, grant, parse_import, reset, run
+
+RESET = "\033[0m"
+RED = "\033[31m"
+GREEN = "\033[32m"
+
+
+def export(xp_data, args):
+    out = open(args.out, "w", newline="") if args.out else sys.stdout
+    try:
+        for line in export_lines(xp_data.get(args.guild, {}), args.format, BASE_XP):
+            out.write(line)
+    finally:
+        if args.out:
+            out.close()
+    return None
+
+
+def import_(xp_data, args):
+    fmt = args.format or ("jsonl" if args.file.lower().endswith((".jsonl", ".json")) else "csv")
+    with open(args.file, "r", encoding="utf-8-sig", newline="") as f:
+        entries = run(parse_import(f.read(), fmt, BASE_XP))
+    xp_data[args.guild] = apply_import(xp_data.get(args.guild, {}), entries, replace=args.mode == "replace")
+    return f"Imported {len(entries)} user(s) ({args.mode})"
+
+
+def grant_(xp_data, args):
+    changed = run(grant(xp_data.setdefault(args.guild, {}), args.users, args.amount, BASE_XP))
+    return f"Changed {changed} user(s) by {args.amount:+} XP"
+
+
+def reset_(xp_data, args):
+    if not args.yes:
+        raise SystemExit(f"{RED}Refusing to reset without --yes{RESET}")
+    guild_data = xp_data.get(args.guild, {})
+    users = sum(1 for key in guild_data if key != "config")
+    xp_data[args.guild] = reset(guild_data)
+    history = load_shared(HISTORY_FILE)
+    if history.pop(args.guild, None) is not None:
+        save_shared(HISTORY_FILE, history).result()
+    return f"Cleared {users} user(s)"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk XP operations on xp_data.json.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("export", help="write a guild's XP as CSV or JSONL")
+    command.add_argument("guild")
+    command.add_argument("--format", choices=FORMATS, default="csv")
+    command.add_argument("--out", help="file to write (default: stdout)")
+    command.set_defaults(func=export)
+
+    command = commands.add_parser("import", help="load XP from this bot's export or another bot's")
+    command.add_argument("guild")
+    command.add_argument("file")
+    command.add_argument("--format", choices=FORMATS, help="default: from the file extension")
+    command.add_argument("--mode", choices=("merge", "replace"), default="merge")
+    command.set_defaults(func=import_)
+
+    command = commands.add_parser("grant", help="give (or with a negative amount, take) XP")
+    command.add_argument("guild")
+    command.add_argument("amount", type=int)
+    command.add_argument("users", nargs="+", metavar="user_id")
+    command.set_defaults(func=grant_)
+
+    command = commands.add_parser("reset", help="wipe a guild's XP and history, keeping its settings")
+    command.add_argument("guild")
+    command.add_argument("--yes", action="store_true")
+    command.set_defaults(func=reset_)
+
+    args = parser.parse_args()
+    xp_data = load_xp_data()
+    try:
+        message = args.func(xp_data, args)
+    except BatchError as e:
+        print(f"{RED}Nothing was changed:{RESET}", *e.errors, sep="\n", file=sys.stderr)
+        sys.exit(1)
+
+    # Export only reads; everything else is saved once, at the end
+    if message:
+        save_xp_data(xp_data).result()
+        print(f"{GREEN}{message}{RESET}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()